@@ -0,0 +1,148 @@
+"""
+Compare the per-string cost of `city_scrapers.utils.DateParser` against a strptime fallback chain.
+
+Every date string that reaches a DateParser, directly or through `parse_date`, while spiders parse
+their fixtures in tests/files is recorded, then parsed again three ways: with dateutil's parser, by
+trying each format in order with strptime the way spiders used to, and with a new DateParser per
+page so only repeats within a page hit its cache.
+
+    python -m benchmarks.date_parsing [--repeat 20] [--json]
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from city_scrapers_core.utils import file_response
+from dateutil.parser import parse as dateutil_parse
+
+from city_scrapers.utils import DateParser
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILES_DIR = os.path.join(ROOT_DIR, "tests", "files")
+
+# Spiders that parse dates with DateParser or parse_date, the callback that does, its fixture and
+# the URL it's served from, or None for the spider's start URL
+SPIDERS = [
+    (
+        "alle_asset_district.AlleAssetDistrictSpider",
+        "parse_meeting",
+        "alle_asset_district_detail.html",
+        "https://radworkshere.org/events/1918",
+    ),
+    ("pa_utility.PaUtilitySpider", "parse", "pa_utility.html", None),
+    ("pitt_city_planning.PittCityPlanningSpider", "parse", "pitt_city_planning.html", None),
+]
+
+
+def record_strings():
+    """Parse each fixture, returning the strings passed to each set of formats by page"""
+    recorded = OrderedDict()
+    original_parse = DateParser.parse
+
+    def recording_parse(parser, value):
+        recorded.setdefault((page, tuple(parser.formats)), []).append(value)
+        return original_parse(parser, value)
+
+    DateParser.parse = recording_parse
+    try:
+        for spider_path, callback, file_name, url in SPIDERS:
+            page = file_name
+            module_name, class_name = spider_path.split(".")
+            module = importlib.import_module("city_scrapers.spiders." + module_name)
+            spider = getattr(module, class_name)()
+            response = file_response(
+                os.path.join(FILES_DIR, file_name), url=url or spider.start_urls[0]
+            )
+            list(getattr(spider, callback)(response))
+    finally:
+        DateParser.parse = original_parse
+    return recorded
+
+
+def fallback_chain(values, formats):
+    for value in values:
+        cleaned = " ".join(value.split())
+        for date_format in formats:
+            try:
+                datetime.strptime(cleaned, date_format)
+                break
+            except ValueError:
+                continue
+
+
+def dateutil_parser(values, formats):
+    for value in values:
+        try:
+            dateutil_parse(value)
+        except (ValueError, OverflowError):
+            pass
+
+
+def date_parser(values, parser):
+    for value in values:
+        try:
+            parser.parse(value)
+        except ValueError:
+            pass
+
+
+def measure(recorded, repeat):
+    results = []
+    for (page, formats), values in recorded.items():
+        result = {"page": page, "formats": len(formats), "strings": len(values)}
+        # Spiders keep their parsers between pages, so building one isn't timed, but each run gets
+        # a new one so only repeats within the page hit its cache
+        for name, func, setup in [
+            ("dateutil", dateutil_parser, tuple),
+            ("fallback_chain", fallback_chain, tuple),
+            ("date_parser", date_parser, lambda formats: DateParser(*formats)),
+        ]:
+            best = None
+            for _ in range(repeat):
+                arg = setup(formats)
+                start = time.perf_counter()
+                func(values, arg)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            result[name + "_us"] = best / len(values) * 1000000
+        results.append(result)
+    return results
+
+
+def print_report(results, repeat):
+    print("Microseconds per string, best of {} runs".format(repeat))
+    print(
+        "{:<32}  {:>7}  {:>7}  {:>8}  {:>8}  {:>10}".format(
+            "page", "formats", "strings", "dateutil", "fallback", "DateParser"
+        )
+    )
+    for res in results:
+        print(
+            "{:<32}  {:>7}  {:>7}  {:>8.1f}  {:>8.1f}  {:>10.1f}".format(
+                res["page"], res["formats"], res["strings"], res["dateutil_us"],
+                res["fallback_chain_us"], res["date_parser_us"]
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per page, best is kept")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = measure(record_strings(), args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print_report(results, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
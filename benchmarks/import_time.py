@@ -0,0 +1,258 @@
+"""
+Measure the cold import cost of every spider module and of the production settings.
+
+Each target is imported in a fresh interpreter started with ``-X importtime`` (Python 3.7+), so
+nothing is shared between measurements. The child process also watches for network and file
+access made by city_scrapers code while the import runs, and the benchmark exits with a non-zero
+status if any target touches the network or the filesystem at import.
+
+    python -m benchmarks.import_time [--repeat 5] [--top 5] [--json] [module ...]
+"""
+import argparse
+import builtins
+import importlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import sysconfig
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT_DIR, "city_scrapers")
+SPIDERS_DIR = os.path.join(PACKAGE_DIR, "spiders")
+SETTINGS_MODULE = "city_scrapers.settings.prod"
+
+STDLIB_DIRS = tuple({sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["platstdlib"]})
+SITE_DIRS = tuple({sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]})
+
+# Written to stderr by the child right before the target is imported, so that the benchmark's
+# own imports are left out of the measurement
+START_MARKER = "import-benchmark: start"
+ALL_SPIDERS = "(all spider modules)"
+
+
+def spider_modules():
+    """List spider modules from the filesystem without importing the spiders package"""
+    return [
+        "city_scrapers.spiders." + file_name[:-3]
+        for file_name in sorted(os.listdir(SPIDERS_DIR))
+        if file_name.endswith(".py") and file_name != "__init__.py"
+    ]
+
+
+def default_targets():
+    return [SETTINGS_MODULE] + spider_modules()
+
+
+def _is_stdlib(file_name):
+    return file_name.startswith(STDLIB_DIRS) and not file_name.startswith(SITE_DIRS)
+
+
+class ImportGuard:
+    """
+    Records network and file access made by city_scrapers code while active.
+
+    Access is attributed to the first frame on the stack that isn't part of the standard library,
+    so a spider calling `urlopen` at module level is reported while a third-party package reading
+    its own data files is not. Reads made by the import system itself are ignored.
+    """
+    def __init__(self):
+        self.violations = []
+        self.target = None
+        self._originals = {}
+
+    def __enter__(self):
+        self._patch(builtins, "open", "file", 0)
+        self._patch(socket, "getaddrinfo", "network", 0)
+        self._patch(socket.socket, "connect", "network", 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        for (owner, attr), original in self._originals.items():
+            setattr(owner, attr, original)
+        self._originals = {}
+
+    def _patch(self, owner, attr, kind, detail_index):
+        original = getattr(owner, attr)
+        guard = self
+
+        def wrapper(*args, **kwargs):
+            guard._check(kind, args[detail_index])
+            return original(*args, **kwargs)
+
+        self._originals[(owner, attr)] = original
+        setattr(owner, attr, wrapper)
+
+    def _check(self, kind, detail):
+        frame = sys._getframe(2)
+        while frame is not None:
+            file_name = frame.f_code.co_filename
+            if file_name.startswith("<frozen importlib"):
+                return
+            if file_name != __file__ and not _is_stdlib(file_name):
+                if file_name.startswith(PACKAGE_DIR):
+                    self.violations.append({
+                        "module": self.target,
+                        "kind": kind,
+                        "detail": repr(detail)[:200],
+                        "location":
+                            "{}:{}".format(os.path.relpath(file_name, ROOT_DIR), frame.f_lineno),
+                    })
+                return
+            frame = frame.f_back
+
+
+def run_child(targets):
+    """Import each target under an ImportGuard and print the result as JSON"""
+    result = {"errors": {}, "violations": []}
+    sys.stderr.write(START_MARKER + "\n")
+    sys.stderr.flush()
+    with ImportGuard() as guard:
+        for target in targets:
+            guard.target = target
+            try:
+                importlib.import_module(target)
+            except Exception as e:
+                result["errors"][target] = "{}: {}".format(type(e).__name__, e)
+    result["violations"] = guard.violations
+    sys.stdout.write(json.dumps(result))
+
+
+def _spawn(targets, importtime=True):
+    args = [sys.executable]
+    if importtime:
+        args.extend(["-X", "importtime"])
+    args.extend(["-m", "benchmarks.import_time", "--child"] + list(targets))
+    proc = subprocess.run(
+        args,
+        cwd=ROOT_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    try:
+        result = json.loads(proc.stdout)
+    except ValueError:
+        result = {"errors": {t: proc.stderr.strip()[-500:] for t in targets}, "violations": []}
+    return result, proc.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Aggregate `-X importtime` output recorded after the start marker.
+
+    Returns the total cumulative import time in microseconds and the self time of each top-level
+    package that was imported.
+    """
+    total = 0
+    packages = defaultdict(int)
+    started = False
+    for line in stderr.splitlines():
+        if line == START_MARKER:
+            started = True
+            continue
+        if not started or not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            total += int(cumulative_us)
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return total, dict(packages)
+
+
+def check_imports(targets=None):
+    """Import all targets in one fresh interpreter, returning errors and I/O violations"""
+    result, _ = _spawn(targets or default_targets(), importtime=False)
+    return result
+
+
+def measure(targets, repeat, label=None):
+    """Import targets `repeat` times in fresh interpreters and summarize the cost"""
+    totals = []
+    packages = defaultdict(list)
+    result = {"errors": {}, "violations": []}
+    for _ in range(repeat):
+        result, stderr = _spawn(targets)
+        if result["errors"]:
+            break
+        total, package_times = parse_importtime(stderr)
+        totals.append(total / 1000)
+        for name, self_us in package_times.items():
+            packages[name].append(self_us / 1000)
+    return {
+        "module": label or targets[0],
+        "median_ms": statistics.median(totals) if totals else None,
+        "min_ms": min(totals) if totals else None,
+        "packages": {
+            name: statistics.median(times)
+            for name, times in packages.items()
+        },
+        "errors": result["errors"],
+        "violations": result["violations"],
+    }
+
+
+def print_report(results, top):
+    width = max(len(r["module"]) for r in results)
+    print(
+        "{}  {:>9}  {:>9}  heaviest packages (self ms)".format(
+            "module".ljust(width), "median", "min"
+        )
+    )
+    for res in results:
+        if res["median_ms"] is None:
+            print("{}  {:>9}  {:>9}  {}".format(res["module"].ljust(width), "-", "-", "error"))
+            continue
+        heaviest = sorted(res["packages"].items(), key=lambda p: p[1], reverse=True)[:top]
+        print(
+            "{}  {:>9.1f}  {:>9.1f}  {}".format(
+                res["module"].ljust(width), res["median_ms"], res["min_ms"],
+                ", ".join("{} {:.1f}".format(name, ms) for name, ms in heaviest)
+            )
+        )
+    for res in results:
+        for target, error in res["errors"].items():
+            print("ERROR importing {}: {}".format(target, error), file=sys.stderr)
+        for violation in res["violations"]:
+            print(
+                "I/O at import in {module}: {kind} access {detail} from {location}".format(
+                    **violation
+                ),
+                file=sys.stderr
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="modules to import (default: all spiders)")
+    parser.add_argument("--repeat", type=int, default=5, help="cold imports per module")
+    parser.add_argument("--top", type=int, default=5, help="packages to list per module")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.modules)
+        return 0
+
+    targets = args.modules or default_targets()
+    results = [measure([target], args.repeat) for target in targets]
+    if not args.modules:
+        # What every `scrapy crawl` pays when the spider loader walks SPIDER_MODULES
+        results.append(measure(spider_modules(), args.repeat, label=ALL_SPIDERS))
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print_report(results, args.top)
+    failed = any(res["errors"] or res["violations"] for res in results)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Measure how fast each spider's callback parses its fixture from tests/files.
+
+Each callback is run against a fresh copy of its fixture `--repeat` times and the median time per
+page and items per second are reported. One extra run under tracemalloc records peak allocations,
+and one under cProfile records the time spent in regular expressions and XPath (CSS selectors are
+translated to XPath, so they're included, as is building the document on the first query).
+Profiled times include cProfile's overhead, so they're better compared to each other than to the
+median.
+
+Results are appended to a JSON history along with the current commit, and the median is compared
+to the last run from a different commit so regressions stand out.
+
+    python -m benchmarks.parse_throughput [--repeat 10] [--json] [--history PATH] [spider ...]
+"""
+import argparse
+import copy
+import cProfile
+import importlib
+import json
+import os
+import platform
+import pstats
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from city_scrapers_core.utils import file_response
+from scrapy import Request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILES_DIR = os.path.join(ROOT_DIR, "tests", "files")
+HISTORY_PATH = os.path.join(ROOT_DIR, ".scrapy", "benchmarks", "parse_throughput.json")
+
+# Spider class under city_scrapers.spiders, callback, fixture under tests/files and the URL it's
+# served from. Legistar spiders are passed the decoded JSON events instead of a response. Spiders
+# whose list pages only yield requests are measured on the callback for a detail page.
+SPIDERS = {
+    "alle_airport": (
+        "alle_airport.AlleAirportSpider",
+        "parse",
+        "alle_airport.html",
+        "https://www.flypittsburgh.com/about-us/leadership",
+    ),
+    "alle_asset_district": (
+        "alle_asset_district.AlleAssetDistrictSpider",
+        "parse_meeting",
+        "alle_asset_district_detail.html",
+        "https://radworkshere.org/events/1918",
+    ),
+    "alle_county": (
+        "legistar_agencies.AlleCountySpider",
+        "parse_legistar",
+        "alle_county.json",
+        None,
+    ),
+    "alle_health": (
+        "alle_health.AlleHealthSpider",
+        "parse",
+        "alle_health.html",
+        "https://www.alleghenycounty.us/Health-Department/Resources/About/Board-of-Health/"
+        "Public-Meeting-Schedule.aspx",
+    ),
+    "alle_improvements": (
+        "alle_improvements.AlleImprovementsSpider",
+        "parse",
+        "alle_improvements.html",
+        "https://www.county.allegheny.pa.us/economic-development/authorities/meetings-reports/aim/"
+        "meetings.aspx",
+    ),
+    "pa_dept_environmental_protection": (
+        "pa_dept_environmental_protection.PaDeptEnvironmentalProtectionSpider",
+        "parse",
+        "pa_dept_environmental_protection.html",
+        "http://www.ahs.dep.pa.gov/CalendarOfEvents/Default.aspx?list=true",
+    ),
+    "pa_development": (
+        "pa_development.PaDevelopmentSpider",
+        "parse",
+        "pa_development.json",
+        "https://dced.pa.gov/events/",
+    ),
+    "pa_liquorboard": (
+        "pa_liquorboard.PaLiquorboardSpider",
+        "parse",
+        "pa_liquorboard.html",
+        "https://www.lcb.pa.gov/About-Us/Board/Pages/Public-Meetings.aspx",
+    ),
+    "pa_utility": (
+        "pa_utility.PaUtilitySpider",
+        "parse",
+        "pa_utility.html",
+        "http://www.puc.pa.gov/about_puc/public_meeting_calendar/"
+        "public_meeting_audio_summaries_.aspx",
+    ),
+    "pgh_public_schools": (
+        "pgh_public_schools.PghPublicSchoolsSpider",
+        "_parse_detail_api",
+        "pgh_public_schools/detail.json",
+        "https://awsapieast1-prod2.schoolwires.com/REST/api/v4/CalendarEvents/GetEventDate/1/17864",
+    ),
+    "pitt_art_commission": (
+        "pitt_art_commission.PittArtCommissionSpider",
+        "parse",
+        "pitt_art_commission.html",
+        "https://pittsburghpa.gov/dcp/art-commission-schedule",
+    ),
+    "pitt_city_council": (
+        "legistar_agencies.PittCityCouncilSpider",
+        "parse_legistar",
+        "pitt_city_council.json",
+        None,
+    ),
+    "pitt_city_planning": (
+        "pitt_city_planning.PittCityPlanningSpider",
+        "parse",
+        "pitt_city_planning.html",
+        "http://pittsburghpa.gov/dcp/notices",
+    ),
+    "pitt_housing_opp": (
+        "pitt_housing_opp.PittHousingOppSpider",
+        "parse",
+        "pitt_housing_opp.html",
+        "https://www.ura.org/events/housing-opportunity-fund-advisory-board-meeting",
+    ),
+    "pitt_urbandev": (
+        "pitt_urbandev.PittUrbandevSpider",
+        "parse",
+        "pitt_urbandev.html",
+        "https://www.ura.org/pages/board-meeting-notices-agendas-and-minutes",
+    ),
+}
+
+
+class Fixture:
+    """A spider's callback and fixture, creating fresh copies so no cached parse is reused"""
+    def __init__(self, name):
+        spider_path, self.callback, file_name, self.url = SPIDERS[name]
+        module_name, class_name = spider_path.split(".")
+        module = importlib.import_module("city_scrapers.spiders." + module_name)
+        self.spider_cls = getattr(module, class_name)
+        self.path = os.path.join(FILES_DIR, file_name)
+        self.bytes = os.path.getsize(self.path)
+        if self.url is None:
+            with open(self.path) as f:
+                self.events = json.load(f)
+        else:
+            self.response = file_response(self.path, url=self.url)
+
+    def prepare(self):
+        """Return a new callback and its argument"""
+        spider = self.spider_cls()
+        if self.url is None:
+            arg = copy.deepcopy(self.events)
+        else:
+            # A copy of the response doesn't keep its cached selector or decoded text
+            arg = self.response.replace()
+            arg.request = Request(self.url)
+        return getattr(spider, self.callback), arg
+
+
+def run_callback(callback, arg):
+    """Consume a callback's output, returning the number of items"""
+    return sum(1 for output in callback(arg) if not isinstance(output, Request))
+
+
+def _is_regex(key):
+    filename, _, func_name = key
+    if "of 're.Pattern' objects" in func_name:
+        return True
+    return func_name == "_compile" and (
+        filename.endswith(os.path.join("re", "__init__.py")) or filename.endswith("re.py")
+    )
+
+
+def _is_xpath(key):
+    filename, _, func_name = key
+    return func_name == "xpath" and filename.endswith(os.path.join("parsel", "selector.py"))
+
+
+def profile_callback(fixture):
+    """Return milliseconds spent in regular expressions and in XPath during one parse"""
+    callback, arg = fixture.prepare()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    run_callback(callback, arg)
+    profiler.disable()
+    stats = pstats.Stats(profiler).stats
+    # Pattern methods are C functions, so their own time is all regex time. SelectorList.xpath
+    # calls Selector.xpath, so XPath time is only counted for calls from outside either of them.
+    regex = sum(stat[2] for key, stat in stats.items() if _is_regex(key))
+    xpath = sum(
+        caller_stat[3] for key, stat in stats.items() if _is_xpath(key)
+        for caller, caller_stat in stat[4].items() if not _is_xpath(caller)
+    )
+    return regex * 1000, xpath * 1000
+
+
+def measure(name, repeat):
+    fixture = Fixture(name)
+    times = []
+    items = 0
+    for _ in range(max(repeat, 1)):
+        callback, arg = fixture.prepare()
+        start = time.perf_counter()
+        items = run_callback(callback, arg)
+        times.append(time.perf_counter() - start)
+
+    callback, arg = fixture.prepare()
+    tracemalloc.start()
+    run_callback(callback, arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    regex_ms, xpath_ms = profile_callback(fixture)
+    median = statistics.median(times)
+    return {
+        "spider": name,
+        "callback": fixture.callback,
+        "bytes": fixture.bytes,
+        "items": items,
+        "median_ms": median * 1000,
+        "items_per_sec": items / median if median > 0 else None,
+        "peak_alloc_kb": peak / 1024,
+        "regex_ms": regex_ms,
+        "xpath_ms": xpath_ms,
+    }
+
+
+def git_commit():
+    """Return the current commit, marked as dirty if tracked files have changed, or None"""
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+        changes = subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + "-dirty" if changes.strip() else commit
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def previous_results(history, commit):
+    """Results by spider from the latest run on a different commit"""
+    for run in reversed(history):
+        if commit is None or run.get("commit") != commit:
+            return {res["spider"]: res for res in run["results"]}
+    return {}
+
+
+def compare(results, previous):
+    """Add the percent change in median time from the previous run to each result"""
+    for res in results:
+        prev = previous.get(res["spider"])
+        if prev and prev.get("median_ms"):
+            res["change_pct"] = (res["median_ms"] - prev["median_ms"]) / prev["median_ms"] * 100
+    return results
+
+
+def print_report(results, repeat):
+    print("Median of {} runs. Regex and XPath times are from a profiled run.".format(repeat))
+    print(
+        "{:<32}  {:>8}  {:>6}  {:>9}  {:>9}  {:>10}  {:>8}  {:>8}  {:>8}".format(
+            "spider", "size KB", "items", "median ms", "items/s", "peak KB", "regex ms", "xpath ms",
+            "change"
+        )
+    )
+    for res in results:
+        change = res.get("change_pct")
+        print(
+            "{:<32}  {:>8.0f}  {:>6}  {:>9.2f}  {:>9.0f}  {:>10.0f}  {:>8.2f}  {:>8.2f}  {:>8}".
+            format(
+                res["spider"], res["bytes"] / 1024, res["items"], res["median_ms"],
+                res["items_per_sec"] or 0, res["peak_alloc_kb"], res["regex_ms"], res["xpath_ms"],
+                "-" if change is None else "{:+.1f}%".format(change)
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("spiders", nargs="*", help="spiders to measure (default: all)")
+    parser.add_argument("--repeat", type=int, default=10, help="timed parses per spider")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON file results are added to")
+    parser.add_argument("--no-save", action="store_true", help="don't add results to the history")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.spiders if name not in SPIDERS]
+    if unknown:
+        parser.error("no fixture for {}".format(", ".join(unknown)))
+
+    commit = git_commit()
+    history = load_history(args.history)
+    results = [measure(name, args.repeat) for name in args.spiders or sorted(SPIDERS)]
+    compare(results, previous_results(history, commit))
+    if not args.no_save:
+        history.append({
+            "commit": commit,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "results": results,
+        })
+        save_history(args.history, history)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print_report(results, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Compare peak memory and parse time of streaming extraction against parsing the whole document.
+
+Each spider's fixture from tests/files is parsed in a fresh interpreter for each approach, so the
+peak RSS of one doesn't hide the other. "document" is how the spider extracted its data before
+switching to `city_scrapers.utils.iter_elements`, and "streaming" is the spider's current code.
+
+    python -m benchmarks.streaming_parse [--repeat 5] [--json] [spider ...]
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from city_scrapers_core.utils import file_response
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILES_DIR = os.path.join(ROOT_DIR, "tests", "files")
+MODES = ["document", "streaming"]
+
+
+def _alle_improvements_document(spider, response):
+    data = response.xpath("//table[@dropzone='copy']")
+    urls = response.xpath(
+        '//a[contains(@href, "-minutes.aspx") or contains(@href, "-agenda.aspx")]/@href'
+    ).extract()
+    return spider._parse_dates(data), urls
+
+
+def _streaming(spider, response):
+    return spider._parse_page(response)
+
+
+# Spider class under city_scrapers.spiders, and how it extracted data from the whole document
+SPIDERS = {
+    "alle_improvements": ("alle_improvements.AlleImprovementsSpider", _alle_improvements_document),
+}
+
+
+def _proc_status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def _reset_peak_rss():
+    """
+    Reset the peak RSS to the current RSS where Linux allows it, returning the current RSS.
+    Otherwise the lifetime peak is returned, which can hide a parse that uses less memory than
+    importing the spider did.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _proc_status_kb("VmRSS")
+    except OSError:
+        return _peak_rss_kb()
+
+
+def _peak_rss_kb():
+    if os.path.exists("/proc/self/status"):
+        return _proc_status_kb("VmHWM")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+def run_child(name, mode, repeat):
+    """Parse one fixture with one approach and print the result as JSON"""
+    spider_path, document = SPIDERS[name]
+    module_name, class_name = spider_path.split(".")
+    spider_cls = getattr(
+        importlib.import_module("city_scrapers.spiders." + module_name), class_name
+    )
+    spider = spider_cls()
+    extract = document if mode == "document" else _streaming
+    body_path = os.path.join(FILES_DIR, "{}.html".format(name))
+
+    times = []
+    peak_rss = []
+    for _ in range(max(repeat, 1)):
+        # A new response each time so cached selectors and decoded text aren't reused
+        response = file_response(body_path, url=spider.start_urls[0])
+        base_rss = _reset_peak_rss()
+        start = time.perf_counter()
+        extract(spider, response)
+        times.append(time.perf_counter() - start)
+        peak_rss.append(_peak_rss_kb() - base_rss)
+        del response
+    sys.stdout.write(
+        json.dumps({
+            "spider": name,
+            "mode": mode,
+            "bytes": os.path.getsize(body_path),
+            "median_ms": statistics.median(times) * 1000,
+            "peak_rss_kb": max(peak_rss),
+        })
+    )
+
+
+def measure(name, mode, repeat):
+    proc = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.streaming_parse", "--child", "--mode", mode,
+            "--repeat",
+            str(repeat), name
+        ],
+        cwd=ROOT_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if proc.returncode != 0:
+        return {"spider": name, "mode": mode, "error": proc.stderr.strip()[-500:]}
+    return json.loads(proc.stdout)
+
+
+def print_report(results):
+    print(
+        "{:<20}  {:<9}  {:>9}  {:>10}  {:>13}".format(
+            "spider", "mode", "size KB", "median ms", "peak RSS +KB"
+        )
+    )
+    for res in results:
+        if "error" in res:
+            print("{:<20}  {:<9}  error".format(res["spider"], res["mode"]))
+            print("ERROR in {spider} ({mode}): {error}".format(**res), file=sys.stderr)
+            continue
+        print(
+            "{:<20}  {:<9}  {:>9.0f}  {:>10.1f}  {:>13}".format(
+                res["spider"], res["mode"], res["bytes"] / 1024, res["median_ms"],
+                res["peak_rss_kb"]
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("spiders", nargs="*", help="spiders to compare (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="parses per spider and mode")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.spiders if name not in SPIDERS]
+    if unknown:
+        parser.error("no benchmark for {}".format(", ".join(unknown)))
+    if args.child:
+        run_child(args.spiders[0], args.mode, args.repeat)
+        return 0
+
+    results = [
+        measure(name, mode, args.repeat)
+        for name in args.spiders or sorted(SPIDERS)
+        for mode in MODES
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print_report(results)
+    return 1 if any("error" in res for res in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
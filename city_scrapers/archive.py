@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import pickle
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.request import request_fingerprint
+from twisted.internet import defer
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+DATA_FILE = "responses.dat"
+
+# Query parameters that spiders fill in with dates relative to today. They're left out when a
+# request is matched to a recorded response, so an archive can still be replayed on a later day.
+DATE_PARAMS = {"start_date", "end_date", "StartDate", "EndDate"}
+
+
+def replay_key(request):
+    """Fingerprint of a request with the DATE_PARAMS removed from its URL"""
+    url = urlsplit(request.url)
+    query = [(key, value)
+             for key, value in parse_qsl(url.query, keep_blank_values=True)
+             if key not in DATE_PARAMS]
+    return request_fingerprint(
+        request.replace(url=urlunsplit(url._replace(query=urlencode(query))))
+    )
+
+
+class CrawlArchive:
+    """
+    Responses recorded from a crawl, stored in a directory that can be replayed without network.
+
+    Each response is pickled, compressed and appended to a single data file, and a line with its
+    request fingerprint, offset and length is appended to a JSON lines index. Later records for the
+    same request replace earlier ones when the index is loaded.
+
+    A request that wasn't recorded is matched to a recorded one that only differs in its
+    DATE_PARAMS, since spiders like pa_development and pgh_public_schools request a window of
+    dates around today. The archived response still lists the events around the day it was
+    recorded, and meeting statuses are worked out from the current time, so items replayed on a
+    later day aren't always identical to the recorded run's.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.replay_index = {}
+        self._data_file = None
+        self._index_file = None
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                for line in f:
+                    if line.strip():
+                        self._add_entry(json.loads(line))
+
+    def _add_entry(self, entry):
+        self.index[entry["fingerprint"]] = entry
+        # Archives recorded before the key was added only match exactly
+        if "replay_key" in entry:
+            self.replay_index[entry["replay_key"]] = entry
+
+    def __contains__(self, request):
+        return request_fingerprint(request
+                                   ) in self.index or replay_key(request) in self.replay_index
+
+    def __len__(self):
+        return len(self.index)
+
+    def record(self, request, response, spider_name=None):
+        if self._data_file is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._data_file = open(os.path.join(self.path, DATA_FILE), "ab")
+            self._index_file = open(os.path.join(self.path, INDEX_FILE), "a")
+        data = zlib.compress(
+            pickle.dumps({
+                "url": response.url,
+                "status": response.status,
+                "headers": response.headers.to_unicode_dict(),
+                "body": response.body,
+            },
+                         protocol=2)
+        )
+        entry = {
+            "fingerprint": request_fingerprint(request),
+            "replay_key": replay_key(request),
+            "url": request.url,
+            "spider": spider_name,
+            "offset": self._data_file.tell(),
+            "length": len(data),
+        }
+        self._data_file.write(data)
+        self._data_file.flush()
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+        self._add_entry(entry)
+
+    def load(self, request):
+        """Return the response recorded for a request, or None if there isn't one"""
+        entry = self.index.get(request_fingerprint(request))
+        if entry is None:
+            entry = self.replay_index.get(replay_key(request))
+        if entry is None:
+            return None
+        with open(os.path.join(self.path, DATA_FILE), "rb") as f:
+            f.seek(entry["offset"])
+            record = pickle.loads(zlib.decompress(f.read(entry["length"])))
+        headers = Headers(record["headers"])
+        respcls = responsetypes.from_args(headers=headers, url=record["url"], body=record["body"])
+        return respcls(
+            url=record["url"],
+            status=record["status"],
+            headers=headers,
+            body=record["body"],
+            flags=["archive"],
+            request=request,
+        )
+
+    def close(self):
+        for f in [self._data_file, self._index_file]:
+            if f is not None:
+                f.close()
+        self._data_file = self._index_file = None
+
+
+class ArchiveDownloadHandler:
+    """
+    Download handler that serves every request from the CrawlArchive in
+    CITY_SCRAPERS_ARCHIVE_REPLAY instead of the network. Requests that weren't recorded are
+    ignored with a warning.
+    """
+
+    lazy = False
+    archives = {}
+
+    def __init__(self, settings, crawler=None):
+        path = settings.get("CITY_SCRAPERS_ARCHIVE_REPLAY")
+        if not path:
+            raise NotConfigured
+        if path not in self.archives:
+            self.archives[path] = CrawlArchive(path)
+        self.archive = self.archives[path]
+        self.stats = crawler.stats if crawler is not None else None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler)
+
+    def download_request(self, request, spider):
+        response = self.archive.load(request)
+        if response is None:
+            logger.warning("No archived response for %s", request)
+            self._inc_stat("archive/missing", spider)
+            return defer.fail(IgnoreRequest("No archived response for {}".format(request.url)))
+        self._inc_stat("archive/replayed", spider)
+        return defer.succeed(response)
+
+    def _inc_stat(self, key, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=spider)
@@ -0,0 +1,2 @@
+# Scrapy loads commands from a single COMMANDS_MODULE, so each city_scrapers_core command is
+# subclassed in a module here to keep it available next to the project's own commands.
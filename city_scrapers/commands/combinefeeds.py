@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timedelta
+from operator import itemgetter
+from urllib.parse import urlparse
+
+from city_scrapers_core.commands import combinefeeds
+
+from city_scrapers.storage import STORES, get_object_store, iter_lines
+
+
+class Command(combinefeeds.Command):
+    """
+    Combines feeds through the ObjectStore for FEED_URI's scheme when there is one, so feeds in a
+    local:// store can be combined the same way as feeds in S3
+    """
+    def run(self, args, opts):
+        if urlparse(self.settings.get("FEED_URI") or "").scheme in STORES:
+            self.combine_store()
+        else:
+            super().run(args, opts)
+
+    def combine_store(self):
+        store, _ = get_object_store(self.settings.get("FEED_URI"), self.settings)
+        feed_prefix = self.settings.get("CITY_SCRAPERS_DIFF_FEED_PREFIX", "%Y/%m/%d")
+
+        prefix_keys = []
+        for days_previous in range(4):
+            prefix_keys = store.list(
+                (datetime.now() - timedelta(days=days_previous)).strftime(feed_prefix)
+            )
+            if len(prefix_keys) > 0:
+                break
+
+        meetings = []
+        for key in self.get_spider_paths(prefix_keys):
+            with store.open(key) as f:
+                meetings.extend(
+                    json.loads(line.decode("utf-8")) for line in iter_lines(f) if line.strip()
+                )
+        meetings = sorted(meetings, key=itemgetter(self.start_key))
+        yesterday_iso = (datetime.now() - timedelta(days=1)).isoformat()[:19]
+        upcoming = [meeting for meeting in meetings if meeting[self.start_key][:19] > yesterday_iso]
+
+        for key, key_meetings in [("latest.json", meetings), ("upcoming.json", upcoming)]:
+            store.put(
+                key,
+                "\n".join([json.dumps(meeting) for meeting in key_meetings]),
+                cache_control="no-cache",
+            )
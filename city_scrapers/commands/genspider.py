@@ -0,0 +1,5 @@
+from city_scrapers_core.commands import genspider
+
+
+class Command(genspider.Command):
+    pass
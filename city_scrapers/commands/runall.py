@@ -0,0 +1,205 @@
+import logging
+
+from city_scrapers_core.commands import runall
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+
+from city_scrapers.archive import ArchiveDownloadHandler
+from city_scrapers.middlewares import ArchiveRecorderMiddleware, SharedThrottleMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+class SpiderErrorCounter(logging.Handler):
+    """
+    Counts error records by the spider they were logged for. Scrapy's log_count/ERROR stat counts
+    every record in the process, so under runall each spider would report every spider's errors.
+    Records that aren't logged for a spider are counted under None.
+    """
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.counts = {}
+
+    def emit(self, record):
+        spider = getattr(record, "spider", None)
+        name = getattr(spider, "name", None)
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+
+class Command(runall.Command):
+    """
+    Runs every spider, or the ones listed, concurrently in a single CrawlerProcess so the reactor,
+    settings and pipelines are set up once and a slow site doesn't hold up the others.
+
+    Each spider still gets its own crawler, so feeds, stats and status badges stay separate as long
+    as FEED_URI includes %(name)s. Their downloads share one pool of persistent connections.
+
+    With --record every response is saved to an archive directory, and --replay runs the spiders
+    against that archive without touching the network, so parsing and ITEM_PIPELINES can be timed
+    on their own. Caches that skip requests or parsing between runs are disabled in both modes so
+    a replay makes exactly the requests that were recorded. Legistar spiders load events from the
+    Web API in both modes, since the HTML calendar is fetched outside Scrapy. Date parameters in
+    request URLs are ignored when matching recorded responses, so an archive can be replayed on a
+    later day, but meeting statuses still depend on the day it's replayed.
+    """
+    def syntax(self):
+        return "[options] [spider ...]"
+
+    def short_desc(self):
+        return "Run all spiders (or the ones listed) together in one process"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_option(
+            "--concurrency",
+            dest="concurrency",
+            type="int",
+            help="maximum requests in flight across all spiders",
+        )
+        parser.add_option(
+            "--domain-concurrency",
+            dest="domain_concurrency",
+            type="int",
+            help="maximum requests in flight to a single domain across all spiders",
+        )
+        parser.add_option(
+            "--domain-delay",
+            dest="domain_delay",
+            type="float",
+            help="minimum seconds between requests to a single domain across all spiders",
+        )
+        parser.add_option(
+            "--record",
+            dest="record",
+            metavar="DIR",
+            help="save every response to an archive in DIR",
+        )
+        parser.add_option(
+            "--replay",
+            dest="replay",
+            metavar="DIR",
+            help="serve every request from the archive in DIR instead of the network",
+        )
+
+    def run(self, args, opts):
+        spider_list = self.crawler_process.spider_loader.list()
+        unknown = [spider for spider in args if spider not in spider_list]
+        if len(unknown) > 0:
+            raise UsageError("Unknown spider: {}".format(", ".join(unknown)))
+        spiders = args or spider_list
+        feed_uri = self.settings.get("FEED_URI")
+        if feed_uri and len(spiders) > 1 and "%(name)s" not in feed_uri:
+            raise UsageError("FEED_URI must include %(name)s to keep each spider's feed separate")
+
+        if opts.record and opts.replay:
+            raise UsageError("--record and --replay can't be used together")
+        self._set_limits(opts)
+        if opts.record or opts.replay:
+            self._set_archive_mode()
+        if opts.record:
+            self._add_recorder_middleware(opts.record)
+        if opts.replay:
+            self._set_replay_handlers(opts.replay)
+        else:
+            self._add_throttle_middleware()
+            # Named by path since importing the HTTP handler installs the default reactor
+            self._set_handlers("city_scrapers.connection_pool.SharedPoolDownloadHandler")
+        crawlers = []
+        for spider in spiders:
+            crawler = self.crawler_process.create_crawler(spider)
+            crawlers.append(crawler)
+            self.crawler_process.crawl(crawler)
+        error_counter = SpiderErrorCounter()
+        logging.getLogger().addHandler(error_counter)
+        try:
+            self.crawler_process.start()
+        finally:
+            logging.getLogger().removeHandler(error_counter)
+        self._log_summary(crawlers, error_counter.counts)
+
+    def _set_limits(self, opts):
+        """Override the shared limits from settings with any command line options"""
+        for option, setting in [
+            ("concurrency", "CITY_SCRAPERS_CONCURRENT_REQUESTS"),
+            ("domain_concurrency", "CITY_SCRAPERS_CONCURRENT_REQUESTS_PER_DOMAIN"),
+            ("domain_delay", "CITY_SCRAPERS_DOWNLOAD_DELAY"),
+        ]:
+            value = getattr(opts, option)
+            if value is not None:
+                self.settings.set(setting, value, priority="cmdline")
+
+    def _add_throttle_middleware(self):
+        """Add the shared throttle middleware after every other downloader middleware"""
+        self._append_downloader_middleware(SharedThrottleMiddleware)
+
+    def _append_downloader_middleware(self, middleware_cls):
+        """Order a downloader middleware closest to the downloader unless it's already enabled"""
+        middlewares = self.settings.getdict("DOWNLOADER_MIDDLEWARES")
+        fullname = "{}.{}".format(middleware_cls.__module__, middleware_cls.__name__)
+        if fullname in middlewares:
+            return
+        # Middlewares disabled with None don't have an order
+        orders = [order for order in middlewares.values() if order is not None]
+        middlewares[fullname] = max(orders + [950]) + 1
+        self.settings.set("DOWNLOADER_MIDDLEWARES", middlewares, priority="cmdline")
+
+    def _set_archive_mode(self):
+        """
+        Make every request go through Scrapy's downloader so it can be recorded and replayed. The
+        "html" Legistar backend loads calendars with the legistar package in a thread, so Legistar
+        spiders use the Web API instead.
+        """
+        self._disable_caches()
+        self.settings.set("CITY_SCRAPERS_LEGISTAR_BACKEND", "api", priority="cmdline")
+
+    def _disable_caches(self):
+        """Disable everything that lets a run skip requests or parsing based on an earlier run"""
+        self.settings.set("HTTPCACHE_ENABLED", False, priority="cmdline")
+        for setting in [
+            "CITY_SCRAPERS_FINGERPRINT_DIR",
+            "CITY_SCRAPERS_DETAIL_STORE_DIR",
+            "CITY_SCRAPERS_TOKEN_DIR",
+        ]:
+            self.settings.set(setting, None, priority="cmdline")
+
+    def _add_recorder_middleware(self, path):
+        """Record responses as they come from the downloader"""
+        self.settings.set("CITY_SCRAPERS_ARCHIVE_RECORD", path, priority="cmdline")
+        self._append_downloader_middleware(ArchiveRecorderMiddleware)
+
+    def _set_replay_handlers(self, path):
+        """Serve http and https requests from the archive with no delays between them"""
+        self.settings.set("CITY_SCRAPERS_ARCHIVE_REPLAY", path, priority="cmdline")
+        self._set_handlers(
+            "{}.{}".format(ArchiveDownloadHandler.__module__, ArchiveDownloadHandler.__name__)
+        )
+        self.settings.set("DOWNLOAD_DELAY", 0, priority="cmdline")
+        self.settings.set("AUTOTHROTTLE_ENABLED", False, priority="cmdline")
+
+    def _set_handlers(self, fullname):
+        """Download http and https requests with the handler class at fullname"""
+        handlers = self.settings.getdict("DOWNLOAD_HANDLERS")
+        handlers.update({"http": fullname, "https": fullname})
+        self.settings.set("DOWNLOAD_HANDLERS", handlers, priority="cmdline")
+
+    def _log_summary(self, crawlers, error_counts):
+        """Log each spider's outcome and fail the command if any of them had errors"""
+        for crawler in crawlers:
+            stats = crawler.stats.get_stats()
+            errors = error_counts.get(crawler.spidercls.name, 0)
+            duration = None
+            if stats.get("start_time") and stats.get("finish_time"):
+                duration = (stats["finish_time"] - stats["start_time"]).total_seconds()
+            logger.info(
+                "%s: %s, %d items, %d errors, %s seconds",
+                crawler.spidercls.name,
+                stats.get("finish_reason", "not finished"),
+                stats.get("item_scraped_count", 0),
+                errors,
+                "-" if duration is None else "{:.1f}".format(duration),
+            )
+            if errors > 0 or stats.get("finish_reason") != "finished":
+                self.exitcode = 1
+        if error_counts.get(None):
+            logger.info("%d errors weren't logged for a spider", error_counts[None])
+            self.exitcode = 1
@@ -0,0 +1,42 @@
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from twisted.internet import defer
+from twisted.web.client import HTTPConnectionPool
+
+
+class SharedPoolDownloadHandler(HTTP11DownloadHandler):
+    """
+    HTTP download handler that keeps persistent connections in one pool shared by every crawler in
+    the process, instead of a pool for each crawler. Spiders that hit the same host, like the
+    Legistar agencies loading events from webapi.legistar.com, reuse each other's connections.
+    The "html" Legistar backend makes its requests with the legistar package in a thread instead,
+    so they don't go through this pool.
+
+    The pool keeps up to CITY_SCRAPERS_CONCURRENT_REQUESTS_PER_DOMAIN idle connections to each
+    host, and they're closed when the last crawler using the pool closes.
+    """
+
+    shared_pool = None
+    users = 0
+
+    def __init__(self, settings, crawler=None):
+        super().__init__(settings, crawler)
+        cls = SharedPoolDownloadHandler
+        if cls.shared_pool is None:
+            from twisted.internet import reactor
+
+            cls.shared_pool = HTTPConnectionPool(reactor, persistent=True)
+            cls.shared_pool.maxPersistentPerHost = settings.getint(
+                "CITY_SCRAPERS_CONCURRENT_REQUESTS_PER_DOMAIN",
+                settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN"),
+            )
+            cls.shared_pool._factory.noisy = False
+        self._pool = cls.shared_pool
+        cls.users += 1
+
+    def close(self):
+        cls = SharedPoolDownloadHandler
+        cls.users = max(cls.users - 1, 0)
+        if cls.users > 0:
+            return defer.succeed(None)
+        cls.shared_pool = None
+        return super().close()
@@ -0,0 +1,5 @@
+from .calendar import CalendarExtension  # noqa
+from .feedexport import GzipMultipartFeedStorage, ObjectStoreFeedStorage  # noqa
+from .metrics import CrawlMetricsExtension  # noqa
+from .profiler import SamplingProfilerExtension  # noqa
+from .status import ObjectStoreStatusExtension  # noqa
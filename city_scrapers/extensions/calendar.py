@@ -0,0 +1,234 @@
+import hashlib
+import heapq
+import json
+import os
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from twisted.internet import defer, threads
+
+from city_scrapers.storage import get_object_store
+
+MANIFEST_FILE = "manifest.json"
+PENDING_FILE = "pending.json"
+COUNTS_FILE = "counts.json"
+
+# Set on every run by OpenCivicDataPipeline, so it's left out when checking for changes
+VOLATILE_FIELDS = ["updated_at"]
+
+
+def item_start(item):
+    return str(item.get("start_time") or item.get("start") or "")[:19]
+
+
+def item_id(item):
+    extra = item.get("extra") or {}
+    return extra.get("cityscrapers.org/id") or item.get("id") or item.get("_id")
+
+
+def iter_sorted_lines(path):
+    """Yield (sort key, line) from a partition file that's already sorted by start"""
+    with open(path) as f:
+        for line in f:
+            item = json.loads(line)
+            yield (item_start(item), item_id(item)), line.rstrip("\n")
+
+
+class CalendarExtension:
+    """
+    Maintains one calendar of every spider's meetings sorted by start, split into monthly
+    partitions like calendar/2020-01.json in the same object store as FEED_URI.
+
+    When a spider finishes, its items are sorted by start and split by month into files under
+    CITY_SCRAPERS_CALENDAR_DIR. A manifest keeps a hash of each spider's file for each month, and
+    only months where a hash changed are rebuilt, with a k-way merge of every spider's file for
+    that month. Meetings with the same ID are only included once. An index of partitions and their
+    item counts is written alongside them.
+
+    Sorting, merging and uploading run in a thread so they don't hold up other spiders in the
+    process. Spiders that close at the same time update the calendar one at a time, since they
+    share the manifest.
+    """
+
+    lock = defer.DeferredLock()
+
+    def __init__(self, crawler, state_dir, prefix):
+        self.crawler = crawler
+        self.state_dir = state_dir
+        self.prefix = prefix
+        self.items = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.get("CITY_SCRAPERS_CALENDAR_DIR"):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            data_path(crawler.settings["CITY_SCRAPERS_CALENDAR_DIR"]),
+            crawler.settings.get("CITY_SCRAPERS_CALENDAR_PREFIX", "calendar/"),
+        )
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def item_scraped(self, item, spider):
+        self.items.append(dict(item))
+
+    def spider_closed(self, spider, reason):
+        # A partial run would remove meetings it didn't reach from the calendar
+        if reason != "finished":
+            return
+        items, self.items = self.items, []
+        return self.lock.run(self.defer_write, self.write_calendar, spider, items)
+
+    def write_calendar(self, spider, items):
+        """Update a spider's partition files and write the months that changed"""
+        changed = self.update_spider(spider.name, items)
+        stats = self.crawler.stats
+        stats.set_value("calendar/partitions_changed", len(changed), spider=spider)
+        # Months stay pending until they're written, so a failed upload is retried next time
+        pending = sorted(set(self._load_json(PENDING_FILE, [])) | set(changed))
+        if pending:
+            self._save_json(PENDING_FILE, pending)
+            store, _ = get_object_store(
+                self._store_uri(), self.crawler.settings, stats=stats, spider=spider
+            )
+            self.write_partitions(store, pending)
+            self._save_json(PENDING_FILE, [])
+
+    def update_spider(self, spider_name, items):
+        """
+        Replace a spider's partition files with its sorted items, returning the months where they
+        changed
+        """
+        months = {}
+        for item in sorted(items, key=lambda item: (item_start(item), item_id(item))):
+            if not item_start(item):
+                continue
+            months.setdefault(item_start(item)[:7], []).append(item)
+
+        manifest = self.load_manifest()
+        changed = []
+        spider_months = {month
+                         for month, hashes in manifest.items()
+                         if spider_name in hashes} | set(months)
+        for month in sorted(spider_months):
+            month_items = months.get(month)
+            digest = None
+            if month_items:
+                digest = self._hash_items(month_items)
+            if manifest.get(month, {}).get(spider_name) == digest:
+                continue
+            changed.append(month)
+            path = self._partition_path(month, spider_name)
+            if digest is None:
+                # The file can already be gone if a run was interrupted before saving the manifest
+                if os.path.exists(path):
+                    os.remove(path)
+                del manifest[month][spider_name]
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    for item in month_items:
+                        f.write(json.dumps(item, sort_keys=True, default=str) + "\n")
+                manifest.setdefault(month, {})[spider_name] = digest
+        if changed:
+            self.save_manifest(manifest)
+        return changed
+
+    def merge_month(self, month):
+        """Yield the lines for a month from every spider's file, merged by start"""
+        month_dir = os.path.join(self.state_dir, month)
+        if not os.path.isdir(month_dir):
+            return
+        runs = [
+            iter_sorted_lines(os.path.join(month_dir, file_name))
+            for file_name in sorted(os.listdir(month_dir))
+        ]
+        seen = set()
+        for (_, scraper_id), line in heapq.merge(*runs):
+            if scraper_id in seen:
+                continue
+            seen.add(scraper_id)
+            yield line
+
+    def write_partitions(self, store, months):
+        """Write the merged calendar for each month, and an index of all months"""
+        manifest = self.load_manifest()
+        counts = self._load_json(COUNTS_FILE)
+        for month in months:
+            lines = list(self.merge_month(month))
+            key = "{}{}.json".format(self.prefix, month)
+            # Emptied months are overwritten rather than left with meetings that were removed
+            store.put(
+                key,
+                "\n".join(lines),
+                content_type="application/json",
+                cache_control="no-cache",
+            )
+            if lines:
+                counts[month] = len(lines)
+            else:
+                counts.pop(month, None)
+            self.crawler.stats.inc_value("calendar/items_merged", len(lines))
+        index = [{
+            "partition": "{}{}.json".format(self.prefix, month),
+            "month": month,
+            "items": counts[month],
+            "spiders": sorted(manifest.get(month, {})),
+        } for month in sorted(counts)]
+        store.put(
+            "{}index.json".format(self.prefix),
+            json.dumps(index),
+            content_type="application/json",
+            cache_control="no-cache",
+        )
+        self._save_json(COUNTS_FILE, counts)
+
+    @staticmethod
+    def defer_write(func, *args):
+        return threads.deferToThread(func, *args)
+
+    @staticmethod
+    def _hash_items(items):
+        digest = hashlib.sha1()
+        for item in items:
+            stable = {key: value for key, value in item.items() if key not in VOLATILE_FIELDS}
+            digest.update(json.dumps(stable, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def load_manifest(self):
+        return self._load_json(MANIFEST_FILE)
+
+    def save_manifest(self, manifest):
+        self._save_json(
+            MANIFEST_FILE, {
+                month: hashes
+                for month, hashes in manifest.items()
+                if hashes
+            }
+        )
+
+    def _load_json(self, file_name, default=None):
+        path = os.path.join(self.state_dir, file_name)
+        if not os.path.exists(path):
+            return {} if default is None else default
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_json(self, file_name, value):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = os.path.join(self.state_dir, file_name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def _partition_path(self, month, spider_name):
+        return os.path.join(self.state_dir, month, "{}.jsonl".format(spider_name))
+
+    def _store_uri(self):
+        feed_uri = urlparse(self.crawler.settings.get("FEED_URI"))
+        return "{}://{}/".format(feed_uri.scheme, feed_uri.netloc)
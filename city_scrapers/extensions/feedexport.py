@@ -0,0 +1,166 @@
+import gzip
+import io
+import logging
+import time
+
+from scrapy import signals
+from scrapy.extensions.feedexport import BlockingFeedStorage, IFeedStorage
+from twisted.internet import defer, threads
+from zope.interface import implementer
+
+from city_scrapers.storage import get_object_store
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectStoreFeedStorage(BlockingFeedStorage):
+    """
+    Feed storage for any ObjectStore URI, like s3://bucket/key.json or local://bucket/key.json.
+    The feed is written to a temporary file and then put in the store, replacing any earlier feed
+    with the same key.
+    """
+    def __init__(self, uri, settings=None, stats=None, feed_options=None):
+        self.object_store, self.key = get_object_store(uri, settings or {}, stats=stats)
+
+    @classmethod
+    def from_crawler(cls, crawler, uri, feed_options=None):
+        return cls(uri, crawler.settings, crawler.stats, feed_options=feed_options)
+
+    def open(self, spider):
+        self.object_store.spider = spider
+        return super().open(spider)
+
+    def _store_in_thread(self, file):
+        file.seek(0)
+        self.object_store.put(self.key, file)
+        file.close()
+
+
+class GzipPartWriter(io.RawIOBase):
+    """
+    File-like object that feed exporters write to, gzipping the feed as it's written and uploading
+    it in parts of at least part_size compressed bytes. Each part is uploaded in a thread after the
+    previous one, so the crawl continues while parts upload.
+    """
+    def __init__(self, upload, part_size, compresslevel=6):
+        self.upload = upload
+        self.part_size = part_size
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.buffer = io.BytesIO()
+        self.gzip_file = gzip.GzipFile(
+            fileobj=self.buffer, mode="wb", compresslevel=compresslevel, mtime=0
+        )
+        self.uploads = defer.succeed(None)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.gzip_file.write(data)
+        self.raw_bytes += len(data)
+        if self.buffer.tell() >= self.part_size:
+            self._upload_buffer()
+        return len(data)
+
+    def finish(self):
+        """Upload the rest of the feed and complete the upload, returning a Deferred"""
+        self.gzip_file.close()
+        self._upload_buffer()
+        self.uploads.addCallback(lambda _: self.defer_upload(self.upload.complete))
+        self.uploads.addErrback(self._abort)
+        return self.uploads
+
+    def abort(self):
+        """Abort the upload once the parts already started have finished, returning a Deferred"""
+        self.gzip_file.close()
+        self.uploads.addBoth(lambda _: self.defer_upload(self.upload.abort))
+        return self.uploads
+
+    def _upload_buffer(self):
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.compressed_bytes += len(data)
+        self.uploads.addCallback(lambda _: self.defer_upload(self.upload.upload_part, data))
+
+    def _abort(self, failure):
+        self.upload.abort()
+        return failure
+
+    @staticmethod
+    def defer_upload(func, *args):
+        return threads.deferToThread(func, *args)
+
+
+@implementer(IFeedStorage)
+class GzipMultipartFeedStorage:
+    """
+    Feed storage for any ObjectStore URI that gzips the feed and uploads it in parts while the
+    crawl runs, instead of uploading the whole feed from a temporary file when the spider closes.
+    The object keeps its key and is stored with a gzip content encoding, so clients that honor
+    Content-Encoding still read it as JSON. Raw and compressed sizes are added to the crawl stats.
+
+    Parts are CITY_SCRAPERS_FEED_PART_SIZE compressed bytes, which has to be at least 5 MB for S3.
+    The upload is only completed if the spider finished, and aborted otherwise so a partial feed
+    doesn't replace the last complete one. Uploads from a process that was killed are never
+    aborted, so the bucket needs a lifecycle rule that aborts incomplete multipart uploads.
+    """
+
+    writer_cls = GzipPartWriter
+
+    def __init__(self, uri, settings=None, stats=None, feed_options=None):
+        settings = settings or {}
+        self.object_store, self.key = get_object_store(uri, settings, stats=stats)
+        self.stats = stats
+        self.part_size = int(settings.get("CITY_SCRAPERS_FEED_PART_SIZE") or 5 * 1024 * 1024)
+        self.spider = None
+        # Fires with the reason the spider closed, or stays None without a crawler
+        self.close_reason = None
+
+    @classmethod
+    def from_crawler(cls, crawler, uri, feed_options=None):
+        storage = cls(uri, crawler.settings, crawler.stats, feed_options=feed_options)
+        storage.close_reason = defer.Deferred()
+        crawler.signals.connect(storage.spider_closed, signal=signals.spider_closed)
+        return storage
+
+    def spider_closed(self, spider, reason):
+        if not self.close_reason.called:
+            self.close_reason.callback(reason)
+
+    def open(self, spider):
+        self.spider = spider
+        self.object_store.spider = spider
+        upload = self.object_store.multipart(
+            self.key, content_type="application/json", content_encoding="gzip"
+        )
+        return self.writer_cls(upload, self.part_size)
+
+    def store(self, file):
+        # The feed exporter stores feeds from its own spider_closed handler, which can run before
+        # or after this storage's one, so wait for the reason either way
+        d = self.close_reason if self.close_reason is not None else defer.succeed("finished")
+        d.addCallback(self._finish, file)
+        return d
+
+    def _finish(self, reason, file):
+        if reason != "finished":
+            logger.warning(
+                "Aborting the upload of %s since the spider closed with %r", self.key, reason
+            )
+            return file.abort()
+        start = time.perf_counter()
+        d = file.finish()
+        d.addCallback(self._record_stats, file, start)
+        return d
+
+    def _record_stats(self, result, file, start):
+        if self.stats is not None:
+            for key, value in [
+                ("raw_bytes", file.raw_bytes),
+                ("compressed_bytes", file.compressed_bytes),
+                ("close_seconds", time.perf_counter() - start),
+            ]:
+                self.stats.set_value("feedexport/gzip/" + key, value, spider=self.spider)
+        return result
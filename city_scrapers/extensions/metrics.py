@@ -0,0 +1,101 @@
+import time
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.project import data_path
+
+from city_scrapers.metrics import BYTES_BUCKETS, CrawlMetrics
+
+
+def wrap_pipelines(itemproc, wrap):
+    """
+    Replace each pipeline's process_item in an ItemPipelineManager's chain with
+    wrap(pipeline class name, process_item)
+    """
+    pipelines = [pipe for pipe in itemproc.middlewares if hasattr(pipe, "process_item")]
+    methods = itemproc.methods["process_item"]
+    for idx, (pipe, method) in enumerate(zip(pipelines, methods)):
+        methods[idx] = wrap(type(pipe).__name__, method)
+
+
+class CrawlMetricsExtension:
+    """
+    Records where a crawl's time goes: the latency and size of each download, and the time each
+    item pipeline's process_item takes. Callback time and item counts are recorded by
+    CallbackTimingMiddleware into the same CrawlMetrics.
+
+    When the spider closes the histograms are added to its stats under metrics/, and written to
+    <spider>.json and <spider>.prom in CITY_SCRAPERS_METRICS_DIR. The .prom file is in the
+    Prometheus text format, so the directory can be read by node_exporter's textfile collector.
+    """
+    def __init__(self, crawler, metrics_dir):
+        self.crawler = crawler
+        self.metrics_dir = metrics_dir
+        self.metrics = CrawlMetrics.for_crawler(crawler)
+        self.start_time = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.get("CITY_SCRAPERS_METRICS_DIR"):
+            raise NotConfigured
+        ext = cls(crawler, data_path(crawler.settings["CITY_SCRAPERS_METRICS_DIR"]))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.start_time = datetime.now()
+        self.wrap_pipelines(self.crawler.engine.scraper.itemproc)
+
+    def wrap_pipelines(self, itemproc):
+        wrap_pipelines(itemproc, self._timed_pipeline)
+
+    def _timed_pipeline(self, pipeline, method):
+        def process_item(item, spider):
+            start = time.perf_counter()
+            try:
+                result = method(item, spider)
+            except DropItem:
+                self.metrics.inc("pipeline_dropped_total", spider=spider.name, pipeline=pipeline)
+                raise
+            finally:
+                self.metrics.observe(
+                    "pipeline_seconds",
+                    time.perf_counter() - start,
+                    spider=spider.name,
+                    pipeline=pipeline,
+                )
+            # Time a pipeline spends waiting on a Deferred isn't included, since other items are
+            # processed in the meantime
+            return result
+
+        return process_item
+
+    def response_received(self, response, request, spider):
+        latency = request.meta.get("download_latency")
+        # Responses answered from a cache or archive without downloading have no latency
+        if latency is not None:
+            self.metrics.observe("download_latency_seconds", latency, spider=spider.name)
+        self.metrics.observe(
+            "response_bytes", len(response.body), buckets=BYTES_BUCKETS, spider=spider.name
+        )
+        self.metrics.inc("responses_total", spider=spider.name, status=response.status)
+
+    def spider_closed(self, spider, reason):
+        stats = self.crawler.stats
+        for (name, labels), histogram in self.metrics.histograms.items():
+            key = "/".join(["metrics", name] +
+                           [str(value) for label, value in labels if label != "spider"])
+            stats.set_value(key, histogram.to_dict(), spider=spider)
+        self.metrics.save(
+            self.metrics_dir,
+            spider.name,
+            extra={
+                "spider": spider.name,
+                "reason": reason,
+                "start_time": self.start_time,
+                "finish_time": datetime.now(),
+            },
+        )
@@ -0,0 +1,70 @@
+import os
+import sys
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+
+from city_scrapers.profiler import SamplingProfiler
+
+from .metrics import wrap_pipelines
+
+
+class SamplingProfilerExtension:
+    """
+    Samples the stack while each spider's item pipelines run and writes everything sampled for
+    the spider, including its callbacks from SamplingProfilerMiddleware, to
+    <spider>.collapsed in CITY_SCRAPERS_PROFILE_DIR when it closes. The output can be turned into a
+    flame graph with flamegraph.pl or opened in speedscope.
+
+    Only enabled when CITY_SCRAPERS_PROFILE_DIR is set, like with
+    `scrapy crawl pitt_city_planning -s CITY_SCRAPERS_PROFILE_DIR=profiles`, so nothing is wrapped
+    and no timer runs otherwise.
+    """
+    def __init__(self, crawler, profile_dir, profiler):
+        self.crawler = crawler
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.get("CITY_SCRAPERS_PROFILE_DIR"):
+            raise NotConfigured
+        if not SamplingProfiler.available():
+            raise NotConfigured("Sampling profiler requires SIGPROF and setitimer")
+        ext = cls(
+            crawler,
+            data_path(crawler.settings["CITY_SCRAPERS_PROFILE_DIR"]),
+            SamplingProfiler.for_settings(crawler.settings),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.wrap_pipelines(self.crawler.engine.scraper.itemproc)
+        self.profiler.start()
+
+    def wrap_pipelines(self, itemproc):
+        wrap_pipelines(itemproc, self._sampled_pipeline)
+
+    def _sampled_pipeline(self, pipeline, method):
+        def process_item(item, spider):
+            self.profiler.enter(spider.name, sys._getframe())
+            try:
+                return method(item, spider)
+            finally:
+                self.profiler.exit()
+
+        return process_item
+
+    def spider_closed(self, spider, reason):
+        self.profiler.stop()
+        samples = sum(self.profiler.stacks.get(spider.name, {}).values())
+        self.crawler.stats.set_value("profile/samples", samples, spider=spider)
+        collapsed = self.profiler.pop(spider.name)
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, "{}.collapsed".format(spider.name))
+        with open(path + ".tmp", "w") as f:
+            f.write(collapsed)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,26 @@
+from urllib.parse import urlparse
+
+from city_scrapers_core.extensions.status import StatusExtension
+
+from city_scrapers.storage import get_object_store
+
+
+class ObjectStoreStatusExtension(StatusExtension):
+    """
+    Writes each spider's status badge to CITY_SCRAPERS_STATUS_BUCKET in the same kind of object
+    store as FEED_URI, so badges follow feeds to a local store when they aren't going to S3.
+    """
+    def update_status_svg(self, spider, svg):
+        scheme = urlparse(self.crawler.settings.get("FEED_URI")).scheme
+        store, _ = get_object_store(
+            "{}://{}/".format(scheme, self.crawler.settings.get("CITY_SCRAPERS_STATUS_BUCKET")),
+            self.crawler.settings,
+            stats=self.crawler.stats,
+            spider=spider,
+        )
+        store.put(
+            "{}.svg".format(spider.name),
+            svg,
+            content_type="image/svg+xml",
+            cache_control="no-cache",
+        )
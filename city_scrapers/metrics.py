@@ -0,0 +1,148 @@
+import bisect
+import json
+import os
+import weakref
+
+# Upper bounds of histogram buckets, like Prometheus's default buckets
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Counts of observed values in fixed buckets, along with their total count and sum"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return (upper bound, count of values at or below it) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {
+                _format_bound(bound): count
+                for bound, count in self.cumulative()
+            },
+        }
+
+
+class CrawlMetrics:
+    """
+    Histograms and counters for one crawler, keyed by metric name and a tuple of label pairs.
+
+    The extension and middleware that record them get the same instance with `for_crawler`, and
+    they're written out as JSON and in the Prometheus text format when the spider closes.
+    """
+
+    crawlers = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    @classmethod
+    def for_crawler(cls, crawler):
+        if crawler not in cls.crawlers:
+            cls.crawlers[crawler] = cls()
+        return cls.crawlers[crawler]
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        self.histograms[key].observe(value)
+
+    def inc(self, name, count=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + count
+
+    def to_dict(self):
+        return {
+            "histograms": [{
+                "name": name,
+                "labels": dict(labels),
+                **histogram.to_dict()
+            } for (name, labels), histogram in sorted(self.histograms.items())],
+            "counters": [{
+                "name": name,
+                "labels": dict(labels),
+                "value": value
+            } for (name, labels), value in sorted(self.counters.items())],
+        }
+
+    def to_prometheus(self, prefix="city_scrapers_"):
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = prefix + name
+            if metric not in typed:
+                lines.append("# TYPE {} histogram".format(metric))
+                typed.add(metric)
+            for bound, count in histogram.cumulative():
+                lines.append(
+                    "{}_bucket{} {}".format(
+                        metric, _format_labels(labels + (("le", _format_bound(bound)),)), count
+                    )
+                )
+            lines.append("{}_sum{} {}".format(metric, _format_labels(labels), histogram.sum))
+            lines.append("{}_count{} {}".format(metric, _format_labels(labels), histogram.count))
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = prefix + name
+            if metric not in typed:
+                lines.append("# TYPE {} counter".format(metric))
+                typed.add(metric)
+            lines.append("{}{} {}".format(metric, _format_labels(labels), value))
+        return "\n".join(lines) + "\n"
+
+    def save(self, directory, name, extra=None):
+        """Write name.json and name.prom to directory, replacing any from a previous run"""
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(
+            os.path.join(directory, "{}.json".format(name)),
+            json.dumps({
+                **(extra or {}),
+                **self.to_dict()
+            }, indent=2, sort_keys=True, default=str),
+        )
+        _write_atomic(os.path.join(directory, "{}.prom".format(name)), self.to_prometheus())
+
+
+def _format_bound(bound):
+    if bound == float("inf"):
+        return "+Inf"
+    return "{:g}".format(bound)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{{{}}}".format(
+        ",".join('{}="{}"'.format(key, _escape_label(value)) for key, value in labels)
+    )
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
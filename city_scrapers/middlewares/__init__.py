@@ -0,0 +1,6 @@
+from .archive import ArchiveRecorderMiddleware  # noqa
+from .fingerprint import ContentFingerprintMiddleware  # noqa
+from .httpcache import ConditionalHttpCacheMiddleware, RevalidatePolicy  # noqa
+from .metrics import CallbackTimingMiddleware  # noqa
+from .profiler import SamplingProfilerMiddleware  # noqa
+from .throttle import SharedThrottleMiddleware  # noqa
@@ -0,0 +1,41 @@
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from city_scrapers.archive import CrawlArchive
+
+
+class ArchiveRecorderMiddleware:
+    """
+    Downloader middleware that records every downloaded response to the CrawlArchive in
+    CITY_SCRAPERS_ARCHIVE_RECORD, so the crawl can be replayed later with ArchiveDownloadHandler.
+
+    It should be ordered closest to the downloader so responses are recorded as they were received,
+    before redirects, decompression or retries are handled. Crawlers running in the same process
+    share one archive.
+    """
+
+    archives = {}
+
+    def __init__(self, archive, stats):
+        self.archive = archive
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("CITY_SCRAPERS_ARCHIVE_RECORD")
+        if not path:
+            raise NotConfigured
+        if path not in cls.archives:
+            cls.archives[path] = CrawlArchive(path)
+        middleware = cls(cls.archives[path], crawler.stats)
+        crawler.signals.connect(middleware.engine_stopped, signal=signals.engine_stopped)
+        return middleware
+
+    def process_response(self, request, response, spider):
+        self.archive.record(request, response, spider_name=spider.name)
+        self.stats.inc_value("archive/recorded", spider=spider)
+        return response
+
+    def engine_stopped(self):
+        # Files are flushed after each record, so closing early for another crawler is harmless
+        self.archive.close()
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+import re
+import sys
+from copy import deepcopy
+from datetime import datetime
+
+from city_scrapers_core.constants import PASSED, TENTATIVE
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from scrapy.utils.request import request_fingerprint
+
+# Markup that changes on every request without the page content changing
+VOLATILE_PATTERNS = [
+    # ASP.NET and SharePoint hidden form state
+    re.compile(
+        rb'(name="(?:__VIEWSTATE|__VIEWSTATEGENERATOR|__EVENTVALIDATION|__REQUESTDIGEST)"[^>]*?'
+        rb'value=")[^"]*'
+    ),
+    # Cache-busting query strings on the URLs of scripts and stylesheets
+    re.compile(
+        rb'(<(?:script|link)\b[^>]*?\b(?:src|href)="[^"]*?[?&](?:v|ver|_|t|ts|rev)=)[\w.-]+',
+        re.IGNORECASE,
+    ),
+]
+# Server timestamps, like SharePoint's clientServerTimeDelta, are only removed from scripts and
+# meta tags so meeting times written the same way in the page still change the fingerprint
+TIMESTAMP_CONTEXT_RE = re.compile(rb"<script\b[^>]*>.*?</script>|<meta\b[^>]*>", re.S | re.I)
+TIMESTAMP_RE = re.compile(rb"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z")
+
+LOOKUP_META_KEY = "_fingerprint_lookup"
+
+
+def parse_skipped(response):
+    """Whether ContentFingerprintMiddleware will replay stored items instead of callback output"""
+    if response.request is None:
+        return False
+    lookup = response.meta.get(LOOKUP_META_KEY)
+    return lookup is not None and lookup[2] is not None
+
+
+def normalize_body(body):
+    """Remove volatile markup from a response body so unchanged pages hash the same"""
+    for pattern in VOLATILE_PATTERNS:
+        body = pattern.sub(lambda m: m.group(1), body)
+    return TIMESTAMP_CONTEXT_RE.sub(lambda m: TIMESTAMP_RE.sub(b"", m.group()), body)
+
+
+class ContentFingerprintMiddleware:
+    """
+    Spider middleware that skips parsing pages that haven't changed since the last run.
+
+    The normalized body of each response is hashed along with the source of the spider's module,
+    and stored with the items the spider's callback returned. When a later response hashes the
+    same, the stored items are replayed instead of calling the callback. This covers pages served
+    from the HTTP cache after a 304 as well as servers that don't support conditional requests.
+
+    Only applies to spiders that set `cache_items = True`, since it relies on the items coming
+    from the response body alone. Pages whose callbacks return requests are always parsed.
+    """
+    def __init__(self, cache_dir, stats):
+        self.cache_dir = cache_dir
+        self.stats = stats
+        self.spider_versions = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        cache_dir = crawler.settings.get("CITY_SCRAPERS_FINGERPRINT_DIR")
+        if not cache_dir:
+            raise NotConfigured
+        return cls(data_path(cache_dir), crawler.stats)
+
+    def process_spider_input(self, response, spider):
+        # Looked up before the callback is called so callbacks run elsewhere, like cpu_bound ones,
+        # can check parse_skipped and not do work that would be thrown away
+        if getattr(spider, "cache_items", False) and response.request is not None:
+            response.meta[LOOKUP_META_KEY] = self._lookup(spider, response)
+
+    def process_spider_output(self, response, result, spider):
+        if not getattr(spider, "cache_items", False) or response.request is None:
+            yield from result
+            return
+
+        path, fingerprint, items = (
+            response.meta.pop(LOOKUP_META_KEY, None) or self._lookup(spider, response)
+        )
+        if items is not None:
+            self.stats.inc_value("fingerprint/parse_skipped", spider=spider)
+            self.stats.inc_value("fingerprint/items_replayed", len(items), spider=spider)
+            for item in items:
+                yield self._refresh_status(deepcopy(item))
+            return
+
+        items = []
+        for output in result:
+            if isinstance(output, Request):
+                items = None
+            elif items is not None:
+                # Copied before pipelines get a chance to change it
+                items.append(deepcopy(output))
+            yield output
+        if items is not None:
+            self.stats.inc_value("fingerprint/parsed", spider=spider)
+            self._store(path, (fingerprint, items))
+
+    def _lookup(self, spider, response):
+        """Return the stored items' path, the response's fingerprint, and the items if it matches"""
+        path = self._items_path(spider, response.request)
+        fingerprint = self._fingerprint(spider, response)
+        stored = self._load(path)
+        if stored is not None and stored[0] == fingerprint:
+            return path, fingerprint, stored[1]
+        return path, fingerprint, None
+
+    def _fingerprint(self, spider, response):
+        fingerprint = hashlib.sha1(self._spider_version(spider))
+        fingerprint.update(normalize_body(response.body))
+        return fingerprint.hexdigest()
+
+    def _spider_version(self, spider):
+        """Hash of the spider's source, so changes to parsing invalidate the stored items"""
+        module = spider.__class__.__module__
+        if module not in self.spider_versions:
+            version = hashlib.sha1()
+            module_path = getattr(sys.modules.get(module), "__file__", None)
+            if module_path and os.path.exists(module_path):
+                with open(module_path, "rb") as f:
+                    version.update(f.read())
+            self.spider_versions[module] = version.digest()
+        return self.spider_versions[module]
+
+    def _items_path(self, spider, request):
+        return os.path.join(
+            self.cache_dir, spider.name, "{}.pickle".format(request_fingerprint(request))
+        )
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _store(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=2)
+        os.replace(tmp_path, path)
+
+    def _refresh_status(self, item):
+        """Statuses based on the start time may have changed since the items were stored"""
+        if item.get("status") in [PASSED, TENTATIVE] and item.get("start"):
+            item["status"] = PASSED if item["start"] < datetime.now() else TENTATIVE
+        return item
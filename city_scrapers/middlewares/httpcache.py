@@ -0,0 +1,38 @@
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import RFC2616Policy
+
+
+class RevalidatePolicy(RFC2616Policy):
+    """
+    RFC2616 cache policy that revalidates every cached page with the agency's server.
+
+    Agency pages rarely send expiration headers, and heuristic freshness could keep a changed page
+    out of a run for days. Cached responses are always treated as stale instead, so each request
+    becomes a conditional GET with the stored ETag and Last-Modified validators.
+    """
+    def should_cache_request(self, request):
+        # Only plain GETs are stored so auth tokens and form posts never end up on disk
+        if request.method != "GET" or b"Authorization" in request.headers:
+            return False
+        return super().should_cache_request(request)
+
+    def should_cache_response(self, response, request):
+        # Nothing is saved by keeping a response that can't be revalidated
+        if b"ETag" not in response.headers and b"Last-Modified" not in response.headers:
+            return False
+        return super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+
+class ConditionalHttpCacheMiddleware(HttpCacheMiddleware):
+    """HttpCacheMiddleware that records the downloads and bytes saved by each 304 response"""
+    def process_response(self, request, response, spider):
+        cachedresponse = request.meta.get("cached_response")
+        result = super().process_response(request, response, spider)
+        if result is cachedresponse and response.status == 304:
+            self.stats.inc_value("httpcache/downloads_saved", spider=spider)
+            self.stats.inc_value("httpcache/bytes_saved", len(cachedresponse.body), spider=spider)
+        return result
@@ -0,0 +1,55 @@
+import time
+
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+
+from city_scrapers.metrics import CrawlMetrics
+
+
+class CallbackTimingMiddleware:
+    """
+    Spider middleware that records how long each callback spends parsing a response and how many
+    items and requests it returns, in the CrawlMetrics written by CrawlMetricsExtension.
+
+    Callbacks are generators, so the time spent getting each result from them is added up. It
+    should be ordered closest to the spider so only the callback's own time is counted. Pages that
+    ContentFingerprintMiddleware answers from stored items are never parsed, so they aren't
+    counted. Callbacks that run in the process pool are timed in their worker and recorded as
+    pool_callback_seconds, since here they'd only be timed while the pool is called.
+    """
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.get("CITY_SCRAPERS_METRICS_DIR"):
+            raise NotConfigured
+        return cls(CrawlMetrics.for_crawler(crawler))
+
+    def process_spider_output(self, response, result, spider):
+        callback = "parse"
+        if response.request is not None and response.request.callback is not None:
+            callback = getattr(response.request.callback, "__name__", callback)
+        labels = {"spider": spider.name, "callback": callback}
+        seconds = 0.0
+        items = 0
+        requests = 0
+        result = iter(result)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    output = next(result)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - start
+                if isinstance(output, Request):
+                    requests += 1
+                else:
+                    items += 1
+                yield output
+        finally:
+            self.metrics.observe("callback_seconds", seconds, **labels)
+            self.metrics.inc("callback_items_total", items, **labels)
+            self.metrics.inc("callback_requests_total", requests, **labels)
@@ -0,0 +1,39 @@
+import sys
+
+from scrapy.exceptions import NotConfigured
+
+from city_scrapers.profiler import SamplingProfiler
+
+
+class SamplingProfilerMiddleware:
+    """
+    Spider middleware that has the SamplingProfiler attribute samples taken while a callback is
+    running to its spider. It should be ordered closest to the spider so sampled stacks start at
+    the callback. Like SamplingProfilerExtension, it's only enabled when
+    CITY_SCRAPERS_PROFILE_DIR is set. Callbacks marked cpu_bound aren't sampled when they run in the
+    process pool, since the profiler only samples this process.
+    """
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.get("CITY_SCRAPERS_PROFILE_DIR"):
+            raise NotConfigured
+        if not SamplingProfiler.available():
+            raise NotConfigured("Sampling profiler requires SIGPROF and setitimer")
+        return cls(SamplingProfiler.for_settings(crawler.settings))
+
+    def process_spider_output(self, response, result, spider):
+        # Callbacks are generators resumed from this frame, so it's the root of their stacks
+        root_frame = sys._getframe()
+        result = iter(result)
+        while True:
+            self.profiler.enter(spider.name, root_frame)
+            try:
+                output = next(result)
+            except StopIteration:
+                return
+            finally:
+                self.profiler.exit()
+            yield output
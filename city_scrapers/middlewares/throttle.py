@@ -0,0 +1,89 @@
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet import defer, task
+
+SLOT_META_KEY = "_shared_throttle_domain"
+
+
+class SharedSlots:
+    """Request slots and per-domain timing shared by every crawler in the process"""
+    def __init__(self, concurrency, domain_concurrency, domain_delay, clock=None):
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.total = defer.DeferredSemaphore(concurrency)
+        self.domain_concurrency = domain_concurrency
+        self.domain_delay = domain_delay
+        self.clock = clock
+        self.domains = {}
+        self.next_start = {}
+
+    def _domain_slot(self, domain):
+        if domain not in self.domains:
+            self.domains[domain] = defer.DeferredSemaphore(self.domain_concurrency)
+        return self.domains[domain]
+
+    @defer.inlineCallbacks
+    def acquire(self, domain):
+        """Wait for a slot for the domain, then for the domain delay, then for a global slot"""
+        # Global slots are taken last so requests queued behind a busy or slow site don't hold
+        # slots that other sites could be using
+        yield self._domain_slot(domain).acquire()
+        now = self.clock.seconds()
+        start = max(now, self.next_start.get(domain, now))
+        self.next_start[domain] = start + self.domain_delay
+        if start > now:
+            yield task.deferLater(self.clock, start - now, lambda: None)
+        yield self.total.acquire()
+
+    def release(self, domain):
+        self.total.release()
+        self._domain_slot(domain).release()
+
+
+class SharedThrottleMiddleware:
+    """
+    Downloader middleware that limits requests across every crawler running in the process.
+
+    Scrapy applies CONCURRENT_REQUESTS, CONCURRENT_REQUESTS_PER_DOMAIN and DOWNLOAD_DELAY to each
+    crawler separately, so spiders run together with `scrapy runall` would add up their limits
+    and could hit a site shared by several agencies (like pittsburghpa.gov or ura.org) at once.
+    The slots here are held on the class so all crawlers draw from the same pool. It should be
+    ordered after any middleware that can answer a request without downloading it.
+    """
+
+    shared_slots = None
+
+    def __init__(self, slots):
+        self.slots = slots
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if cls.shared_slots is None:
+            cls.shared_slots = SharedSlots(
+                crawler.settings.getint("CITY_SCRAPERS_CONCURRENT_REQUESTS"),
+                crawler.settings.getint("CITY_SCRAPERS_CONCURRENT_REQUESTS_PER_DOMAIN"),
+                crawler.settings.getfloat("CITY_SCRAPERS_DOWNLOAD_DELAY"),
+            )
+        return cls(cls.shared_slots)
+
+    def process_request(self, request, spider):
+        # A rescheduled copy of a request may still carry the slot of the original
+        self._release(request)
+        domain = urlparse_cached(request).hostname or ""
+        d = self.slots.acquire(domain)
+        d.addCallback(self._hold, request, domain)
+        return d
+
+    def process_response(self, request, response, spider):
+        self._release(request)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self._release(request)
+
+    def _hold(self, _, request, domain):
+        request.meta[SLOT_META_KEY] = domain
+
+    def _release(self, request):
+        domain = request.meta.pop(SLOT_META_KEY, None)
+        if domain is not None:
+            self.slots.release(domain)
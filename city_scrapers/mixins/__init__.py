@@ -0,0 +1,3 @@
+from .detail_store import DetailStore, DetailStoreMixin  # noqa
+from .fetch import FetchMixin  # noqa
+from .legistar import LegistarHistoryMixin  # noqa
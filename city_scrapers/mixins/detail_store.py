@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+
+from scrapy.utils.project import data_path
+
+
+class DetailStore:
+    """
+    Detail payloads saved between runs, keyed by ID along with a marker of the list entry they
+    were fetched for. A detail is only returned while its list entry's marker is unchanged.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.seen = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def marker(value):
+        """Stable hash of a JSON-serializable list entry"""
+        return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key, marker):
+        key = str(key)
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        if entry is not None and entry["marker"] == marker:
+            return entry["detail"]
+
+    def keys(self):
+        return list(self.entries)
+
+    def set(self, key, marker, detail):
+        key = str(key)
+        self.seen.add(key)
+        self.entries[key] = {"marker": marker, "detail": detail}
+
+    def save(self, prune=False):
+        """Write the store to disk, dropping entries that weren't listed this run if prune is set"""
+        if not self.path:
+            return
+        entries = self.entries
+        if prune:
+            entries = {key: entry for key, entry in entries.items() if key in self.seen}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+class DetailStoreMixin:
+    """
+    Gives a spider a `detail_store` that's saved under CITY_SCRAPERS_DETAIL_STORE_DIR when the
+    spider closes. Without the setting (or a crawler, like in tests) the store only lasts one run.
+    """
+
+    _detail_store = None
+
+    @property
+    def detail_store(self):
+        if self._detail_store is None:
+            self._detail_store = DetailStore(self._detail_store_path())
+        return self._detail_store
+
+    def _detail_store_path(self):
+        settings = getattr(self, "settings", None)
+        if settings is None or not settings.get("CITY_SCRAPERS_DETAIL_STORE_DIR"):
+            return None
+        return os.path.join(
+            data_path(settings["CITY_SCRAPERS_DETAIL_STORE_DIR"]), "{}.json".format(self.name)
+        )
+
+    def closed(self, reason):
+        # Entries are only pruned after a complete run, so a failed list request keeps the store
+        if self._detail_store is not None:
+            self._detail_store.save(prune=reason == "finished")
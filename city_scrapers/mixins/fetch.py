@@ -0,0 +1,47 @@
+import asyncio
+
+from scrapy.utils.reactor import is_asyncio_reactor_installed
+
+
+class FetchMixin:
+    """
+    Lets `async def` callbacks await requests directly instead of chaining callbacks, so a spider
+    for a JSON API can request every detail for a page of list results at once and use them in
+    the same callback.
+
+    Requests are downloaded with the crawler's engine, so they go through the downloader
+    middleware (cache, throttling, retries, cookies) but not the spider middleware or the
+    scheduler. Responses are returned whatever their status. This needs the asyncio reactor set
+    in TWISTED_REACTOR.
+    """
+
+    # Most requests fetch_all has downloading at once for the spider, on top of Scrapy's limits
+    fetch_concurrency = 4
+
+    async def fetch(self, request):
+        """Download a request and return its response"""
+        if not is_asyncio_reactor_installed():
+            raise RuntimeError("FetchMixin requires the asyncio reactor")
+        self.crawler.stats.inc_value("fetch/requests", spider=self)
+        d = self.crawler.engine.download(request, self)
+        return await d.asFuture(asyncio.get_event_loop())
+
+    async def fetch_all(self, requests, concurrency=None):
+        """
+        Download requests concurrently, returning their responses in the same order. A request
+        that fails is returned as its exception instead of a response, so the other responses
+        aren't lost and callers can skip it.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.fetch_concurrency)
+
+        async def fetch_one(request):
+            async with semaphore:
+                return await self.fetch(request)
+
+        results = await asyncio.gather(
+            *[fetch_one(request) for request in requests], return_exceptions=True
+        )
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        if failed:
+            self.crawler.stats.inc_value("fetch/failed", failed, spider=self)
+        return results
@@ -0,0 +1,212 @@
+import json
+import os
+from datetime import datetime, timedelta
+from urllib.parse import urlencode, urlparse
+
+from legistar.events import LegistarEventsScraper
+from scrapy import Request
+from scrapy.utils.project import data_path
+from twisted.internet import threads
+
+LEGISTAR_API_URL = "https://webapi.legistar.com"
+
+# Web API event fields with links to files, named like the columns of the HTML calendar
+LEGISTAR_API_LINKS = [
+    ("Agenda", "EventAgendaFile"),
+    ("Minutes", "EventMinutesFile"),
+    ("Video", "EventVideoPath"),
+]
+
+
+class LegistarHistoryMixin:
+    """
+    Legistar calendars loaded without following each event's "Meeting details" link, since the
+    agendas on those pages aren't used, and kept in a history between runs.
+
+    Like a plain LegistarSpider, events are loaded from the start of the current year, and also
+    from the previous year during the first `legistar_days_before` days of January so changes to
+    late December meetings are picked up. Events from before that come from the history saved
+    under CITY_SCRAPERS_DETAIL_STORE_DIR by previous runs, going back `legistar_history_years`
+    years before the loaded ones. Without a saved history the spider outputs the same events as a
+    plain LegistarSpider.
+
+    With CITY_SCRAPERS_LEGISTAR_BACKEND set to "api", events are loaded from the Legistar Web API's
+    JSON events endpoint instead of by paging through the HTML calendar. The API filters events
+    by date on the server and pages through them with Scrapy requests, so nothing blocks the
+    reactor. Since it isn't limited to whole years, only events from `legistar_days_before` days
+    ago on are loaded, and earlier events in the current year come from the history too. Events
+    are mapped to the same dicts the calendar scraper returns, so `parse_legistar` and the saved
+    history work the same with either. CITY_SCRAPERS_LEGISTAR_API_URL can point the API requests
+    at a stub server.
+    """
+
+    # Days before today that an event can still change, like when minutes are posted
+    legistar_days_before = 30
+    # Calendar years of saved events kept before the ones loaded from Legistar
+    legistar_history_years = 2
+    # Client name in Web API URLs, which defaults to the subdomain of the Legistar site
+    legistar_client = None
+    # Most events the Web API returns in a response
+    legistar_api_page_size = 1000
+
+    def start_requests(self):
+        if self._legistar_setting("CITY_SCRAPERS_LEGISTAR_BACKEND") == "api":
+            yield self._legistar_api_request(self._legistar_earliest_change(), [])
+        else:
+            yield from super().start_requests()
+
+    def parse(self, response):
+        """
+        Load events in a thread, since the calendar scraper's requests block and would otherwise
+        hold up every other spider crawling in the process
+        """
+        window_start = self._legistar_window_start()
+        d = threads.deferToThread(lambda: list(self._call_legistar(since=window_start.year)))
+        d.addCallback(
+            lambda events: self.parse_legistar(self._merge_legistar_history(events, window_start))
+        )
+        return d
+
+    def _call_legistar(self, since=None):
+        les = LegistarEventsScraper()
+        les.BASE_URL = self.base_url
+        les.EVENTSPAGE = "{}/Calendar.aspx".format(self.base_url)
+        if not since:
+            since = datetime.today().year
+        return les.events(follow_links=False, since=since)
+
+    def _legistar_api_request(self, window_start, events):
+        """Request the page of Web API events after the ones loaded so far"""
+        client = self.legistar_client or urlparse(self.base_url).netloc.split(".")[0]
+        api_url = self._legistar_setting("CITY_SCRAPERS_LEGISTAR_API_URL") or LEGISTAR_API_URL
+        params = {
+            "$filter": "EventDate ge datetime'{}'".format(window_start.strftime("%Y-%m-%d")),
+            "$orderby": "EventDate,EventId",
+            "$top": self.legistar_api_page_size,
+            "$skip": len(events),
+        }
+        return Request(
+            "{}/v1/{}/events?{}".format(api_url.rstrip("/"), client, urlencode(params)),
+            headers={"Accept": "application/json"},
+            callback=self._parse_legistar_api,
+            cb_kwargs={
+                "window_start": window_start,
+                "events": events
+            },
+        )
+
+    def _parse_legistar_api(self, response, window_start, events):
+        page = json.loads(response.text)
+        events = events + [(self.legistar_api_event(api_event), None) for api_event in page]
+        if len(page) >= self.legistar_api_page_size:
+            yield self._legistar_api_request(window_start, events)
+            return
+        yield from self.parse_legistar(self._merge_legistar_history(events, window_start))
+
+    def legistar_api_event(self, api_event):
+        """Map a Web API event to the dict the calendar scraper returns for the same event"""
+        event_date = datetime.strptime(api_event["EventDate"][:10], "%Y-%m-%d")
+        location = api_event.get("EventLocation") or ""
+        # The calendar scraper marks the italicized note under the location like this
+        if api_event.get("EventComment"):
+            location += "\n--em--{}--em--".format(api_event["EventComment"])
+        event = {
+            "Name": {
+                "label": api_event["EventBodyName"],
+                "url":
+                    "{}/DepartmentDetail.aspx?ID={}".format(
+                        self.base_url, api_event["EventBodyId"]
+                    ),
+            },
+            "Meeting Date": "{}/{}/{}".format(event_date.month, event_date.day, event_date.year),
+            "Meeting Time": api_event.get("EventTime") or "",
+            "Meeting Location": location,
+            "iCalendar": {
+                "url":
+                    "{}/View.ashx?M=IC&ID={}&GUID={}".format(
+                        self.base_url, api_event["EventId"], api_event["EventGuid"]
+                    )
+            },
+        }
+        if api_event.get("EventInSiteURL"):
+            event["Meeting Details"] = {
+                "label": "Meeting details",
+                "url": api_event["EventInSiteURL"],
+            }
+        for link_type, field in LEGISTAR_API_LINKS:
+            if api_event.get(field):
+                event[link_type] = {"label": link_type, "url": api_event[field]}
+            else:
+                event[link_type] = "Not\u00a0available"
+        return event
+
+    def _legistar_setting(self, name):
+        settings = getattr(self, "settings", None)
+        if settings is None:
+            return None
+        return settings.get(name)
+
+    def _legistar_window_start(self):
+        """
+        Start of the earliest calendar year that has to be loaded from the HTML calendar, which
+        can only load whole years
+        """
+        return datetime(self._legistar_earliest_change().year, 1, 1)
+
+    def _legistar_earliest_change(self):
+        """Start of the earliest day that events can still change on"""
+        earliest = datetime.today() - timedelta(days=self.legistar_days_before)
+        return datetime(earliest.year, earliest.month, earliest.day)
+
+    def _merge_legistar_history(self, events, window_start):
+        """
+        Combine fresh events with saved events from before the window and save the result. Saved
+        events inside the window are replaced by what Legistar returned this time, and saved
+        events more than `legistar_history_years` calendar years before it are dropped.
+        """
+        history_start = datetime(window_start.year - self.legistar_history_years, 1, 1)
+        path = self._legistar_history_path()
+        history = []
+        if path and os.path.exists(path):
+            with open(path) as f:
+                history = json.load(f)
+
+        merged = {}
+        for event in history:
+            event_date = self._legistar_event_date(event)
+            if event_date is not None and history_start <= event_date < window_start:
+                merged[self._legistar_event_key(event)] = event
+        for event, _ in events:
+            merged[self._legistar_event_key(event)] = event
+
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(list(merged.values()), f)
+            os.replace(tmp_path, path)
+        return [(event, None) for event in merged.values()]
+
+    def _legistar_history_path(self):
+        settings = getattr(self, "settings", None)
+        if settings is None or not settings.get("CITY_SCRAPERS_DETAIL_STORE_DIR"):
+            return None
+        return os.path.join(
+            data_path(settings["CITY_SCRAPERS_DETAIL_STORE_DIR"]),
+            "{}.history.json".format(self.name),
+        )
+
+    def _legistar_event_key(self, event):
+        for link_name in ["Meeting Details", "iCalendar"]:
+            if isinstance(event.get(link_name), dict) and event[link_name].get("url"):
+                return event[link_name]["url"]
+        name = event.get("Name")
+        if isinstance(name, dict):
+            name = name.get("label")
+        return "{} {} {}".format(name, event.get("Meeting Date"), event.get("Meeting Time"))
+
+    def _legistar_event_date(self, event):
+        try:
+            return datetime.strptime(event.get("Meeting Date") or "", "%m/%d/%Y")
+        except ValueError:
+            return None
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from city_scrapers_core.constants import CANCELLED
+from city_scrapers_core.items import Meeting
+from city_scrapers_core.pipelines import DiffPipeline
+from pytz import timezone
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, DropItem
+from scrapy.http import Response
+from scrapy.utils.project import data_path
+
+from city_scrapers.storage import get_feed_store, iter_lines
+
+logger = logging.getLogger(__name__)
+
+ID_KEY = "cityscrapers.org/id"
+
+# Fields that change on every run even when the meeting hasn't
+VOLATILE_FIELDS = {"_id", "updated_at"}
+
+
+def item_hash(item):
+    """Stable hash of an item as it's written to the feed, leaving out VOLATILE_FIELDS"""
+    fields = {key: value for key, value in dict(item).items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IndexedDiffPipeline(DiffPipeline):
+    """
+    Diff pipeline that compares items against a local index of the last run instead of loading
+    the whole previous feed.
+
+    The index maps each meeting's ID to a hash of its item in the feed, its start and its OCD ID,
+    and is kept in CITY_SCRAPERS_DIFF_INDEX_DIR. Items are checked against it as they're scraped,
+    and the previous feed is only read when upcoming meetings have disappeared. It's read line by
+    line, keeping only the items for those meetings so they can be marked cancelled. Without an
+    index the previous feed is streamed once to build one, hashing each item the same way.
+
+    Previous feeds are read from the object store in FEED_URI, so a local:// store can stand in for
+    S3, or from the directory of a file:// FEED_URI.
+    """
+    def __init__(self, crawler, output_format):
+        self.crawler = crawler
+        self.output_format = output_format
+        self.spider = crawler.spider
+        self.feed_prefix = crawler.settings.get("CITY_SCRAPERS_DIFF_FEED_PREFIX", "%Y/%m/%d")
+        self.store = get_feed_store(
+            crawler.settings.get("FEED_URI"),
+            crawler.settings,
+            stats=crawler.stats,
+            spider=self.spider,
+        )
+        self.index_path = None
+        if crawler.settings.get("CITY_SCRAPERS_DIFF_INDEX_DIR"):
+            self.index_path = os.path.join(
+                data_path(crawler.settings["CITY_SCRAPERS_DIFF_INDEX_DIR"]),
+                "{}.json".format(self.spider.name),
+            )
+        self.index = {}
+        self.next_index = {}
+        self.cancelled_ids = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipelines = crawler.settings.get("ITEM_PIPELINES", {})
+        if "city_scrapers_core.pipelines.OpenCivicDataPipeline" not in pipelines:
+            raise ValueError("An output format pipeline must be enabled for diff middleware")
+        pipeline = cls(crawler, "ocd")
+        pipeline.index = pipeline.load_index()
+        crawler.spider._scraped_ids = set()
+        crawler.signals.connect(pipeline.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(pipeline.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def load_index(self):
+        if self.index_path and os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                return json.load(f)
+        index = {}
+        for item in self.iter_previous_results():
+            index[item["extra"][ID_KEY]] = [item_hash(item), self._item_start(item), item["_id"]]
+        self.crawler.stats.set_value("diff/index_rebuilt", True, spider=self.spider)
+        return index
+
+    def save_index(self):
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.next_index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def process_item(self, item, spider):
+        """Merge past UIDs with items if a match, cancel missing upcoming meetings"""
+        stats = self.crawler.stats
+        if isinstance(item, Meeting) or (isinstance(item, dict) and "_id" not in item):
+            if item["id"] in spider._scraped_ids:
+                raise DropItem("Item has already been scraped")
+            spider._scraped_ids.add(item["id"])
+            entry = self.index.get(item["id"])
+            if entry is None:
+                stats.inc_value("diff/new", spider=spider)
+                return item
+            # Bypass __setitem__ call on Meeting to add uid
+            if isinstance(item, Meeting):
+                item._values["_id"] = entry[2]
+            else:
+                item["_id"] = entry[2]
+            return item
+
+        scraper_id = item["extra"][ID_KEY]
+        # Drop items that are already included or are in the past
+        if scraper_id in spider._scraped_ids or self._item_start(item) < self._now():
+            raise DropItem("Previous item is in scraped results or the past")
+        # If the item is upcoming and not scraped, mark it cancelled
+        spider._scraped_ids.add(scraper_id)
+        self.cancelled_ids.add(scraper_id)
+        stats.inc_value("diff/cancelled", spider=spider)
+        return {**item, "status": CANCELLED}
+
+    def spider_idle(self, spider):
+        """Add previous items for upcoming meetings that weren't scraped to the spider queue"""
+        self.crawler.signals.disconnect(self.spider_idle, signal=signals.spider_idle)
+        scraper = self.crawler.engine.scraper
+        missing_items = list(self.iter_missing_results(spider))
+        if not missing_items:
+            return
+        for item in missing_items:
+            scraper._process_spidermw_output(item, None, Response(""), spider)
+        raise DontCloseSpider
+
+    def iter_missing_results(self, spider):
+        """Yield previous items for upcoming meetings in the index that weren't scraped"""
+        now = self._now()
+        missing = {
+            scraper_id
+            for scraper_id, (_, start, _) in self.index.items()
+            if scraper_id not in spider._scraped_ids and start >= now
+        }
+        if not missing:
+            return
+        logger.debug("Loading %d upcoming meetings missing from this run", len(missing))
+        for item in self.iter_previous_results():
+            if item["extra"][ID_KEY] in missing:
+                yield item
+
+    def item_scraped(self, item, response, spider):
+        """
+        Index items as they're written to the feed, counting the ones that were already indexed
+        as changed or unchanged
+        """
+        if isinstance(item, dict) and "extra" in item:
+            scraper_id = item["extra"][ID_KEY]
+        else:
+            scraper_id = item["id"]
+        hash_ = item_hash(item)
+        entry = self.index.get(scraper_id)
+        if entry is not None and scraper_id not in self.cancelled_ids:
+            self.crawler.stats.inc_value(
+                "diff/unchanged" if entry[0] == hash_ else "diff/changed", spider=spider
+            )
+        self.next_index[scraper_id] = [hash_, self._item_start(item), item.get("_id")]
+
+    def spider_closed(self, spider, reason):
+        # The index is only replaced after a complete run, so a failed run doesn't make every
+        # meeting it missed look cancelled next time
+        if reason == "finished":
+            self.save_index()
+
+    def iter_previous_results(self):
+        """Yield items from the latest previous feed one at a time"""
+        key = self.find_previous_key()
+        if key is None:
+            return
+        self.crawler.stats.inc_value("diff/previous_feed_reads", spider=self.spider)
+        with self.store.open(key) as fileobj:
+            for line in iter_lines(fileobj):
+                if line.strip():
+                    yield json.loads(line.decode("utf-8"))
+
+    def find_previous_key(self):
+        """Return the key of the latest feed for this spider from the last few days"""
+        tz = timezone(self.spider.timezone)
+        for days_previous in range(4):
+            prefix = (tz.localize(datetime.now()) -
+                      timedelta(days=days_previous)).strftime(self.feed_prefix)
+            spider_keys = [
+                key for key in self.store.list(prefix) if "{}.".format(self.spider.name) in key
+            ]
+            if len(spider_keys) > 0:
+                return sorted(spider_keys)[-1]
+
+    def load_previous_results(self):
+        return list(self.iter_previous_results())
+
+    @staticmethod
+    def _item_start(item):
+        start = item.get("start", item.get("start_time"))
+        if isinstance(start, datetime):
+            start = start.isoformat()
+        return (start or "")[:19]
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat()[:19]
@@ -0,0 +1,149 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import wraps
+
+from scrapy import Request
+from scrapy.http import TextResponse
+from twisted.internet import defer
+
+from city_scrapers.metrics import CrawlMetrics
+from city_scrapers.middlewares.fingerprint import parse_skipped
+
+
+def cpu_bound(callback):
+    """
+    Mark a spider callback as CPU-bound, so when the spider is crawling with
+    CITY_SCRAPERS_PROCESS_POOL_SIZE set it's run in a worker process instead of on the reactor
+    thread, where it would hold up every other download while it parses.
+
+    The worker gets a copy of the response without its request's meta and calls the callback on a
+    new instance of the spider, so the callback can only use the response and can't change the
+    spider's state. It can only return items, which are sent back and continue through the spider
+    middleware and pipelines as usual. Outside of a crawl, like in tests, the callback is called
+    directly.
+    """
+    @wraps(callback)
+    def wrapper(spider, response, **kwargs):
+        pool = ProcessPool.for_spider(spider)
+        if pool is None:
+            return callback(spider, response, **kwargs)
+        # Stored items will be used instead, so there's nothing to parse
+        if parse_skipped(response):
+            return []
+        return pool.run(spider, callback.__name__, response, kwargs)
+
+    wrapper.cpu_bound = True
+    return wrapper
+
+
+def run_callback(spider_cls, callback_name, response_cls, response_kwargs, kwargs):
+    """
+    Call a cpu_bound callback on a new spider in a worker process, returning its items and the
+    seconds it took
+    """
+    response = response_cls(request=Request(response_kwargs["url"]), **response_kwargs)
+    callback = getattr(spider_cls, callback_name).__wrapped__
+    start = time.perf_counter()
+    items = []
+    for output in callback(spider_cls(), response, **kwargs) or []:
+        if isinstance(output, Request):
+            raise TypeError(
+                "{}.{} returned a request, but cpu_bound callbacks can only return items".format(
+                    spider_cls.__name__, callback_name
+                )
+            )
+        items.append(output)
+    return items, time.perf_counter() - start
+
+
+class ProcessPool:
+    """
+    Worker processes for cpu_bound callbacks, shared by every crawler in the process and shut down
+    with the reactor.
+
+    Workers are started with spawn rather than fork, since forking copies the reactor's threads'
+    locks in whatever state they're in. Spawned workers import the main module again, so scripts
+    that start crawls themselves instead of through `scrapy` need an `if __name__ == "__main__"`
+    guard.
+    """
+
+    shared = None
+
+    def __init__(self, size):
+        self.executor = ProcessPoolExecutor(
+            max_workers=size, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    @classmethod
+    def for_spider(cls, spider):
+        """Return the shared pool, or None if the spider isn't crawling or the pool is disabled"""
+        crawler = getattr(spider, "crawler", None)
+        if crawler is None:
+            return None
+        size = crawler.settings.getint("CITY_SCRAPERS_PROCESS_POOL_SIZE")
+        if size <= 0:
+            return None
+        if cls.shared is None:
+            from twisted.internet import reactor
+
+            cls.shared = cls(size)
+            reactor.addSystemEventTrigger("before", "shutdown", cls.shared.shutdown)
+        return cls.shared
+
+    def submit(self, spider, callback_name, response, kwargs=None):
+        """
+        Start running a cpu_bound callback, returning a concurrent.futures.Future of its items and
+        the seconds it took
+        """
+        response_kwargs = {
+            "url": response.url,
+            "status": response.status,
+            "headers": dict(response.headers),
+            "body": response.body,
+            "flags": list(response.flags),
+        }
+        # Keep the encoding that was detected from the headers or body so it isn't detected again
+        if isinstance(response, TextResponse):
+            response_kwargs["encoding"] = response.encoding
+        return self.executor.submit(
+            run_callback,
+            type(spider),
+            callback_name,
+            type(response),
+            response_kwargs,
+            kwargs or {},
+        )
+
+    def run(self, spider, callback_name, response, kwargs=None):
+        """Run a cpu_bound callback, returning a Deferred that fires with its items"""
+        from twisted.internet import reactor
+
+        crawler = spider.crawler
+        crawler.stats.inc_value("process_pool/callbacks", spider=spider)
+        metrics = None
+        if crawler.settings.get("CITY_SCRAPERS_METRICS_DIR"):
+            metrics = CrawlMetrics.for_crawler(crawler)
+        future = self.submit(spider, callback_name, response, kwargs)
+        d = defer.Deferred()
+
+        def done(future):
+            if future.exception() is not None:
+                d.errback(future.exception())
+                return
+            items, seconds = future.result()
+            crawler.stats.inc_value("process_pool/items", len(items), spider=spider)
+            if metrics is not None:
+                metrics.observe(
+                    "pool_callback_seconds", seconds, spider=spider.name, callback=callback_name
+                )
+            d.callback(items)
+
+        # Futures call back from the executor's thread, so the result is passed to the reactor's
+        future.add_done_callback(lambda future: reactor.callFromThread(done, future))
+        return d
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        if ProcessPool.shared is self:
+            ProcessPool.shared = None
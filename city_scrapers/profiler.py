@@ -0,0 +1,109 @@
+import os
+import signal
+import sys
+from collections import Counter
+from functools import lru_cache
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the Python stack on a CPU-time interval timer.
+
+    SIGPROF is delivered every `interval` seconds of CPU time used by the process, and the handler
+    records the stack only between `enter(label, root_frame)` and `exit()`. Stacks are cut off at
+    the root frame, so they start at the spider callback or pipeline rather than in the reactor,
+    and are counted per label. Time spent waiting on the network isn't sampled at all.
+
+    Only one can be running in a process since there's only one SIGPROF timer.
+    """
+
+    shared = None
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = {}
+        self.active = []
+        self.users = 0
+
+    @classmethod
+    def for_settings(cls, settings):
+        """Return the profiler shared by every crawler in the process"""
+        if cls.shared is None:
+            cls.shared = cls(settings.getfloat("CITY_SCRAPERS_PROFILE_INTERVAL", 0.005))
+        return cls.shared
+
+    @staticmethod
+    def available():
+        return hasattr(signal, "setitimer") and hasattr(signal, "SIGPROF")
+
+    def start(self):
+        """Start the timer, unless it's already been started for another spider"""
+        self.users += 1
+        if self.users == 1:
+            signal.signal(signal.SIGPROF, self._handle)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop the timer once every spider it was started for has stopped it"""
+        self.users = max(self.users - 1, 0)
+        if self.users == 0:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def enter(self, label, root_frame):
+        """Start attributing samples to label, with stacks starting from frames root_frame calls"""
+        self.active.append((label, root_frame))
+
+    def exit(self):
+        self.active.pop()
+
+    def _handle(self, signum, frame):
+        if not self.active:
+            return
+        label, root_frame = self.active[-1]
+        names = []
+        while frame is not None and frame is not root_frame:
+            names.append(frame_name(frame))
+            frame = frame.f_back
+        # Samples from outside the root frame's calls, or from the root frame itself, are skipped
+        if frame is None or not names:
+            return
+        if label not in self.stacks:
+            self.stacks[label] = Counter()
+        self.stacks[label][";".join(reversed(names))] += 1
+
+    def collapsed(self, label):
+        """
+        Return a label's samples in the collapsed stack format read by flamegraph.pl and
+        speedscope, one "frame;frame;frame count" line per distinct stack
+        """
+        stacks = self.stacks.get(label, {})
+        return "".join(
+            "{};{} {}\n".format(label, stack, count) for stack, count in sorted(stacks.items())
+        )
+
+    def pop(self, label):
+        """Return a label's collapsed stacks and forget them"""
+        collapsed = self.collapsed(label)
+        self.stacks.pop(label, None)
+        return collapsed
+
+
+def frame_name(frame):
+    """Name a frame by its function and where it's defined, like parse (city_scrapers/a.py:10)"""
+    code = frame.f_code
+    return "{} ({}:{})".format(code.co_name, short_path(code.co_filename),
+                               code.co_firstlineno).replace(";", ":")
+
+
+@lru_cache(maxsize=None)
+def short_path(path):
+    """Shorten a source path to be relative to the sys.path entry it's imported from"""
+    best = ""
+    for entry in sys.path:
+        entry = os.path.abspath(entry or os.curdir)
+        if path.startswith(entry + os.sep) and len(entry) > len(best):
+            best = entry
+    if not best:
+        return path
+    return os.path.relpath(path, best)
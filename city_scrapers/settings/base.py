@@ -35,12 +35,27 @@ DOWNLOADER_MIDDLEWARES = {
     "scrapy.downloadermiddlewares.robotstxt.RobotsTxtMiddleware": 543,
 }
 
-# Use commands from city_scrapers_core package
+# Run on asyncio's event loop so callbacks can be `async def` and await several requests at once
+# with asyncio, like spiders using city_scrapers.mixins.FetchMixin
 
-COMMANDS_MODULE = "city_scrapers_core.commands"
+TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
+
+# Use commands from city_scrapers_core package, extended in city_scrapers.commands
+
+COMMANDS_MODULE = "city_scrapers.commands"
+
+# Limits shared by all spiders when they're run together in one process with `scrapy runall`
+
+CITY_SCRAPERS_CONCURRENT_REQUESTS = 32
+CITY_SCRAPERS_CONCURRENT_REQUESTS_PER_DOMAIN = 2
+CITY_SCRAPERS_DOWNLOAD_DELAY = 0.5
 
 EXTENSIONS = {
     "scrapy.extensions.closespider.CloseSpider": None,
 }
 
 CLOSESPIDER_ERRORCOUNT = 5
+
+# Directory under .scrapy where local:// object stores keep each bucket
+
+CITY_SCRAPERS_LOCAL_STORE_DIR = "store"
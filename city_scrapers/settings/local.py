@@ -0,0 +1,13 @@
+from .prod import *
+
+# Production settings with feeds, status badges and previous feeds for the diff pipeline kept in
+# .scrapy/store instead of S3, so the whole production output path can be run without AWS:
+#
+#     SCRAPY_SETTINGS_MODULE=city_scrapers.settings.local scrapy runall [--replay DIR]
+
+FEED_URI = FEED_URI.replace("s3://", "local://", 1)
+
+EXTENSIONS = {
+    **EXTENSIONS,
+    "scrapy_sentry.extensions.Errors": None,
+}
@@ -5,15 +5,83 @@ USER_AGENT = "City Scrapers [production mode]. Learn more and say hello at https
 # Configure item pipelines
 ITEM_PIPELINES = {
     "city_scrapers_core.pipelines.DefaultValuesPipeline": 100,
-    "city_scrapers_core.pipelines.S3DiffPipeline": 200,
+    "city_scrapers.pipelines.IndexedDiffPipeline": 200,
     "city_scrapers_core.pipelines.MeetingPipeline": 300,
     "city_scrapers_core.pipelines.OpenCivicDataPipeline": 400,
 }
 
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 
+# Keep a local copy of each page with its ETag and Last-Modified validators, and revalidate it with
+# a conditional GET on the next run. Unchanged pages come back as a 304 and are served from disk.
+
+HTTPCACHE_ENABLED = True
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_GZIP = True
+HTTPCACHE_POLICY = "city_scrapers.middlewares.RevalidatePolicy"
+HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+
+DOWNLOADER_MIDDLEWARES = {
+    **DOWNLOADER_MIDDLEWARES,
+    "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": None,
+    "city_scrapers.middlewares.ConditionalHttpCacheMiddleware": 900,
+}
+
+# Spiders with `cache_items = True` replay the items parsed from a page on the last run instead of
+# parsing it again when its body is unchanged apart from volatile markup like __VIEWSTATE.
+
+CITY_SCRAPERS_FINGERPRINT_DIR = "fingerprints"
+
+# Spiders using DetailStoreMixin keep detail pages between runs and only request new or changed ones
+
+CITY_SCRAPERS_DETAIL_STORE_DIR = "details"
+
+# Each spider's items are compared to an index of its last run, and the previous feed is only read
+# from the feed store when upcoming meetings have disappeared from it
+
+CITY_SCRAPERS_DIFF_INDEX_DIR = "diff"
+
+# API tokens are reused across runs until shortly before they expire. The cron build doesn't cache
+# this directory, so tokens only carry over between runs on the same machine.
+
+CITY_SCRAPERS_TOKEN_DIR = "tokens"
+
+# Legistar spiders page through the HTML calendar unless this is "api", which loads events from the
+# Legistar Web API instead
+
+CITY_SCRAPERS_LEGISTAR_BACKEND = "html"
+
+# The "html" backend loads each calendar with blocking requests in a reactor thread, outside the
+# shared connection pool and request limits. DNS lookups, feed uploads and the calendar use the
+# same threads, so there are more of them than Scrapy's default of 10.
+
+REACTOR_THREADPOOL_MAXSIZE = 20
+
+SPIDER_MIDDLEWARES = {
+    "city_scrapers.middlewares.ContentFingerprintMiddleware": 950,
+    "city_scrapers.middlewares.CallbackTimingMiddleware": 990,
+    "city_scrapers.middlewares.SamplingProfilerMiddleware": 995,
+}
+
+# Download latency and size, callback time and item pipeline time are recorded for each spider,
+# added to its stats as histograms and written to .scrapy/metrics as JSON and Prometheus text
+
+CITY_SCRAPERS_METRICS_DIR = "metrics"
+
+# Callbacks marked with @cpu_bound, like the ones parsing the large alle_health and
+# alle_improvements pages, are run in this many worker processes so they don't block downloads
+
+CITY_SCRAPERS_PROCESS_POOL_SIZE = 2
+
+# Set CITY_SCRAPERS_PROFILE_DIR to sample the stack every CITY_SCRAPERS_PROFILE_INTERVAL seconds of
+# CPU time while callbacks and pipelines run, and write collapsed stacks for flame graphs there,
+# like `scrapy crawl pitt_city_planning -s CITY_SCRAPERS_PROFILE_DIR=profiles`
+
+CITY_SCRAPERS_PROFILE_INTERVAL = 0.005
+
 # Uncomment one of the StatusExtension classes to write an SVG badge of each scraper's status to
-# Azure or S3 after each time it's run.
+# Azure or S3 after each time it's run. ObjectStoreStatusExtension writes to the same kind of store
+# as FEED_URI, so it works with both s3:// and local:// feeds.
 
 # By default, this will write to the same bucket or container as the feed export, but this can be
 # configured by adding a value in the CITY_SCRAPERS_STATUS_BUCKET or CITY_SCRAPERS_STATUS_CONTAINER
@@ -21,7 +89,10 @@ SENTRY_DSN = os.getenv("SENTRY_DSN")
 
 EXTENSIONS = {
     "scrapy_sentry.extensions.Errors": 10,
-    "city_scrapers_core.extensions.S3StatusExtension": 100,
+    "city_scrapers.extensions.ObjectStoreStatusExtension": 100,
+    "city_scrapers.extensions.CalendarExtension": 200,
+    "city_scrapers.extensions.CrawlMetricsExtension": 300,
+    "city_scrapers.extensions.SamplingProfilerExtension": 400,
     "scrapy.extensions.closespider.CloseSpider": None,
 }
 
@@ -32,10 +103,29 @@ FEED_EXPORTERS = {
 
 FEED_FORMAT = "jsonlines"
 
+# Feeds, status badges and the diff pipeline all go through city_scrapers.storage, where local://
+# URIs store each bucket as a directory under CITY_SCRAPERS_LOCAL_STORE_DIR instead of in S3.
+# Feeds are gzipped and uploaded in parts while spiders run. Use ObjectStoreFeedStorage instead to
+# upload uncompressed feeds when each spider closes. Uploads are aborted when a spider doesn't
+# finish, but the S3 bucket also needs a lifecycle rule that aborts incomplete multipart uploads
+# left behind by a process that was killed.
+
 FEED_STORAGES = {
-    "s3": "scrapy.extensions.feedexport.S3FeedStorage",
+    "s3": "city_scrapers.extensions.GzipMultipartFeedStorage",
+    "local": "city_scrapers.extensions.GzipMultipartFeedStorage",
 }
 
+# Every spider's meetings are merged by start into monthly partitions under calendar/ in the feed
+# bucket. Each spider's share of a month is kept under .scrapy/calendar so only months it changed
+# are merged again when it finishes.
+
+CITY_SCRAPERS_CALENDAR_DIR = "calendar"
+CITY_SCRAPERS_CALENDAR_PREFIX = "calendar/"
+
+# Compressed bytes per uploaded part, which S3 requires to be at least 5 MB apart from the last one
+
+CITY_SCRAPERS_FEED_PART_SIZE = 5 * 1024 * 1024
+
 # Uncomment credentials for whichever provider you're using
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
@@ -1,5 +1,5 @@
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from urllib.parse import urljoin
 
 import scrapy
@@ -7,27 +7,45 @@ from city_scrapers_core.constants import NOT_CLASSIFIED
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 
+from city_scrapers.mixins import DetailStoreMixin
+from city_scrapers.utils import parse_date
 
-class AlleAssetDistrictSpider(CityScrapersSpider):
+# Times like "7:30pm" in the description, or "7pm" if there aren't any
+TIME_RE = re.compile(r'\d{1,2}:\d{2}[AaPp][Mm]')
+HOUR_RE = re.compile(r'\d{1,2}[AaPp][Mm]')
+
+# Meetings are stored by post URL, and posts aren't revalidated by content so the marker is fixed
+MEETING_MARKER = "meeting"
+START_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class AlleAssetDistrictSpider(DetailStoreMixin, CityScrapersSpider):
     name = "alle_asset_district"
     agency = "Allegheny Regional Asset District"
     timezone = "America/New_York"
     allowed_domains = ["radworkshere.org"]
     start_urls = ["https://radworkshere.org/pages/whats-happening?cal=board-meetings"]
+    cache_items = True
+    # Days after a meeting that its post is still requested, in case it's updated
+    revalidate_days = 14
 
     def parse(self, response):
         """
-        `parse` should always `yield` Meeting items.
+        Request each post on the board meetings list, except for posts about meetings that were
+        long enough ago that they won't change. Those meetings are yielded from the detail store.
 
-        Change the `_parse_id`, `_parse_name`, etc methods to fit your scraping
-        needs.
+        The list is paged in the browser, so every post is already on this page.
         """
 
         res = response.css('#board-meetings .pages .post-title a::attr("href")')
         res_urls = res.extract()
         for rel_url in res_urls:
             url = urljoin(response.url, rel_url)
-            yield scrapy.Request(url, callback=self.parse_meeting)
+            fields = self.detail_store.get(url, MEETING_MARKER)
+            if fields is not None and not self._needs_revalidation(fields):
+                yield self._stored_meeting(fields)
+            else:
+                yield scrapy.Request(url, callback=self.parse_meeting)
 
     def parse_meeting(self, response):
         meeting = Meeting(
@@ -37,11 +55,26 @@ class AlleAssetDistrictSpider(CityScrapersSpider):
             source=self._parse_source(response),
             start=self._parse_start(response)
         )
+        self.detail_store.set(
+            response.url, MEETING_MARKER,
+            dict(meeting, start=meeting["start"].strftime(START_FORMAT))
+        )
         meeting["status"] = self._get_status(meeting)
         meeting["id"] = self._get_id(meeting)
 
         yield meeting
 
+    def _needs_revalidation(self, fields):
+        start = datetime.strptime(fields["start"], START_FORMAT)
+        return start > datetime.now() - timedelta(days=self.revalidate_days)
+
+    def _stored_meeting(self, fields):
+        meeting = Meeting(**fields)
+        meeting["start"] = datetime.strptime(fields["start"], START_FORMAT)
+        meeting["status"] = self._get_status(meeting)
+        meeting["id"] = self._get_id(meeting)
+        return meeting
+
     def _parse_title(self, item):
         """Parse or generate meeting title."""
         return item.css(".post-title h1::text").extract_first()
@@ -56,23 +89,14 @@ class AlleAssetDistrictSpider(CityScrapersSpider):
 
     def _parse_start(self, item):
         up_startdate = item.css(".published::text").extract_first().strip()
-        p_startdate = datetime.strptime(up_startdate, "%a, %b %d, %Y")
+        p_startdate = parse_date(up_startdate, "%a, %b %d, %Y")
         description = self._parse_description(item)
-        TIME_REGEX = re.compile(r'\d{1,2}:\d{2}[AaPp][Mm]')
-        tm_found = TIME_REGEX.search(description)
+        tm_found = TIME_RE.search(description) or HOUR_RE.search(description)
         if tm_found:
-            up_starttime = tm_found[0]
-            p_starttime = datetime.strptime(up_starttime, '%I:%M%p').time()
+            p_starttime = parse_date(tm_found.group(), '%I:%M%p', '%I%p').time()
             startdatetime = datetime.combine(p_startdate, p_starttime)
         else:
-            TIME2_REGEX = re.compile(r'\d{1,2}[AaPp][Mm]')
-            tm_found = TIME2_REGEX.search(description)
-            if tm_found:
-                up_starttime = tm_found[0]
-                p_starttime = datetime.strptime(up_starttime, '%I%p').time()
-                startdatetime = datetime.combine(p_startdate, p_starttime)
-            else:
-                startdatetime = p_startdate
+            startdatetime = p_startdate
         return startdatetime
 
     def _parse_end(self, item):
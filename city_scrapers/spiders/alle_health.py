@@ -5,6 +5,8 @@ from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 
+from city_scrapers.process_pool import cpu_bound
+
 
 class AlleHealthSpider(CityScrapersSpider):
     name = "alle_health"
@@ -15,7 +17,9 @@ class AlleHealthSpider(CityScrapersSpider):
         "https://www.alleghenycounty.us/Health-Department/Resources" +
         "/About/Board-of-Health/Public-Meeting-Schedule.aspx"
     ]
+    cache_items = True
 
+    @cpu_bound
     def parse(self, response):
         """
         `parse` should always `yield` Meeting items.
@@ -1,12 +1,17 @@
 import datetime
 import re
+from copy import deepcopy
 from urllib.parse import urljoin
 
 from city_scrapers_core.constants import NOT_CLASSIFIED
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
+from parsel import Selector, SelectorList
 from scrapy.utils.response import get_base_url
 
+from city_scrapers.process_pool import cpu_bound
+from city_scrapers.utils import iter_elements
+
 RE_URL = re.compile(r'(?P<date>(\d{1,2}-\d{1,2}-\d{1,2}))-(?P<dtype>(\w+)).aspx')
 
 
@@ -25,9 +30,11 @@ class AlleImprovementsSpider(CityScrapersSpider):
             "authorities/meetings-reports/aim/meetings.aspx"
         ),
     ]
+    cache_items = True
 
+    @cpu_bound
     def parse(self, response):
-        data = response.xpath("//table[@dropzone='copy']")
+        data, urls = self._parse_page(response)
 
         time_str = self._parse_start_time(data)
         date_strs = self._parse_dates(data)
@@ -35,7 +42,7 @@ class AlleImprovementsSpider(CityScrapersSpider):
 
         assert time_str is not None
 
-        agenda_links, minute_links = self._parse_pdf_links(response)
+        agenda_links, minute_links = self._parse_pdf_links(response, urls)
 
         no_item = None
 
@@ -60,6 +67,27 @@ class AlleImprovementsSpider(CityScrapersSpider):
 
             yield meeting
 
+    def _parse_page(self, response):
+        """
+        Stream the page for the meeting schedule table and agenda and minutes links, rather than
+        building a tree of the whole page, most of which is inline scripts
+        """
+        data = SelectorList()
+        urls = []
+        for element in iter_elements(response, self._match_element):
+            if element.tag == "table":
+                # Copied since streamed elements are cleared once the next one is parsed
+                data.append(Selector(root=deepcopy(element)))
+            else:
+                urls.append(element.get("href"))
+        return data, urls
+
+    def _match_element(self, element):
+        if element.tag == "table":
+            return element.get("dropzone") == "copy"
+        href = element.get("href") or ""
+        return element.tag == "a" and ("-minutes.aspx" in href or "-agenda.aspx" in href)
+
     def _parse_title(self, item):
         """Parse or generate meeting title."""
         return (
@@ -113,12 +141,8 @@ class AlleImprovementsSpider(CityScrapersSpider):
         """Parse or generate source."""
         return response.url
 
-    def _parse_pdf_links(self, response):
+    def _parse_pdf_links(self, response, urls):
         """Generate dict of (date, link) key values for agenda and minutes"""
-        urls = response.xpath(
-            '//a[contains(@href, "-minutes.aspx") or contains(@href, "-agenda.aspx")]/@href'
-        ).extract()
-
         agendas = {}
         minutes = {}
 
@@ -0,0 +1,170 @@
+from datetime import timedelta
+
+from city_scrapers_core.constants import CITY_COUNCIL, COMMITTEE, FORUM
+from city_scrapers_core.items import Meeting
+from city_scrapers_core.spiders import LegistarSpider
+
+from city_scrapers.mixins import LegistarHistoryMixin
+
+# Each entry becomes a spider with its own name and feed, and its values override the attributes
+# of LegistarAgencySpider. Add an entry here to scrape another agency's Legistar site.
+LEGISTAR_AGENCIES = [
+    {
+        "name": "alle_county",
+        "agency": "Allegheny County Government",
+        "legistar_client": "alleghenycounty",
+        "timezone": "America/New_York",
+        "default_location": {
+            "address": "436 Grant Street, Pittsburgh, PA 15219",
+            "name": "",
+        },
+        "room_in_address": True,
+        "room_first_line": False,
+        "description_from_location": False,
+        "classification_rules": [
+            ("location", "hearing", FORUM),
+            ("location", "committee", COMMITTEE),
+        ],
+    },
+    {
+        "name": "pitt_city_council",
+        "agency": "Pittsburgh City Council",
+        "legistar_client": "pittsburgh",
+        "timezone": "America/New_York",
+        "location_rules": [(
+            "Council Chambers", {
+                "address": "414 Grant Street, Pittsburgh, PA 15219",
+                "location": "Council Chambers, 5th Floor",
+                "name": "",
+                "neighborhood": "",
+            }
+        )],
+        "default_location": {
+            "address": "",
+            "location": "Council Chambers, 5th Floor",
+            "name": "",
+            "neighborhood": "",
+        },
+        "classification_rules": [("title", "committee", COMMITTEE)],
+        "source_from_details": True,
+    },
+]
+
+
+class LegistarAgencySpider(LegistarHistoryMixin, LegistarSpider):
+    """
+    Meetings from an agency's Legistar calendar, configured by an entry in LEGISTAR_AGENCIES
+    rather than by subclassing.
+
+    Running the generated spiders together with `scrapy runall` crawls every agency at once in one
+    process, sharing a connection pool and request limits, while each keeps its own feed.
+    """
+
+    legistar_client = None
+    # Location used when no rule matches the room in "Meeting Location"
+    default_location = {"address": "", "name": ""}
+    # (text in the room, location) pairs checked in order
+    location_rules = []
+    # Whether the room is listed before the default location's address
+    room_in_address = False
+    # Whether the room is only the first line of "Meeting Location", without the note under it
+    room_first_line = True
+    # Whether the italicized note under the location is the description
+    description_from_location = True
+    # ("title" or "location", text in it, classification) rules checked in order
+    classification_rules = []
+    default_classification = CITY_COUNCIL
+    # Whether the source is the "Meeting details" link rather than the name's link
+    source_from_details = False
+    meeting_length = timedelta(hours=3)
+    time_notes = "Estimated 3 hour meeting length"
+
+    def parse_legistar(self, events):
+        for event, _ in events:
+            start = self.legistar_start(event)
+            title = self._parse_title(event)
+            meeting = Meeting(
+                title=title,
+                description=self._parse_description(event),
+                classification=self._parse_classification(title, event),
+                start=start,
+                end=start + self.meeting_length,
+                all_day=False,
+                time_notes=self.time_notes,
+                location=self._parse_location(event),
+                links=self.legistar_links(event),
+                source=self._parse_source(event),
+            )
+
+            meeting["status"] = self._get_status(meeting)
+            meeting["id"] = self._get_id(meeting)
+
+            yield meeting
+
+    def _parse_title(self, item):
+        """Parse title, which is a link to the body's page for some agencies"""
+        title = item.get("Name")
+        if isinstance(title, dict):
+            return title.get("label")
+        return title
+
+    def _parse_room(self, item):
+        """The first line of the location, or all of it if room_first_line is False"""
+        location = item.get("Meeting Location") or ""
+        if not self.room_first_line:
+            return location
+        return location.split("\n")[0]
+
+    def _parse_description(self, item):
+        """The italicized note on a new line in the location section, if there is one"""
+        if not self.description_from_location:
+            return ""
+        try:
+            return item["Meeting Location"].split("\n")[1].split("--em--")[1]
+        except (IndexError, KeyError, AttributeError):
+            return ""
+
+    def _parse_classification(self, title, item):
+        fields = {"title": title.lower(), "location": self._parse_room(item).lower()}
+        for field, text, classification in self.classification_rules:
+            if text in fields[field]:
+                return classification
+        return self.default_classification
+
+    def _parse_location(self, item):
+        room = self._parse_room(item)
+        for text, location in self.location_rules:
+            if text in room:
+                return dict(location)
+        location = dict(self.default_location)
+        if self.room_in_address and room:
+            location["address"] = "{}, {}".format(room, location["address"])
+        return location
+
+    def _parse_source(self, item):
+        if not self.source_from_details:
+            return self.legistar_source(item)
+        default_source = "{}/Calendar.aspx".format(self.base_url)
+        if isinstance(item.get("Meeting Details"), dict):
+            return item["Meeting Details"].get("url", default_source)
+        return default_source
+
+
+def legistar_agency_spider(agency):
+    """Create a spider class for an entry in LEGISTAR_AGENCIES, named like AlleCountySpider"""
+    domain = "{}.legistar.com".format(agency["legistar_client"])
+    attrs = {
+        "__module__": __name__,
+        "allowed_domains": [domain],
+        "start_urls": ["https://{}".format(domain)],
+        **agency
+    }
+    class_name = "".join(part.title() for part in agency["name"].split("_")) + "Spider"
+    return type(class_name, (LegistarAgencySpider,), attrs)
+
+
+# Spiders are module attributes so the spider loader finds them
+for agency in LEGISTAR_AGENCIES:
+    spider_cls = legistar_agency_spider(agency)
+    globals()[spider_cls.__name__] = spider_cls
+del agency, spider_cls
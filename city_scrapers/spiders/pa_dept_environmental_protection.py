@@ -5,6 +5,16 @@ from city_scrapers_core.constants import NOT_CLASSIFIED
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 
+TITLE_RE = re.compile(r'(am|pm) : (.)+</td>')
+DESCRIPTION_RE = re.compile(r'Description:(.)+')
+LOCATION_RE = re.compile('Location:</td>.*?</td>', re.DOTALL)
+LINK_RE = re.compile(r'Web address(.)+.aspx(\w)*(\'|\")')
+DATE_RE = re.compile(r'(\d)+/(\d)+/\d\d\d\d')
+START_TIME_RE = re.compile(r'(\d)+:\d\d')
+START_MERIDIEM_RE = re.compile(r':\d\d [a-z][a-z]')
+END_TIME_RE = re.compile(r'to (\d)+:\d\d')
+END_MERIDIEM_RE = re.compile(r'to (\d)+:\d\d [a-z][a-z]')
+
 
 class PaDeptEnvironmentalProtectionSpider(CityScrapersSpider):
     name = "pa_dept_environmental_protection"
@@ -41,39 +51,32 @@ class PaDeptEnvironmentalProtectionSpider(CityScrapersSpider):
                 yield meeting
 
     def _parse_title(self, item):
-        titleRegex = re.compile(r'(am|pm) : (.)+</td>')
-        thisThing = titleRegex.search(item)
+        thisThing = TITLE_RE.search(item)
         return thisThing.group()[5:-5]
 
     def _parse_time_notes(self, item):
         return None
 
     def _parse_description(self, item):
-        descriptionRegex = re.compile(r'Description:(.)+')
-        thisThing = descriptionRegex.search(item)
+        thisThing = DESCRIPTION_RE.search(item)
         return thisThing.group()[97:-5]
 
     def _parse_location(self, item):
-        descriptionRegex = re.compile('Location:</td>.*?</td>', re.DOTALL)
-        thisThing = descriptionRegex.search(item)
+        thisThing = LOCATION_RE.search(item)
         cleanString = thisThing.group()[91:].replace('\n', ' ')
         return {"name": "Untitled", "address": cleanString[:-5]}
 
     def _parse_links(self, item):
-        linkRegex = re.compile(r'Web address(.)+.aspx(\w)*(\'|\")')
-        linkThing = linkRegex.search(item)
+        linkThing = LINK_RE.search(item)
         if linkThing is not None:
-            linkThing = linkRegex.search(item)
             return [{"href": str(linkThing.group()[117:-1]), "title": "more info"}]
         return None
 
     def _parse_end(self, item):
-        pmRegex = re.compile(r'to (\d)+:\d\d')
-        pmThing = pmRegex.search(item)
+        pmThing = END_TIME_RE.search(item)
 
         if pmThing is not None:
-            dateRegex = re.compile(r'(\d)+/(\d)+/\d\d\d\d')
-            dateThing = dateRegex.search(item)
+            dateThing = DATE_RE.search(item)
             ds = dateThing.group().split("/")
 
             pmSplit = pmThing.group()[2:].split(":")
@@ -83,8 +86,7 @@ class PaDeptEnvironmentalProtectionSpider(CityScrapersSpider):
             if int(pmSplit[1]) > 0:
                 minutes = int(pmSplit[1])
 
-            twelveHourRegex = re.compile(r'to (\d)+:\d\d [a-z][a-z]')
-            twelveHourThing = twelveHourRegex.search(item)
+            twelveHourThing = END_MERIDIEM_RE.search(item)
 
             if twelveHourThing.group()[-2:] == "pm":
                 if pmSplit[0] != 12:
@@ -95,17 +97,14 @@ class PaDeptEnvironmentalProtectionSpider(CityScrapersSpider):
         return None
 
     def _parse_start(self, item):
-        dateRegex = re.compile(r'(\d)+/(\d)+/\d\d\d\d')
-        dateThing = dateRegex.search(item)
+        dateThing = DATE_RE.search(item)
         ds = dateThing.group().split("/")
 
-        amRegex = re.compile(r'(\d)+:\d\d')
-        amThing = amRegex.search(item)
+        amThing = START_TIME_RE.search(item)
         amSplit = amThing.group().split(":")
         amSplit[0] = int(amSplit[0])
 
-        twelveHourRegex = re.compile(r':\d\d [a-z][a-z]')
-        twelveHourThing = twelveHourRegex.search(item)
+        twelveHourThing = START_MERIDIEM_RE.search(item)
 
         minutes = 0
         if int(amSplit[1]) > 0:
@@ -1,45 +1,99 @@
 import html  # clean up html strings (such as &amp)
 import json  # interact with the Tribe Events API
-from datetime import datetime  # convert utc time to datetime
+from datetime import datetime, timedelta  # convert utc time to datetime
+from urllib.parse import urlencode
 
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
+from scrapy import Request
+
+from city_scrapers.mixins import DetailStoreMixin
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 
 # remove html encoding and convert to a string object
 def clean(my_json_string):
+    # Most strings don't have any entities to unescape
+    if '&' not in my_json_string:
+        return str(my_json_string)
     return str(html.unescape(my_json_string))
 
 
-class PaDevelopmentSpider(CityScrapersSpider):
+class PaDevelopmentSpider(DetailStoreMixin, CityScrapersSpider):
     name = "pa_development"
     agency = "PA Department of Community & Economic Development"
     timezone = "America/New_York"
     allowed_domains = ["dced.pa.gov"]
     start_urls = ["https://dced.pa.gov/wp-json/tribe/events/v1/events"]
+    # Largest page the Tribe Events API returns
+    per_page = 50
+    # Days before and after today that events are requested for
+    days_before = 30
+    days_after = 730
+
+    def start_requests(self):
+        yield Request(self._events_url(1), callback=self.parse)
+
+    def _events_url(self, page):
+        today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+        params = {
+            'page': page,
+            'per_page': self.per_page,
+            'start_date': (today - timedelta(days=self.days_before)).strftime(DATE_FORMAT),
+            'end_date': (today + timedelta(days=self.days_after)).strftime(DATE_FORMAT),
+        }
+        return "{}?{}".format(self.start_urls[0], urlencode(params))
+
+    def parse(self, response, page=1):
+        """
+        Parse a page of events from the Tribe Events API. The first page requests the rest at
+        once, or follows next_rest_url one page at a time if the total isn't listed.
+
+        Events are stored with their `modified` timestamp, and unchanged events are yielded from
+        the store rather than parsed again.
+        """
+        data = json.loads(response.text)
+        if page == 1 and data.get('total_pages'):
+            for next_page in range(2, int(data['total_pages']) + 1):
+                yield Request(
+                    self._events_url(next_page),
+                    callback=self.parse,
+                    cb_kwargs={'page': next_page},
+                )
+        elif not data.get('total_pages') and data.get('next_rest_url'):
+            yield Request(data['next_rest_url'], callback=self.parse, cb_kwargs={'page': page + 1})
+
+        for item in data['events']:
+            fields = self.detail_store.get(item['id'], item['modified'])
+            if fields is None:
+                fields = self._parse_fields(item)
+                self.detail_store.set(item['id'], item['modified'], fields)
+            yield self._parse_meeting(fields)
+
+    def _parse_fields(self, item):
+        """Parse an event's meeting fields, with the start and end left as strings"""
+        return {
+            'title': self._parse_title(item),
+            'description': self._parse_description(item),
+            'classification': self._parse_classification(item),
+            'start': item['start_date'],
+            'end': item['end_date'],
+            'all_day': self._parse_all_day(item),
+            'time_notes': self._parse_time_notes(item),
+            'location': self._parse_location(item),
+            'links': self._parse_links(item),
+            'source': self._parse_source(item),
+        }
 
-    def parse(self, response):
-        events = json.loads(response.text)['events']
-
-        for item in events:
-            meeting = Meeting(
-                title=self._parse_title(item),
-                description=self._parse_description(item),
-                classification=self._parse_classification(item),
-                start=self._parse_start(item),
-                end=self._parse_end(item),
-                all_day=self._parse_all_day(item),
-                time_notes=self._parse_time_notes(item),
-                location=self._parse_location(item),
-                links=self._parse_links(item),
-                source=self._parse_source(item),
-            )
-
-            meeting["status"] = self._get_status(meeting)
-            meeting["id"] = self._get_id(meeting)
-
-            yield meeting
+    def _parse_meeting(self, fields):
+        meeting = Meeting(**fields)
+        meeting['start'] = self._parse_start({'start_date': fields['start']})
+        meeting['end'] = self._parse_end({'end_date': fields['end']})
+        meeting["status"] = self._get_status(meeting)
+        meeting["id"] = self._get_id(meeting)
+        return meeting
 
     def _parse_title(self, item):
         """Parse or generate meeting title."""
@@ -55,12 +109,12 @@ class PaDevelopmentSpider(CityScrapersSpider):
 
     def _parse_start(self, item):
         """Parse start datetime as a naive datetime object."""
-        start_time = datetime.strptime(item['start_date'], '%Y-%m-%d %H:%M:%S')
+        start_time = datetime.strptime(item['start_date'], DATE_FORMAT)
         return start_time
 
     def _parse_end(self, item):
         """Parse end datetime as a naive datetime object. Added by pipeline if None"""
-        return datetime.strptime(item['end_date'], '%Y-%m-%d %H:%M:%S')
+        return datetime.strptime(item['end_date'], DATE_FORMAT)
 
     def _parse_time_notes(self, item):
         """Parse any additional notes on the timing of the meeting"""
@@ -15,6 +15,7 @@ class PaLiquorboardSpider(CityScrapersSpider):
     timezone = "America/New_York"
     allowed_domains = ["www.lcb.pa.gov"]
     start_urls = ["https://www.lcb.pa.gov/About-Us/Board/Pages/Public-Meetings.aspx"]
+    cache_items = True
     BUILDING_NAME = "Pennsylvania Liquor Control Board Headquarters"
     ADDRESS = "Room 117, 604 Northwest Office Building, Harrisburg, PA 17124"
     EXPECTED_START_HOUR = "11:00 AM"
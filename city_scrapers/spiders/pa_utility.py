@@ -3,7 +3,8 @@ from datetime import datetime, time
 from city_scrapers_core.constants import COMMISSION
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from dateutil.parser import parse
+
+from city_scrapers.utils import DateParser
 
 url = "http://www.puc.pa.gov/about_puc/public_meeting_calendar/public_meeting_audio_summaries_.aspx"
 
@@ -16,11 +17,30 @@ LOCATION_NAME = "MAIN HEARING ROOM NO. 1 SECOND FLOOR COMMONWEALTH KEYSTONE BUIL
 DEFAULT_START_TIME = time(hour=10)
 
 
+def parse_any_date(value):
+    """Lenient parse for dates in a layout none of the formats cover"""
+    # Imported here so that loading the spider doesn't pay for dateutil's parser
+    from dateutil.parser import parse
+
+    return parse(value, fuzzy=True)
+
+
+DATE_PARSER = DateParser(
+    '%A, %B %d, %Y',
+    '%a, %B %d, %Y',
+    '%a, %b %d, %Y',
+    '%B %d, %Y',
+    '%m/%d/%Y',
+    fallback=parse_any_date
+)
+
+
 class PaUtilitySpider(CityScrapersSpider):
     name = "pa_utility"
     agency = "PA Public Utility Commission"
     timezone = "America/New_York"
     start_urls = [url]
+    cache_items = True
 
     def parse(self, response):
         """
@@ -86,7 +106,8 @@ class PaUtilitySpider(CityScrapersSpider):
 
     def _parse_start(self, date_str):
         """Parse start datetime as a naive datetime object."""
-        return datetime.combine(parse(date_str), DEFAULT_START_TIME)
+        # Dates are followed by a dash, like "Thursday, January 16, 2020 -"
+        return datetime.combine(DATE_PARSER.parse(date_str.strip(' -\xa0\n\t')), DEFAULT_START_TIME)
 
     def _parse_end(self, item):
         """Parse end datetime as a naive datetime object. Added by pipeline if None"""
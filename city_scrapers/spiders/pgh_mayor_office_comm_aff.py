@@ -1,20 +1,151 @@
 import os
+import time
 from datetime import datetime
-from json import loads
+from json import dump, load, loads
 
 from city_scrapers_core.constants import NOT_CLASSIFIED
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 from scrapy import FormRequest, Request
+from scrapy.utils.project import data_path
 
+from city_scrapers.mixins import DetailStoreMixin, FetchMixin
 
-class PghMayorOfficeCommAffSpider(CityScrapersSpider):
+# Posts aren't fetched again once they're stored, so every stored post has the same marker
+POST_MARKER = "post"
+
+
+def is_older_post(post_id, mark):
+    """Whether a post is the high-water mark post or older, comparing IDs numerically if possible"""
+    if mark is None:
+        return False
+    try:
+        return int(post_id) <= int(mark)
+    except ValueError:
+        return post_id == mark
+
+
+def _write_json(path, value, mode=0o666):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), "w") as f:
+        dump(value, f)
+    os.replace(tmp_path, path)
+
+
+class NextdoorSession:
+    """
+    Nextdoor access and ID tokens cached on disk with their expiration time, so a run can reuse
+    the last run's login instead of logging in each time. They're the account's own tokens, so
+    the file is only readable by its owner and is left out of the cron build's .scrapy cache.
+    """
+
+    # Seconds before expiration that a session is treated as expired
+    refresh_margin = 600
+
+    def __init__(self, path=None):
+        self.path = path
+        self.access_token = None
+        self.id_token = None
+        self.expires = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                cached = load(f)
+            self.access_token = cached["access_token"]
+            self.id_token = cached["id_token"]
+            self.expires = cached["expires"]
+
+    def is_valid(self):
+        return self.access_token is not None and self.expires - self.refresh_margin > time.time()
+
+    def update(self, token_json):
+        self.access_token = token_json["access_token"]
+        self.id_token = token_json["id_token"]
+        self.expires = time.time() + token_json.get("expires_in", 3600)
+        if self.path:
+            _write_json(
+                self.path,
+                {
+                    "access_token": self.access_token,
+                    "id_token": self.id_token,
+                    "expires": self.expires,
+                },
+                mode=0o600,
+            )
+
+    def invalidate(self):
+        self.access_token = None
+
+    @property
+    def cookies(self):
+        return {"ndbr_at": self.access_token, "ndbr_idt": self.id_token}
+
+
+class PostHighWaterMark:
+    """ID of the newest post listed in the last complete run, and the newest listed in this one"""
+    def __init__(self, path=None):
+        self.path = path
+        self.value = None
+        self.newest = None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.value = load(f)["post_id"]
+
+    def observe(self, post_id):
+        if self.newest is None or not is_older_post(post_id, self.newest):
+            self.newest = post_id
+
+    def save(self):
+        if self.newest is None:
+            return
+        self.value = self.newest
+        if self.path:
+            _write_json(self.path, {"post_id": self.value})
+
+
+class PghMayorOfficeCommAffSpider(DetailStoreMixin, FetchMixin, CityScrapersSpider):
     name = "pgh_mayor_office_comm_aff"
     agency = "Pittsburgh Mayor's Office of Community Affairs"
     timezone = "US/Eastern"
     allowed_domains = ["nextdoor.com"]
     start_urls = ["https://nextdoor.com/login/"]
-    cookies = {}
+    posts_url = "https://nextdoor.com/api/profile/2376387/activity/posts/"
+    post_url = "https://nextdoor.com/web/feeds/post/{}/"
+
+    _session = None
+    _high_water_mark = None
+    _session_retried = False
+    _fetch_failed = False
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = NextdoorSession(self._state_path("CITY_SCRAPERS_TOKEN_DIR", ".json"))
+        return self._session
+
+    @property
+    def high_water_mark(self):
+        if self._high_water_mark is None:
+            self._high_water_mark = PostHighWaterMark(
+                self._state_path("CITY_SCRAPERS_DETAIL_STORE_DIR", ".mark.json")
+            )
+        return self._high_water_mark
+
+    def _state_path(self, setting, suffix):
+        settings = getattr(self, "settings", None)
+        if settings is None or not settings.get(setting):
+            return None
+        return os.path.join(data_path(settings[setting]), self.name + suffix)
+
+    def start_requests(self):
+        """Skip logging in if the last run's session is still valid"""
+        if self.session.is_valid():
+            yield self._posts_request()
+        else:
+            yield self._login_request()
+
+    def _login_request(self):
+        return Request(self.start_urls[0], callback=self.parse, dont_filter=True)
 
     def parse(self, response):
         """
@@ -66,30 +197,82 @@ class PghMayorOfficeCommAffSpider(CityScrapersSpider):
         yield formReq
 
     def _authenticated(self, response):
-        url = "https://nextdoor.com/api/profile/2376387/activity/posts/"
-        token = loads(response.text)
-        self.cookies.update({'ndbr_at': token['access_token'], 'ndbr_idt': token['id_token']})
-        req = Request(url, cookies=self.cookies, callback=self._get_posts)
-        yield req
-
-    def _get_posts(self, response):
-        jsonData = loads(response.body_as_unicode())
-        activities = jsonData["activities"]
-        for item in activities:
-            if "meeting" in item["message_parts"][1]["text"].lower():
-                url = "https://nextdoor.com/web/feeds/post/" + str(item["post_id"]) + "/"
-                req = Request(url, cookies=self.cookies, callback=self._get_post)
-                yield req
-        if jsonData["show_more"]:
-            url = "https://nextdoor.com/api/profile/2376387/activity/posts/?next_page="
-            req = Request(
-                url + jsonData["next_page"], cookies=self.cookies, callback=self._get_posts
+        self.session.update(loads(response.text))
+        yield self._posts_request()
+
+    def _posts_request(self):
+        # Rejected sessions are passed to the callback so it can log in again
+        return Request(
+            self.posts_url,
+            cookies=self.session.cookies,
+            callback=self._get_posts,
+            meta={"handle_httpstatus_list": [401, 403]},
+            dont_filter=True,
+        )
+
+    async def _get_posts(self, response):
+        """
+        Page through the profile's posts from newest to oldest, fetching every meeting post on a
+        page at once. Posts are only fetched once and kept in the detail store, and paging stops at
+        the newest post from the last complete run. Meetings from stored posts that weren't
+        reached are yielded too, so the output is the same as paging through every post.
+        """
+        if response.status in [401, 403]:
+            # A cached session can be rejected before it expires, so log in again once
+            if self._session_retried:
+                self.logger.error("Nextdoor session rejected after logging in again")
+                return
+            self._session_retried = True
+            self.session.invalidate()
+            yield self._login_request()
+            return
+        high_water_mark = self.high_water_mark.value
+        seen_ids = set()
+        while True:
+            jsonData = loads(response.text)
+            fetch_ids = []
+            reached_mark = False
+            for item in jsonData["activities"]:
+                post_id = str(item["post_id"])
+                self.high_water_mark.observe(post_id)
+                reached_mark = reached_mark or is_older_post(post_id, high_water_mark)
+                if "meeting" not in item["message_parts"][1]["text"].lower():
+                    continue
+                seen_ids.add(post_id)
+                post = self.detail_store.get(post_id, POST_MARKER)
+                if post is not None:
+                    yield self._parse_post(post, self.post_url.format(post_id))
+                else:
+                    fetch_ids.append(post_id)
+            post_responses = await self.fetch_all([
+                Request(self.post_url.format(post_id), cookies=self.session.cookies)
+                for post_id in fetch_ids
+            ])
+            for post_id, post_response in zip(fetch_ids, post_responses):
+                if isinstance(post_response, Exception):
+                    self.logger.error("Failed to fetch post %s: %r", post_id, post_response)
+                    self._fetch_failed = True
+                    continue
+                post = loads(post_response.text)["posts"][0]
+                self.detail_store.set(post_id, POST_MARKER, post)
+                yield self._parse_post(post, post_response.url)
+            if reached_mark or not jsonData["show_more"]:
+                break
+            response = await self.fetch(
+                Request(
+                    self.posts_url + "?next_page=" + jsonData["next_page"],
+                    cookies=self.session.cookies,
+                )
             )
-            yield req
 
-    def _get_post(self, response):
-        jsonData = loads(response.body_as_unicode())
-        item = jsonData["posts"][0]
+        if reached_mark:
+            self.logger.debug("Stopped paging at the last run's newest post")
+        for post_id in self.detail_store.keys():
+            if post_id not in seen_ids:
+                post = self.detail_store.get(post_id, POST_MARKER)
+                yield self._parse_post(post, self.post_url.format(post_id))
+
+    def _parse_post(self, item, source):
         meeting = Meeting(
             title=self._parse_title(item),
             description=self._parse_description(item),
@@ -100,12 +283,18 @@ class PghMayorOfficeCommAffSpider(CityScrapersSpider):
             time_notes=self._parse_time_notes(item),
             location=self._parse_location(item),
             links=self._parse_links(item),
-            source=self._parse_source(response),
+            source=source,
         )
         meeting["status"] = self._get_status(meeting)
         meeting["id"] = self._get_id(meeting)
+        return meeting
 
-        yield meeting
+    def closed(self, reason):
+        super().closed(reason)
+        # The mark only moves after a complete run, so posts a failed run didn't reach or couldn't
+        # fetch are still fetched next time
+        if reason == "finished" and not self._fetch_failed:
+            self.high_water_mark.save()
 
     def _parse_title(self, item):
         """Parse or generate meeting title."""
@@ -1,13 +1,59 @@
-from datetime import datetime
-from json import loads
+import os
+import time
+from datetime import datetime, timedelta
+from json import dump, load, loads
 
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 from scrapy import Request
+from scrapy.utils.project import data_path
 
+from city_scrapers.mixins import DetailStoreMixin, FetchMixin
 
-class PghPublicSchoolsSpider(CityScrapersSpider):
+
+class SchoolwiresToken:
+    """
+    Schoolwires API token cached on disk with its expiration time, so it can be reused across runs
+    and by crawls running at the same time instead of requesting a new one each time
+    """
+
+    # Seconds before expiration that a token is treated as expired, so it's refreshed proactively
+    refresh_margin = 600
+
+    def __init__(self, path=None):
+        self.path = path
+        self.value = None
+        self.expires = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                cached = load(f)
+            self.value = cached["Token"]
+            self.expires = cached["ExpirationTime"]
+
+    def is_valid(self):
+        return self.value is not None and self.expires - self.refresh_margin > time.time()
+
+    def update(self, token_json):
+        self.value = token_json["Token"]
+        self.expires = token_json["ExpirationTime"]
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            dump({"Token": self.value, "ExpirationTime": self.expires}, f)
+        os.replace(tmp_path, self.path)
+
+    def invalidate(self):
+        self.value = None
+
+    @property
+    def header(self):
+        return "Bearer {}".format(self.value)
+
+
+class PghPublicSchoolsSpider(DetailStoreMixin, FetchMixin, CityScrapersSpider):
     name = "pgh_public_schools"
     agency = "Pittsburgh Public Schools"
     timezone = "US/Eastern"
@@ -16,6 +62,37 @@ class PghPublicSchoolsSpider(CityScrapersSpider):
     # start_urls = ["https://www.pghschools.org/calendar"]
     start_urls = ["https://www.pghschools.org/Generator/TokenGenerator.ashx/ProcessRequest"]
 
+    api_gateway = "https://awsapieast1-prod2.schoolwires.com/REST/api/v4/"
+
+    # Events are listed from this many days ago up to this many days ahead (about 18 months)
+    days_before = 90
+    days_after = 548
+
+    # Limits the detail requests made at once, can be overridden with -s
+    custom_settings = {"CONCURRENT_REQUESTS_PER_DOMAIN": 4}
+
+    _token = None
+    _awaiting_token = None
+
+    @property
+    def token(self):
+        if self._token is None:
+            path = None
+            settings = getattr(self, "settings", None)
+            if settings is not None and settings.get("CITY_SCRAPERS_TOKEN_DIR"):
+                path = os.path.join(
+                    data_path(settings["CITY_SCRAPERS_TOKEN_DIR"]), "{}.json".format(self.name)
+                )
+            self._token = SchoolwiresToken(path)
+        return self._token
+
+    def start_requests(self):
+        """Skip requesting a token if a cached one is still valid"""
+        if self.token.is_valid():
+            yield self._list_request()
+        else:
+            yield self._token_request(self.parse)
+
     def parse(self, response):
         """
         `parse` should always `yield` Meeting items.
@@ -23,21 +100,43 @@ class PghPublicSchoolsSpider(CityScrapersSpider):
         Change the `_parse_id`, `_parse_name`, etc methods to fit your scraping
         needs.
         """
-        json_response = loads(response.body_as_unicode())
-        token = json_response["Token"]
+        self.token.update(loads(response.text))
+        yield self._list_request()
+
+    def _token_request(self, callback):
+        # Tokens are never served from the HTTP cache
+        return Request(
+            self.start_urls[0],
+            callback=callback,
+            errback=self._token_error,
+            meta={"dont_cache": True},
+            dont_filter=True,
+        )
+
+    def _token_error(self, failure):
+        self.logger.error("Couldn't get a Schoolwires API token: %s", failure.value)
+        self._awaiting_token = None
+
+    def _api_request(self, url, callback, **kwargs):
+        # 401 responses are passed to the callback so the request can be retried with a new token
+        return Request(
+            url,
+            headers={
+                "Authorization": self.token.header,
+                "Accept": "application/json"
+            },
+            callback=callback,
+            cb_kwargs=kwargs,
+            meta={"handle_httpstatus_list": [401]},
+        )
+
+    def _list_request(self):
         # api_server = json_response["ApiServer"]
-        api_server = "https://awsapieast1-prod2.schoolwires.com/REST/"
-        api_gateway = api_server + "api/v4/"
         api_function = "CalendarEvents/GetEvents/1?"
-        start_date = "2019-02-01"
-        today = datetime.today()
-
-        e = today.replace(
-            year=today.year + 10, month=1, day=1, hour=0, minute=0, second=1, microsecond=1
+        start_date, end_date = self._date_window()
+        dates = "StartDate={}&EndDate={}".format(
+            start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
         )
-        # the end date will be ten years from the date that the script runs
-        end_date = str(e.year) + '-' + str(e.month).zfill(2) + '-' + str(e.day).zfill(2)
-        dates = "StartDate={}&EndDate={}".format(start_date, end_date)
         modules = "&ModuleInstanceFilter="
 
         # this line is to filter just school board meetings.
@@ -48,29 +147,93 @@ class PghPublicSchoolsSpider(CityScrapersSpider):
 
         category = "&CategoryFilter={}".format(category_filters)
         dbstream = "&IsDBStreamAndShowAll=true"
-        url = api_gateway + api_function + dates + modules + category + dbstream
-        headers = {"Authorization": "Bearer " + token, "Accept": "application/json"}
-        req = Request(url, headers=headers, callback=self._parse_api)
+        url = self.api_gateway + api_function + dates + modules + category + dbstream
+        return self._api_request(url, self._parse_api)
 
-        yield req
+    def _date_window(self):
+        """Sliding window of dates to list events for, so the list doesn't grow every year"""
+        today = datetime.today()
+        return today - timedelta(days=self.days_before), today + timedelta(days=self.days_after)
 
-    def _parse_api(self, response):
-        headers = response.request.headers
+    def _retry_unauthorized(self, response):
+        """Retry a request rejected with a 401 once, with a new token if it hasn't been replaced"""
+        request = response.request
+        if request.meta.get("token_retried"):
+            self.logger.error("Unauthorized with a new token: %s", request.url)
+            return
+        if self._awaiting_token is not None:
+            # A new token has already been requested
+            self._awaiting_token.append(request)
+            return
+        sent_header = request.headers.get("Authorization")
+        if self.token.is_valid() and sent_header != self.token.header.encode():
+            yield self._with_token(request)
+        else:
+            self.token.invalidate()
+            self._awaiting_token = [request]
+            yield self._token_request(self._parse_retry_token)
 
-        api_server = "https://awsapieast1-prod2.schoolwires.com/REST/"
-        api_gateway = api_server + "api/v4/"
-        api_function = "CalendarEvents/GetEventDate/1/"
-        url = api_gateway + api_function
+    def _parse_retry_token(self, response):
+        self.token.update(loads(response.text))
+        requests, self._awaiting_token = self._awaiting_token, None
+        for request in requests:
+            yield self._with_token(request)
 
-        meetings = loads(response.body_as_unicode())
+    def _with_token(self, request):
+        headers = request.headers.copy()
+        headers["Authorization"] = self.token.header
+        meta = dict(request.meta, token_retried=True)
+        return request.replace(headers=headers, meta=meta, dont_filter=True)
 
+    async def _parse_api(self, response):
+        """
+        Yield meetings from stored details for events whose list entry hasn't changed since the
+        last run, and fetch details for the rest all at once
+        """
+        if response.status == 401:
+            for request in self._retry_unauthorized(response):
+                yield request
+            return
+        meetings = loads(response.text)
+
+        detail_requests = []
         for item in meetings:
-            detail_url = url + str(item["Id"])
-            meeting = Request(detail_url, headers=headers, callback=self._parse_detail_api)
-            yield meeting
+            marker = self.detail_store.marker(item)
+            detail_url = self._detail_url(item["Id"])
+            detail = self.detail_store.get(item["Id"], marker)
+            if detail is not None:
+                yield self._parse_meeting(detail, detail_url)
+                continue
+            detail_requests.append(
+                self._api_request(
+                    detail_url, self._parse_detail_api, event_id=item["Id"], marker=marker
+                )
+            )
+
+        detail_responses = await self.fetch_all(detail_requests)
+        for detail_request, detail_response in zip(detail_requests, detail_responses):
+            if isinstance(detail_response, Exception):
+                self.logger.error("Failed to fetch %s: %r", detail_request.url, detail_response)
+                continue
+            # Details rejected because the token expired are requested again as usual
+            for output in self._parse_detail_api(
+                detail_response, **detail_response.request.cb_kwargs
+            ):
+                yield output
 
-    def _parse_detail_api(self, response):
-        item = loads(response.body_as_unicode())
+    def _detail_url(self, event_id):
+        return self.api_gateway + "CalendarEvents/GetEventDate/1/" + str(event_id)
+
+    def _parse_detail_api(self, response, event_id=None, marker=None):
+        if response.status == 401:
+            yield from self._retry_unauthorized(response)
+            return
+        item = loads(response.text)
+        if event_id is not None:
+            self.detail_store.set(event_id, marker, item)
+        yield self._parse_meeting(item, response.url)
+
+    def _parse_meeting(self, item, source):
         meeting = Meeting(
             title=self._parse_title(item["Event"]),
             description=self._parse_description(item["Event"]),
@@ -81,12 +244,12 @@ class PghPublicSchoolsSpider(CityScrapersSpider):
             time_notes=self._parse_time_notes(item),
             location=self._parse_location(item),
             links=self._parse_links(item),
-            source=self._parse_source(response),
+            source=source,
         )
 
         meeting["status"] = self._get_status(meeting)
         meeting["id"] = self._get_id(meeting)
-        yield meeting
+        return meeting
 
     def _parse_title(self, item):
         """Parse or generate meeting title."""
@@ -133,8 +296,3 @@ class PghPublicSchoolsSpider(CityScrapersSpider):
     def _parse_links(self, item):
         """Parse or generate links."""
         return [{"href": "", "title": ""}]
-
-    def _parse_source(self, response):
-        """Parse or generate source."""
-        # https://www.pghschools.org/calendar#calendar1/20190205/event/19034
-        return response.url
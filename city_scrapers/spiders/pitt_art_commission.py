@@ -10,6 +10,7 @@ class PittArtCommissionSpider(CityScrapersSpider):
     agency = "City of Pittsburgh Art Commission"
     timezone = "America/New_York"
     start_urls = ["https://pittsburghpa.gov/dcp/art-commission-schedule"]
+    cache_items = True
 
     # Even though the tables storing the meeting information seem to have 4 columns,
     # there are 3 additional invisible columns; hence we expect 7 columns in each row.
@@ -5,6 +5,12 @@ from city_scrapers_core.constants import NOT_CLASSIFIED
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 
+from city_scrapers.utils import DateParser
+
+START_PARSER = DateParser(
+    '%A %B %d %Y %I:%M %p', '%A %B %d %Y %I %p', '%B %d %Y %I %p', '%A %B %d %Y'
+)
+
 
 class PittCityPlanningSpider(CityScrapersSpider):
     name = "pitt_city_planning"
@@ -85,21 +91,9 @@ class PittCityPlanningSpider(CityScrapersSpider):
         # remove leading and trailing spaces
         date_text = date_text.strip()
         try:
-            date = datetime.strptime(date_text, '%A %B %d %Y %I:%M %p')
+            date = START_PARSER.parse(date_text)
         except ValueError:
-            try:
-                date = datetime.strptime(date_text, '%A %B %d %Y %I %p')
-            except ValueError:
-                try:
-                    date = datetime.strptime(date_text, '%B %d %Y %I %p')
-                except ValueError:
-                    try:
-                        date = datetime.strptime(date_text, '%A %B %d %Y')
-                    except ValueError:
-                        try:
-                            date = datetime.strptime(date_text, '%A %B %d %Y %I:%M %p')
-                        except ValueError:
-                            date = datetime(1111, 11, 11, 11, 11)
+            date = datetime(1111, 11, 11, 11, 11)
         return date
 
     def _parse_end(self, item):
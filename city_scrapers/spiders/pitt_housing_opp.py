@@ -1,17 +1,16 @@
 import json  # interact with the Tribe Events API
 import re  # parse strings
-import urllib.request  # pull info from the website
 from datetime import datetime  # convert utc time to datetime
 from html.parser import HTMLParser  # clean up HTML
 
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
+from scrapy import Request
 
-# Downloads the json list dictating what pages are to be crawled:
-json_url = 'http://www.ura.org/events.json'
-url = urllib.request.urlopen(json_url)
-json_events = json.loads(url.read().decode())
+# The json list dictating what pages are to be crawled. It's requested from
+# start_requests rather than at import so that loading the spider never touches the network.
+EVENTS_URL = 'http://www.ura.org/events.json'
 
 
 # Accepts an iso_8601 string, returns an equivalent datetime object.
@@ -53,8 +52,8 @@ def strip_tags(html):
     return s.get_data()
 
 
-# Returns an array of urls representing meeting detail pages
-def get_ura_urls():
+# Accepts the decoded events feed, returns an array of urls representing meeting detail pages
+def get_ura_urls(json_events):
     urls = []
     base = 'https://www.ura.org/events/housing-opportunity-fund-advisory-board-meeting?day='
     searchKey = 'Housing Opportunity Fund Advisory Board Meeting'
@@ -74,7 +73,16 @@ class PittHousingOppSpider(CityScrapersSpider):
     agency = "Housing Opportunity Fund Advisory Board Pittsburgh"
     timezone = "America/New_York"
     allowed_domains = ["www.ura.org"]
-    start_urls = get_ura_urls()
+    # Can be overridden with `-a events_url=file:///path/to/events.json` to crawl from a local copy
+    events_url = EVENTS_URL
+
+    def start_requests(self):
+        yield Request(self.events_url, callback=self._parse_events, dont_filter=True)
+
+    def _parse_events(self, response):
+        """Request the detail page of each matching meeting listed in the events feed"""
+        for url in get_ura_urls(json.loads(response.text)):
+            yield Request(url, callback=self.parse)
 
     def parse(self, item):
         """
@@ -0,0 +1,350 @@
+import os
+import time
+import uuid
+import zlib
+from urllib.parse import urlparse
+
+from scrapy.utils.project import data_path
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class ObjectStore:
+    """
+    A bucket of objects addressed by "/"-separated keys, like an S3 bucket.
+
+    Keys are listed by prefix in sorted order, and putting a key replaces the whole object at once.
+    The count, seconds and bytes of each operation are added to `counters`, and to the crawler's
+    stats under objectstore/ when stats are given, so latency and throughput can be compared
+    between backends.
+    """
+    def __init__(self, bucket, stats=None, spider=None):
+        self.bucket = bucket
+        self.stats = stats
+        self.spider = spider
+        self.counters = {}
+
+    def list(self, prefix=""):
+        """Return the sorted keys that start with prefix"""
+        start = time.perf_counter()
+        keys = sorted(self._list(prefix))
+        self._record("list", start, 0)
+        return keys
+
+    def get(self, key):
+        """Return an object's body as bytes"""
+        with self.open(key) as f:
+            return f.read()
+
+    def open(self, key):
+        """Return a binary file-like object for reading an object's body in chunks"""
+        start = time.perf_counter()
+        fileobj = self._open(key)
+        self._record("open", start, 0)
+        return CountingReader(self, fileobj)
+
+    def put(self, key, body, content_type=None, cache_control=None):
+        """Create or replace an object from bytes or a binary file-like object"""
+        if isinstance(body, str):
+            body = body.encode()
+        start = time.perf_counter()
+        size = self._put(key, body, content_type, cache_control)
+        self._record("put", start, size)
+
+    def multipart(self, key, content_type=None, content_encoding=None, cache_control=None):
+        """
+        Start replacing an object with one uploaded in parts. The object only changes once the
+        upload is completed, and nothing is stored if it's aborted.
+        """
+        start = time.perf_counter()
+        upload_id = self._create_multipart(key, content_type, content_encoding, cache_control)
+        self._record("create_multipart", start, 0)
+        return MultipartUpload(self, key, upload_id)
+
+    def _record(self, operation, start, size):
+        seconds = time.perf_counter() - start
+        counter = self.counters.setdefault(operation, {"count": 0, "seconds": 0.0, "bytes": 0})
+        counter["count"] += 1
+        counter["seconds"] += seconds
+        counter["bytes"] += size
+        if self.stats is not None:
+            prefix = "objectstore/{}/".format(operation)
+            self.stats.inc_value(prefix + "count", spider=self.spider)
+            self.stats.inc_value(prefix + "seconds", seconds, spider=self.spider)
+            if size:
+                self.stats.inc_value(prefix + "bytes", size, spider=self.spider)
+
+    def _list(self, prefix):
+        raise NotImplementedError
+
+    def _open(self, key):
+        raise NotImplementedError
+
+    def _put(self, key, body, content_type, cache_control):
+        """Store an object, returning its size in bytes"""
+        raise NotImplementedError
+
+    def _create_multipart(self, key, content_type, content_encoding, cache_control):
+        """Start a multipart upload, returning an ID passed to the other multipart methods"""
+        raise NotImplementedError
+
+    def _upload_part(self, key, upload_id, part_number, data):
+        """Upload one part, returning what's needed to complete the upload with it"""
+        raise NotImplementedError
+
+    def _complete_multipart(self, key, upload_id, parts):
+        raise NotImplementedError
+
+    def _abort_multipart(self, key, upload_id):
+        raise NotImplementedError
+
+
+class MultipartUpload:
+    """An object being uploaded in parts with ObjectStore.multipart, in the order they're given"""
+    def __init__(self, store, key, upload_id):
+        self.store = store
+        self.key = key
+        self.upload_id = upload_id
+        self.parts = []
+
+    def upload_part(self, data):
+        start = time.perf_counter()
+        self.parts.append(
+            self.store._upload_part(self.key, self.upload_id,
+                                    len(self.parts) + 1, data)
+        )
+        self.store._record("upload_part", start, len(data))
+
+    def complete(self):
+        start = time.perf_counter()
+        self.store._complete_multipart(self.key, self.upload_id, self.parts)
+        self.store._record("complete_multipart", start, 0)
+
+    def abort(self):
+        self.store._abort_multipart(self.key, self.upload_id)
+
+
+class CountingReader:
+    """Wraps a file-like object from ObjectStore.open, counting time and bytes spent reading"""
+    def __init__(self, store, fileobj):
+        self.store = store
+        self.fileobj = fileobj
+
+    def read(self, *args):
+        start = time.perf_counter()
+        data = self.fileobj.read(*args)
+        self.store._record("read", start, len(data))
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class S3ObjectStore(ObjectStore):
+    def __init__(self, bucket, settings, stats=None, spider=None):
+        import boto3
+
+        super().__init__(bucket, stats=stats, spider=spider)
+        self.client = boto3.client(
+            "s3",
+            aws_access_key_id=settings.get("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=settings.get("AWS_SECRET_ACCESS_KEY"),
+        )
+
+    def _list(self, prefix):
+        keys = []
+        kwargs = {"Bucket": self.bucket, "Prefix": prefix}
+        while True:
+            response = self.client.list_objects(**kwargs)
+            keys.extend(obj["Key"] for obj in response.get("Contents", []))
+            if not response.get("IsTruncated") or not keys:
+                return keys
+            kwargs["Marker"] = keys[-1]
+
+    def _open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def _put(self, key, body, content_type, cache_control):
+        if not isinstance(body, bytes):
+            body = body.read()
+        kwargs = {"Body": body, "Bucket": self.bucket, "Key": key}
+        if content_type:
+            kwargs["ContentType"] = content_type
+        if cache_control:
+            kwargs["CacheControl"] = cache_control
+        self.client.put_object(**kwargs)
+        return len(body)
+
+    def _create_multipart(self, key, content_type, content_encoding, cache_control):
+        kwargs = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            kwargs["ContentType"] = content_type
+        if content_encoding:
+            kwargs["ContentEncoding"] = content_encoding
+        if cache_control:
+            kwargs["CacheControl"] = cache_control
+        return self.client.create_multipart_upload(**kwargs)["UploadId"]
+
+    def _upload_part(self, key, upload_id, part_number, data):
+        response = self.client.upload_part(
+            Body=data, Bucket=self.bucket, Key=key, PartNumber=part_number, UploadId=upload_id
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def _complete_multipart(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+
+    def _abort_multipart(self, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Stores each bucket as a directory under CITY_SCRAPERS_LOCAL_STORE_DIR, standing in for S3.
+    Objects are written to a temporary file and renamed so a key is always either the old or the
+    new object, like overwriting in S3. Content type and cache control aren't kept.
+    """
+
+    TMP_SUFFIX = ".tmp-put"
+
+    def __init__(self, bucket, settings, stats=None, spider=None):
+        super().__init__(bucket, stats=stats, spider=spider)
+        self.root = os.path.join(
+            data_path(settings.get("CITY_SCRAPERS_LOCAL_STORE_DIR") or "store"), bucket
+        )
+
+    def _path(self, key):
+        parts = key.split("/")
+        if not key or key.startswith("/") or any(part in ("", ".", "..") for part in parts):
+            raise ValueError("Invalid object key {!r}".format(key))
+        return os.path.join(self.root, *parts)
+
+    def _list(self, prefix):
+        # Only walk the directory the prefix is in, like S3 only lists keys matching it
+        prefix_dir = os.path.join(self.root, *prefix.split("/")[:-1])
+        keys = []
+        for dirpath, _, filenames in os.walk(prefix_dir):
+            for filename in filenames:
+                if filename.endswith(self.TMP_SUFFIX):
+                    continue
+                path = os.path.join(dirpath, filename)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return keys
+
+    def _open(self, key):
+        return open(self._path(key), "rb")
+
+    def _put(self, key, body, content_type, cache_control):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "{}.{}{}".format(path, os.getpid(), self.TMP_SUFFIX)
+        with open(tmp_path, "wb") as f:
+            if isinstance(body, bytes):
+                f.write(body)
+            else:
+                while True:
+                    chunk = body.read(64 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            size = f.tell()
+        os.replace(tmp_path, path)
+        return size
+
+    def _create_multipart(self, key, content_type, content_encoding, cache_control):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "{}.{}{}".format(path, uuid.uuid4().hex, self.TMP_SUFFIX)
+        open(tmp_path, "wb").close()
+        return tmp_path
+
+    def _upload_part(self, key, upload_id, part_number, data):
+        with open(upload_id, "ab") as f:
+            f.write(data)
+        return part_number
+
+    def _complete_multipart(self, key, upload_id, parts):
+        os.replace(upload_id, self._path(key))
+
+    def _abort_multipart(self, key, upload_id):
+        if os.path.exists(upload_id):
+            os.remove(upload_id)
+
+
+class DirectoryObjectStore(LocalObjectStore):
+    """
+    Treats any directory as a bucket, so feeds written by Scrapy's file feed storage can be read
+    like feeds in an object store
+    """
+    def __init__(self, root, settings, stats=None, spider=None):
+        super().__init__(root, settings, stats=stats, spider=spider)
+        self.root = root
+
+
+def iter_lines(fileobj, chunk_size=64 * 1024):
+    """
+    Read lines from a binary file-like object in chunks, so the whole body is never loaded.
+    Gzipped bodies, like feeds from GzipMultipartFeedStorage, are decompressed as they're read.
+    """
+    decompressor = None
+    remainder = b""
+    first = True
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if first and chunk[:2] == GZIP_MAGIC:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first = False
+        if not chunk:
+            break
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line
+    if decompressor is not None:
+        remainder += decompressor.flush()
+    if remainder:
+        yield remainder
+
+
+STORES = {"s3": S3ObjectStore, "local": LocalObjectStore}
+
+
+def get_object_store(uri, settings, stats=None, spider=None):
+    """
+    Return the ObjectStore for a URI's bucket and the key it points to, like
+    ("s3://bucket/2020/01/16/feed.json") -> (S3ObjectStore("bucket"), "2020/01/16/feed.json")
+    """
+    parsed = urlparse(uri)
+    if parsed.scheme not in STORES:
+        raise ValueError("No object store for {} URIs".format(parsed.scheme))
+    store = STORES[parsed.scheme](parsed.netloc, settings, stats=stats, spider=spider)
+    return store, parsed.path.lstrip("/")
+
+
+def get_feed_store(feed_uri, settings, stats=None, spider=None):
+    """
+    Return the ObjectStore that feeds from FEED_URI are kept in. For a file:// FEED_URI the
+    directory before its first placeholder is the bucket, so feed keys have the same dated
+    prefixes as they do in S3.
+    """
+    parsed = urlparse(feed_uri)
+    if parsed.scheme != "file":
+        return get_object_store(feed_uri, settings, stats=stats, spider=spider)[0]
+    root_parts = []
+    for part in parsed.path.split("/")[:-1]:
+        if "%" in part:
+            break
+        root_parts.append(part)
+    return DirectoryObjectStore("/".join(root_parts) or "/", settings, stats=stats, spider=spider)
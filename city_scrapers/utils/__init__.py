@@ -0,0 +1,2 @@
+from .dates import DateParser, parse_date  # noqa
+from .streaming import iter_elements  # noqa
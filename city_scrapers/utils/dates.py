@@ -0,0 +1,159 @@
+import re
+from datetime import datetime
+
+# Formats listed by spiders are usually tried against every row of a page, so the format that
+# matched last is tried first and results are memoized up to this many strings per parser
+CACHE_SIZE = 1024
+
+MONTHS = [
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december"
+]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+_month_numbers = {name: number for number, name in enumerate(MONTHS, 1)}
+_month_numbers.update({name[:3]: number for number, name in enumerate(MONTHS, 1)})
+
+# Patterns for the strptime directives spiders use, matching the same strings as strptime does in
+# the C locale, and the field each one sets. Formats with any other directive are left to strptime.
+_directives = {
+    "Y": (r"(\d\d\d\d)", "year"),
+    "y": (r"(\d\d)", "short_year"),
+    "m": (r"(1[0-2]|0[1-9]|[1-9])", "month"),
+    "B": (r"({})".format("|".join(MONTHS)), "month_name"),
+    "b": (r"({})".format("|".join(name[:3] for name in MONTHS)), "month_name"),
+    "d": (r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])", "day"),
+    "H": (r"(2[0-3]|[0-1]\d|\d)", "hour"),
+    "I": (r"(1[0-2]|0[1-9]|[1-9])", "hour12"),
+    "M": (r"([0-5]\d|\d)", "minute"),
+    "S": (r"(6[0-1]|[0-5]\d|\d)", "second"),
+    "p": (r"(am|pm)", "ampm"),
+    # The weekday is checked by the pattern but, like strptime, doesn't change the date
+    "A": (r"(?:{})".format("|".join(WEEKDAYS)), None),
+    "a": (r"(?:{})".format("|".join(name[:3] for name in WEEKDAYS)), None),
+    "%": ("%", None),
+}
+
+
+def compile_format(date_format):
+    """
+    Compile a strptime format to a case-insensitive regex and the fields its groups set, or return
+    None if it uses a directive that isn't supported. Whitespace in the format matches any run of
+    whitespace, like strptime.
+    """
+    pattern = []
+    fields = []
+    index = 0
+    while index < len(date_format):
+        char = date_format[index]
+        if char == "%":
+            directive = _directives.get(date_format[index + 1:index + 2])
+            if directive is None:
+                return None
+            pattern.append(directive[0])
+            if directive[1] is not None:
+                fields.append(directive[1])
+            index += 2
+            continue
+        pattern.append(r"\s+" if char.isspace() else re.escape(char))
+        index += 1
+    return re.compile("".join(pattern), re.IGNORECASE), tuple(fields)
+
+
+def _build_datetime(fields, groups):
+    """Build the datetime for a detector's matched groups the way strptime would"""
+    values = dict(zip(fields, groups))
+    if "short_year" in values:
+        year = int(values["short_year"])
+        year += 1900 if year >= 69 else 2000
+    else:
+        year = int(values.get("year", 1900))
+    if "month_name" in values:
+        month = _month_numbers[values["month_name"].lower()]
+    else:
+        month = int(values.get("month", 1))
+    if "hour12" in values:
+        hour = int(values["hour12"]) % 12
+        if values.get("ampm", "").lower() == "pm":
+            hour += 12
+    else:
+        hour = int(values.get("hour", 0))
+    return datetime(
+        year,
+        month,
+        int(values.get("day", 1)),
+        hour,
+        int(values.get("minute", 0)),
+        int(values.get("second", 0)),
+    )
+
+
+class DateParser:
+    """
+    Parses date strings that can be in any of a list of strptime formats.
+
+    Whitespace (including non-breaking spaces) is collapsed before parsing. Each format is compiled
+    once to a detector regex, and a string that matches one is turned into a datetime from the
+    regex's groups without calling strptime, which rebuilds its locale data and raises a ValueError
+    for every format that doesn't match. Month and weekday names are English, like strptime in the
+    C locale. Formats with directives the detectors don't support are parsed with strptime.
+
+    The last format that matched is tried first, since rows on a page are almost always formatted
+    the same way, and repeated strings are returned from a cache instead of being parsed again.
+    Strings that don't match any of the formats are passed to `fallback` if there is one, like a
+    lenient dateutil parse. Otherwise a ValueError is raised, like strptime.
+    """
+    def __init__(self, *formats, fallback=None):
+        self.formats = list(formats)
+        self.detectors = [compile_format(date_format) for date_format in formats]
+        self.fallback = fallback
+        self.last_match = 0
+        self.cache = {}
+
+    def parse(self, value):
+        if value in self.cache:
+            return self.cache[value]
+        cleaned = " ".join(value.split())
+        result = self._parse_format(self.last_match, cleaned)
+        if result is not None:
+            return self._store(value, result)
+        for index in range(len(self.formats)):
+            if index == self.last_match:
+                continue
+            result = self._parse_format(index, cleaned)
+            if result is not None:
+                self.last_match = index
+                return self._store(value, result)
+        if self.fallback is not None:
+            return self._store(value, self.fallback(cleaned))
+        raise ValueError("{!r} doesn't match any of the formats {}".format(value, self.formats))
+
+    def _parse_format(self, index, cleaned):
+        """Return the datetime for a string in one of the formats, or None if it isn't"""
+        detector = self.detectors[index]
+        try:
+            if detector is None:
+                return datetime.strptime(cleaned, self.formats[index])
+            match = detector[0].fullmatch(cleaned)
+            if match is None:
+                return None
+            return _build_datetime(detector[1], match.groups())
+        except ValueError:
+            # Matched the pattern but isn't a valid date, like February 30
+            return None
+
+    def _store(self, value, result):
+        if len(self.cache) >= CACHE_SIZE:
+            self.cache.clear()
+        self.cache[value] = result
+        return result
+
+
+_parsers = {}
+
+
+def parse_date(value, *formats):
+    """Parse a date string with a shared DateParser for the given formats"""
+    if formats not in _parsers:
+        _parsers[formats] = DateParser(*formats)
+    return _parsers[formats].parse(value)
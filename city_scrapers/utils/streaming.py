@@ -0,0 +1,43 @@
+from lxml import etree
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_elements(response, match, chunk_size=CHUNK_SIZE):
+    """
+    Yield elements of an HTML response that `match` returns True for, without building the tree
+    for the whole document.
+
+    The body is fed to lxml's pull parser in chunks. `match` is called with each element as soon
+    as its start tag is parsed, so only the tag and attributes are available to it. Matching
+    elements are yielded once they're complete, and everything outside of them is cleared as soon
+    as it's parsed. Like lxml's `iterparse`, each element is only valid until the next one is
+    requested, and the rest of the document isn't parsed if iteration stops early.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=response.encoding)
+    open_matches = []
+    body = response.body
+    for offset in range(0, len(body) + 1, chunk_size):
+        if offset < len(body):
+            parser.feed(body[offset:offset + chunk_size])
+        else:
+            parser.close()
+        for event, element in parser.read_events():
+            if event == "start":
+                if match(element):
+                    open_matches.append(element)
+                continue
+            if open_matches and element is open_matches[-1]:
+                open_matches.pop()
+                yield element
+            if not open_matches:
+                _discard(element)
+
+
+def _discard(element):
+    """Free a parsed element along with any earlier siblings"""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
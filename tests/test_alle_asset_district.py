@@ -1,8 +1,13 @@
+from datetime import datetime
 from os.path import dirname, join
 
+from city_scrapers_core.constants import PASSED
 from city_scrapers_core.utils import file_response
 from freezegun import freeze_time
+from scrapy import Request
+from scrapy.http import HtmlResponse
 
+from city_scrapers.mixins import DetailStore
 from city_scrapers.spiders.alle_asset_district import AlleAssetDistrictSpider
 
 test_response = file_response(
@@ -17,3 +22,56 @@ freezer.start()
 parsed_items = [item for item in spider.parse(test_response)]
 
 freezer.stop()
+
+POST_BODY = b"""
+<div class="post-title"><h1>Board Meeting</h1></div>
+<span class="published">Thu, Jan 10, 2019</span>
+<div class="body-wizy">
+  <p>The RAD Board will meet at 1:00PM.</p>
+  <div class="row"><div class="info"><p>RAD Office</p></div></div>
+  <div class="row"><div class="info"><p>310 Grant Street, Pittsburgh, PA 15219</p></div></div>
+</div>
+"""
+
+
+def create_spider(tmpdir):
+    store_spider = AlleAssetDistrictSpider()
+    store_spider._detail_store = DetailStore(str(tmpdir.join("alle_asset_district.json")))
+    return store_spider
+
+
+def test_requests():
+    assert [request.url for request in parsed_items] == [
+        "https://radworkshere.org/events/{}".format(post_id)
+        for post_id in [1918, 1919, 1920, 1921, 1922, 1923, 1924, 1926, 1925]
+    ]
+
+
+def test_stored_meetings(tmpdir):
+    post_url = "https://radworkshere.org/events/1918"
+    with freeze_time("2019-01-08"):
+        store_spider = create_spider(tmpdir)
+        list(store_spider.parse(test_response))
+        item = next(
+            store_spider.parse_meeting(
+                HtmlResponse(post_url, body=POST_BODY, request=Request(post_url))
+            )
+        )
+        assert item["start"] == datetime(2019, 1, 10, 13)
+        assert item["location"] == {
+            "address": "310 Grant Street, Pittsburgh, PA 15219",
+            "name": "RAD Office",
+        }
+        store_spider.closed("finished")
+
+        # Posts are requested again until revalidate_days after the meeting
+        assert len([
+            output for output in create_spider(tmpdir).parse(test_response)
+            if isinstance(output, Request)
+        ]) == 9
+
+    with freeze_time("2019-02-08"):
+        outputs = list(create_spider(tmpdir).parse(test_response))
+    assert len([output for output in outputs if isinstance(output, Request)]) == 8
+    stored = [output for output in outputs if not isinstance(output, Request)]
+    assert stored == [dict(item, status=PASSED)]
@@ -6,7 +6,7 @@ import pytest
 from city_scrapers_core.constants import CITY_COUNCIL, PASSED
 from freezegun import freeze_time
 
-from city_scrapers.spiders.alle_county import AlleCountySpider
+from city_scrapers.spiders.legistar_agencies import AlleCountySpider
 
 freezer = freeze_time("2019-01-23")
 freezer.start()
@@ -105,3 +105,27 @@ def test_classification():
 @pytest.mark.parametrize("item", parsed_items)
 def test_all_day(item):
     assert item["all_day"] is False
+
+
+def test_split_tables():
+    body = b"""
+    <html><body>
+      <table dropzone="copy">
+        <tr><td>Schedule</td><td><p>January 15, 2019</p><p>February 19, 2019</p></td></tr>
+      </table>
+      <p>Meetings are open to the public.</p>
+      <table dropzone="copy">
+        <tr><td>Time</td><td>10:00 a.m.</td></tr>
+        <tr><td>Location</td><td>One Chatham Center<br>112 Washington Place</td></tr>
+      </table>
+    </body></html>
+    """
+    response = test_response.replace(body=body)
+    data, urls = spider._parse_page(response)
+    assert len(data) == 2
+    assert spider._parse_dates(data) == ["January 15, 2019", "February 19, 2019"]
+    assert spider._parse_start_time(data) == "10:00 a.m."
+    assert spider._parse_location(data) == {
+        "name": "One Chatham Center",
+        "address": "112 Washington Place",
+    }
@@ -0,0 +1,87 @@
+import gzip
+
+from scrapy import Request
+from scrapy.http import HtmlResponse, Response
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.archive import ArchiveDownloadHandler, CrawlArchive
+from city_scrapers.middlewares import ArchiveRecorderMiddleware
+from city_scrapers.spiders.pa_utility import PaUtilitySpider
+
+URL = "http://www.puc.pa.gov/about_puc/public_meeting_calendar/public_meeting_audio_summaries_.aspx"
+
+spider = PaUtilitySpider()
+
+
+def test_archive_recorded(tmpdir):
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_ARCHIVE_RECORD": str(tmpdir)})
+    middleware = ArchiveRecorderMiddleware.from_crawler(crawler)
+    request = Request(URL)
+    body = gzip.compress(b"<html><body>Meeting</body></html>")
+    response = Response(
+        URL,
+        status=200,
+        headers={
+            "Content-Type": "text/html; charset=utf-8",
+            "Content-Encoding": "gzip"
+        },
+        body=body,
+    )
+    assert middleware.process_response(request, response, spider) is response
+    middleware.engine_stopped()
+    assert crawler.stats.get_value("archive/recorded", spider=spider) == 1
+
+    archive = CrawlArchive(str(tmpdir))
+    assert len(archive) == 1
+    assert Request(URL) in archive
+    loaded = archive.load(Request(URL))
+    assert loaded.body == body
+    assert loaded.headers["Content-Encoding"] == b"gzip"
+    assert archive.load(Request(URL + "?page=2")) is None
+
+
+def test_archive_latest_record(tmpdir):
+    archive = CrawlArchive(str(tmpdir))
+    request = Request(URL)
+    archive.record(request, Response(URL, status=500, body=b"error"))
+    archive.record(request, Response(URL, status=200, body=b"ok"))
+    archive.close()
+
+    loaded = CrawlArchive(str(tmpdir)).load(request)
+    assert loaded.status == 200
+    assert loaded.body == b"ok"
+
+
+def test_replay(tmpdir):
+    archive = CrawlArchive(str(tmpdir))
+    archive.record(
+        Request(URL),
+        Response(URL, status=200, headers={"Content-Type": "text/html"}, body=b"ok"),
+    )
+    archive.close()
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_ARCHIVE_REPLAY": str(tmpdir)})
+    handler = ArchiveDownloadHandler.from_crawler(crawler)
+
+    results = []
+    handler.download_request(Request(URL), spider).addBoth(results.append)
+    assert isinstance(results[0], HtmlResponse)
+    assert results[0].body == b"ok"
+    assert "archive" in results[0].flags
+
+    handler.download_request(Request(URL + "?page=2"), spider).addBoth(results.append)
+    assert results[1].getErrorMessage().startswith("No archived response")
+    assert crawler.stats.get_value("archive/replayed", spider=spider) == 1
+    assert crawler.stats.get_value("archive/missing", spider=spider) == 1
+
+
+def test_replay_other_day(tmpdir):
+    recorded_url = "https://dced.pa.gov/events?page=1&start_date=2020-01-01&end_date=2020-12-31"
+    archive = CrawlArchive(str(tmpdir))
+    archive.record(Request(recorded_url), Response(recorded_url, status=200, body=b"ok"))
+    archive.close()
+
+    archive = CrawlArchive(str(tmpdir))
+    later_url = "https://dced.pa.gov/events?page=1&start_date=2020-02-01&end_date=2021-01-31"
+    assert Request(later_url) in archive
+    assert archive.load(Request(later_url)).body == b"ok"
+    assert archive.load(Request(later_url.replace("page=1", "page=2"))) is None
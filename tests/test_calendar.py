@@ -0,0 +1,115 @@
+import json
+
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from city_scrapers.extensions import CalendarExtension
+from city_scrapers.spiders.legistar_agencies import AlleCountySpider, PittCityCouncilSpider
+
+county_spider = AlleCountySpider()
+council_spider = PittCityCouncilSpider()
+
+
+class SyncCalendarExtension(CalendarExtension):
+    defer_write = staticmethod(defer.maybeDeferred)
+
+
+def ocd_item(scraper_id, start, updated_at="2020-01-01T00:00:00-05:00"):
+    return {
+        "_id": "ocd-event/" + scraper_id,
+        "name": "Meeting",
+        "start_time": start,
+        "updated_at": updated_at,
+        "extra": {
+            "cityscrapers.org/id": scraper_id
+        },
+    }
+
+
+def create_extension(tmpdir):
+    crawler = get_crawler(
+        settings_dict={
+            "FEED_URI": "local://bucket/%(name)s.json",
+            "CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir.join("store")),
+            "CITY_SCRAPERS_CALENDAR_DIR": str(tmpdir.join("calendar")),
+        }
+    )
+    return crawler, SyncCalendarExtension.from_crawler(crawler)
+
+
+def run_spider(ext, spider, items):
+    for item in items:
+        ext.item_scraped(item, spider)
+    results = []
+    ext.spider_closed(spider, "finished").addBoth(results.append)
+    assert results == [None]
+
+
+def read_partition(tmpdir, month):
+    return [
+        json.loads(line)["extra"]["cityscrapers.org/id"]
+        for line in tmpdir.join("store", "bucket", "calendar", month + ".json").readlines()
+    ]
+
+
+def test_calendar_merged(tmpdir):
+    crawler, ext = create_extension(tmpdir)
+    run_spider(
+        ext, county_spider, [
+            ocd_item("county_3", "2020-01-20T10:00:00-05:00"),
+            ocd_item("county_1", "2020-01-02T10:00:00-05:00"),
+            ocd_item("county_feb", "2020-02-02T10:00:00-05:00"),
+        ]
+    )
+    run_spider(
+        ext, council_spider, [
+            ocd_item("council_2", "2020-01-10T10:00:00-05:00"),
+            ocd_item("county_3", "2020-01-20T10:00:00-05:00"),
+        ]
+    )
+    assert read_partition(tmpdir, "2020-01") == ["county_1", "council_2", "county_3"]
+    assert read_partition(tmpdir, "2020-02") == ["county_feb"]
+    index = json.loads(tmpdir.join("store", "bucket", "calendar", "index.json").read())
+    assert index == [
+        {
+            "partition": "calendar/2020-01.json",
+            "month": "2020-01",
+            "items": 3,
+            "spiders": ["alle_county", "pitt_city_council"],
+        },
+        {
+            "partition": "calendar/2020-02.json",
+            "month": "2020-02",
+            "items": 1,
+            "spiders": ["alle_county"],
+        },
+    ]
+
+
+def test_only_changed_partitions(tmpdir):
+    crawler, ext = create_extension(tmpdir)
+    items = [
+        ocd_item("county_1", "2020-01-02T10:00:00-05:00"),
+        ocd_item("county_feb", "2020-02-02T10:00:00-05:00"),
+    ]
+    run_spider(ext, county_spider, items)
+    assert crawler.stats.get_value("calendar/partitions_changed", spider=county_spider) == 2
+
+    # Only updated_at changed
+    run_spider(ext, county_spider, [{**item, "updated_at": "2020-01-02"} for item in items])
+    assert crawler.stats.get_value("calendar/partitions_changed", spider=county_spider) == 0
+
+    run_spider(ext, county_spider, items[:1] + [ocd_item("county_mar", "2020-03-01T10:00:00")])
+    assert crawler.stats.get_value("calendar/partitions_changed", spider=county_spider) == 2
+    assert read_partition(tmpdir, "2020-02") == []
+    assert read_partition(tmpdir, "2020-03") == ["county_mar"]
+    index = json.loads(tmpdir.join("store", "bucket", "calendar", "index.json").read())
+    assert [partition["month"] for partition in index] == ["2020-01", "2020-03"]
+
+
+def test_missing_partition_file(tmpdir):
+    crawler, ext = create_extension(tmpdir)
+    run_spider(ext, county_spider, [ocd_item("county_feb", "2020-02-02T10:00:00-05:00")])
+    tmpdir.join("calendar", "2020-02", "alle_county.jsonl").remove()
+    run_spider(ext, county_spider, [])
+    assert read_partition(tmpdir, "2020-02") == []
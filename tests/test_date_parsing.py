@@ -0,0 +1,15 @@
+import os
+
+from benchmarks.date_parsing import SPIDERS, measure, record_strings
+
+
+def test_fixtures_exist():
+    for _, _, file_name, _ in SPIDERS:
+        assert os.path.exists(os.path.join(os.path.dirname(__file__), "files", file_name))
+
+
+def test_every_spider_recorded():
+    recorded = record_strings()
+    assert {page for page, _ in recorded} == {file_name for _, _, file_name, _ in SPIDERS}
+    results = measure(recorded, 1)
+    assert all(result["date_parser_us"] > 0 for result in results)
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from city_scrapers.utils import DateParser, parse_date
+from city_scrapers.utils.dates import compile_format
+
+
+def test_parse_formats():
+    parser = DateParser("%A, %B %d, %Y", "%m/%d/%Y")
+    assert parser.parse("Thursday, January 16, 2020") == datetime(2020, 1, 16)
+    assert parser.parse("1/16/2020") == datetime(2020, 1, 16)
+    with pytest.raises(ValueError):
+        parser.parse("To be scheduled")
+
+
+def test_whitespace_collapsed():
+    parser = DateParser("%B %d, %Y")
+    assert parser.parse("\n\tJanuary\xa016,  2020 ") == datetime(2020, 1, 16)
+
+
+def test_last_match_first():
+    parser = DateParser("%B %d %Y %I %p", "%B %d %Y")
+    parser.parse("July 30 2019")
+    assert parser.last_match == 1
+    assert parser.parse("July 31 2019") == datetime(2019, 7, 31)
+    assert parser.last_match == 1
+
+
+def test_fallback():
+    parser = DateParser("%B %d, %Y", fallback=lambda value: datetime(2020, 1, 16))
+    assert parser.parse("Thu. 1/16/20") == datetime(2020, 1, 16)
+
+
+def test_cached():
+    parser = DateParser("%B %d, %Y")
+    first = parser.parse("July 30, 2019")
+    assert parser.cache == {"July 30, 2019": first}
+    assert parser.parse("July 30, 2019") is first
+
+
+def test_parse_date_shared():
+    assert parse_date("7:30PM", "%I:%M%p", "%I%p") == datetime(1900, 1, 1, 19, 30)
+    assert parse_date("7pm", "%I:%M%p", "%I%p") == datetime(1900, 1, 1, 19)
+
+
+@pytest.mark.parametrize(
+    "date_format,value", [
+        ("%A, %B %d, %Y", "Thursday, January 16, 2020"),
+        ("%a, %b %d, %Y", "thu, JAN 16, 2020"),
+        ("%m/%d/%Y", "1/6/2020"),
+        ("%m/%d/%y", "01/06/69"),
+        ("%B %d %Y %I:%M %p", "July 30 2019 12:05 am"),
+        ("%B %d %Y %I %p", "July 30 2019 12 PM"),
+        ("%I%p", "7pm"),
+        ("%Y-%m-%dT%H:%M:%S", "2019-07-30T18:30:05"),
+        ("%d%% %Y", "5% 2019"),
+    ]
+)
+def test_detector_matches_strptime(date_format, value):
+    assert compile_format(date_format) is not None
+    assert DateParser(date_format).parse(value) == datetime.strptime(value, date_format)
+
+
+def test_detector_rejects_invalid_date():
+    parser = DateParser("%B %d, %Y")
+    with pytest.raises(ValueError):
+        parser.parse("February 30, 2020")
+    with pytest.raises(ValueError):
+        parser.parse("January 16, 2020 at 7pm")
+
+
+def test_unsupported_directive_uses_strptime():
+    assert compile_format("%j %Y") is None
+    assert DateParser("%j %Y").parse("16 2020") == datetime(2020, 1, 16)
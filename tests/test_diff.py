@@ -0,0 +1,138 @@
+import json
+import os
+from datetime import datetime
+
+from city_scrapers_core.constants import CANCELLED, TENTATIVE
+from city_scrapers_core.items import Meeting
+from freezegun import freeze_time
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.pipelines import IndexedDiffPipeline
+from city_scrapers.spiders.pa_utility import PaUtilitySpider
+from city_scrapers.storage import iter_lines
+
+spider = PaUtilitySpider()
+
+FEED_PATH = "%(year)s/%(month)s/%(day)s/%(hour_min)s/%(name)s.json"
+
+
+def ocd_item(scraper_id, start, uid):
+    return {
+        "_id": uid,
+        "name": "Public Meeting",
+        "status": TENTATIVE,
+        "start_time": start,
+        "extra": {
+            "cityscrapers.org/id": scraper_id
+        },
+    }
+
+
+def meeting(scraper_id, start):
+    return Meeting(id=scraper_id, title="Public Meeting", status=TENTATIVE, start=start)
+
+
+def create_pipeline(tmpdir):
+    crawler = get_crawler(
+        settings_dict={
+            "ITEM_PIPELINES": {
+                "city_scrapers.pipelines.IndexedDiffPipeline": 200,
+                "city_scrapers_core.pipelines.OpenCivicDataPipeline": 400,
+            },
+            "FEED_URI": "local://feeds/{}".format(FEED_PATH),
+            "CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir.join("store")),
+            "CITY_SCRAPERS_DIFF_INDEX_DIR": str(tmpdir.join("diff")),
+        }
+    )
+    crawler.spider = spider
+    return crawler, IndexedDiffPipeline.from_crawler(crawler)
+
+
+def scrape(crawler, pipeline, item):
+    item = pipeline.process_item(item, spider)
+    if isinstance(item, Meeting):
+        item = {
+            **ocd_item(item["id"], item["start"].isoformat() + "-05:00",
+                       item.get("_id") or "new"),
+            "status": item["status"],
+        }
+    pipeline.item_scraped(item, None, spider)
+    return item
+
+
+def test_iter_lines():
+    class Chunked:
+        def __init__(self, body):
+            self.body = body
+
+        def read(self, size):
+            chunk, self.body = self.body[:size], self.body[size:]
+            return chunk
+
+    assert list(iter_lines(Chunked(b'{"a": 1}\n{"b": 2}\n\n{"c": 3}'),
+                           chunk_size=3)) == [b'{"a": 1}', b'{"b": 2}', b"", b'{"c": 3}']
+
+
+@freeze_time("2020-01-16")
+def test_diff_streams_previous_feed(tmpdir):
+    feed_dir = tmpdir.join("store", "feeds", "2020", "01", "16", "0000")
+    feed_dir.ensure(dir=True)
+    previous = [
+        ocd_item("past", "2020-01-01T10:00:00-05:00", "ocd-event/past"),
+        ocd_item("current", "2020-02-01T10:00:00-05:00", "ocd-event/current"),
+        ocd_item("missing", "2020-02-02T10:00:00-05:00", "ocd-event/missing"),
+    ]
+    feed_dir.join("pa_utility.json").write("\n".join(json.dumps(item) for item in previous))
+
+    crawler, pipeline = create_pipeline(tmpdir)
+    stats = crawler.stats
+    assert stats.get_value("diff/index_rebuilt", spider=spider)
+    current = scrape(crawler, pipeline, meeting("current", datetime(2020, 2, 1, 10)))
+    assert current["_id"] == "ocd-event/current"
+    scrape(crawler, pipeline, meeting("new", datetime(2020, 2, 3, 10)))
+    missing = list(pipeline.iter_missing_results(spider))
+    assert [item["_id"] for item in missing] == ["ocd-event/missing"]
+    assert scrape(crawler, pipeline, missing[0])["status"] == CANCELLED
+    pipeline.spider_closed(spider, "finished")
+    assert stats.get_value("diff/new", spider=spider) == 1
+    # Hashes in the rebuilt index come from the previous feed, so unchanged items aren't changed
+    assert stats.get_value("diff/unchanged", spider=spider) == 1
+    assert stats.get_value("diff/changed", spider=spider) is None
+    assert stats.get_value("diff/cancelled", spider=spider) == 1
+    assert stats.get_value("diff/previous_feed_reads", spider=spider) == 2
+    assert os.path.exists(str(tmpdir.join("diff", "pa_utility.json")))
+
+    # The next run uses the index and doesn't read the previous feed when nothing is missing
+    crawler, pipeline = create_pipeline(tmpdir)
+    for scraper_id, start in [
+        ("current", datetime(2020, 2, 1, 10)),
+        ("new", datetime(2020, 2, 3, 10)),
+        ("missing", datetime(2020, 2, 2, 10)),
+    ]:
+        scrape(crawler, pipeline, meeting(scraper_id, start))
+    assert list(pipeline.iter_missing_results(spider)) == []
+    assert crawler.stats.get_value("diff/unchanged", spider=spider) == 2
+    assert crawler.stats.get_value("diff/changed", spider=spider) == 1
+    assert crawler.stats.get_value("diff/previous_feed_reads", spider=spider) is None
+
+
+@freeze_time("2020-01-16")
+def test_diff_file_feed(tmpdir):
+    feed_dir = tmpdir.join("feeds", "2020", "01", "16", "0000")
+    feed_dir.ensure(dir=True)
+    feed_dir.join("pa_utility.json").write(
+        json.dumps(ocd_item("current", "2020-02-01T10:00:00-05:00", "ocd-event/current"))
+    )
+    crawler = get_crawler(
+        settings_dict={
+            "ITEM_PIPELINES": {
+                "city_scrapers.pipelines.IndexedDiffPipeline": 200,
+                "city_scrapers_core.pipelines.OpenCivicDataPipeline": 400,
+            },
+            "FEED_URI": "file://{}/{}".format(tmpdir.join("feeds"), FEED_PATH),
+        }
+    )
+    crawler.spider = spider
+    pipeline = IndexedDiffPipeline.from_crawler(crawler)
+    current = scrape(crawler, pipeline, meeting("current", datetime(2020, 2, 1, 10)))
+    assert current["_id"] == "ocd-event/current"
@@ -0,0 +1,51 @@
+import asyncio
+
+from scrapy import Request
+from scrapy.http import Response
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.mixins import FetchMixin
+
+
+class FetchSpider(FetchMixin):
+    fetch_concurrency = 2
+
+    def __init__(self):
+        self.crawler = get_crawler()
+        self.running = 0
+        self.most_running = 0
+
+    async def fetch(self, request):
+        if request.url.endswith("/fail"):
+            raise ConnectionRefusedError(request.url)
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        # Later requests finish first
+        await asyncio.sleep(0.01 / int(request.url[-1]))
+        self.running -= 1
+        return Response(request.url, request=request)
+
+
+def test_fetch_all():
+    spider = FetchSpider()
+    urls = ["https://example.com/{}".format(idx) for idx in range(1, 6)]
+    loop = asyncio.new_event_loop()
+    try:
+        responses = loop.run_until_complete(spider.fetch_all([Request(url) for url in urls]))
+    finally:
+        loop.close()
+    assert [response.url for response in responses] == urls
+    assert spider.most_running == 2
+
+
+def test_fetch_all_failed():
+    spider = FetchSpider()
+    urls = ["https://example.com/1", "https://example.com/fail", "https://example.com/3"]
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(spider.fetch_all([Request(url) for url in urls]))
+    finally:
+        loop.close()
+    assert isinstance(results[1], ConnectionRefusedError)
+    assert [results[0].url, results[2].url] == [urls[0], urls[2]]
+    assert spider.crawler.stats.get_value("fetch/failed", spider=spider) == 1
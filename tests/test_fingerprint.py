@@ -0,0 +1,98 @@
+from datetime import datetime
+from os.path import dirname, join
+
+from city_scrapers_core.constants import PASSED, TENTATIVE
+from city_scrapers_core.items import Meeting
+from city_scrapers_core.utils import file_response
+from freezegun import freeze_time
+from scrapy import Request
+from scrapy.http import Response
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.middlewares import ContentFingerprintMiddleware
+from city_scrapers.middlewares.fingerprint import normalize_body
+from city_scrapers.spiders.pa_utility import PaUtilitySpider
+
+URL = "http://www.puc.pa.gov/about_puc/public_meeting_calendar/public_meeting_audio_summaries_.aspx"
+
+spider = PaUtilitySpider()
+test_response = file_response(join(dirname(__file__), "files", "pa_utility.html"), url=URL)
+
+
+def fail_parse():
+    raise AssertionError("callback should be skipped")
+    yield
+
+
+def test_normalize_body():
+    body = (
+        b'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="/wEPDwULLTE=" />'
+        b'<script src="/js/core.js?ver=323978"></script>'
+        b'<script>var delta = new Date("2020-02-02T03:49:37.7201900Z") - new Date();</script>'
+        b"<p>February 6, 2020 10:00 AM</p>"
+    )
+    assert normalize_body(body) == (
+        b'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="" />'
+        b'<script src="/js/core.js?ver="></script>'
+        b'<script>var delta = new Date("") - new Date();</script>'
+        b"<p>February 6, 2020 10:00 AM</p>"
+    )
+
+
+def test_normalize_body_keeps_content():
+    body = (
+        b'<p><time datetime="2020-02-06T15:00:00Z">February 6</time></p>'
+        b'<a href="/agenda.pdf?v=2">Agenda</a>'
+    )
+    assert normalize_body(body) == body
+
+
+def test_changed_timestamp_fingerprint(tmpdir):
+    middleware = ContentFingerprintMiddleware(str(tmpdir), get_crawler().stats)
+    body = b'<p><time datetime="2020-02-06T15:00:00Z">Meeting</time></p>'
+    changed = body.replace(b"15:00:00", b"17:00:00")
+    assert middleware._fingerprint(spider, test_response.replace(
+        body=body
+    )) != (middleware._fingerprint(spider, test_response.replace(body=changed)))
+
+
+def test_unchanged_items_replayed(tmpdir):
+    stats = get_crawler().stats
+    middleware = ContentFingerprintMiddleware(str(tmpdir), stats)
+
+    with freeze_time("2019-01-01"):
+        parsed = list(
+            middleware.process_spider_output(test_response, spider.parse(test_response), spider)
+        )
+    assert parsed[-1]["status"] == TENTATIVE
+
+    # Only the view state differs from the last run
+    body = test_response.body.replace(b'id="__VIEWSTATE" value="/', b'id="__VIEWSTATE" value="X')
+    assert body != test_response.body
+    with freeze_time("2020-01-01"):
+        replayed = list(
+            middleware.process_spider_output(
+                test_response.replace(body=body), fail_parse(), spider
+            )
+        )
+    assert len(replayed) == len(parsed)
+    assert [item["start"] for item in replayed] == [item["start"] for item in parsed]
+    assert replayed[-1]["status"] == PASSED
+    assert stats.get_value("fingerprint/parse_skipped", spider=spider) == 1
+    assert stats.get_value("fingerprint/items_replayed", spider=spider) == len(parsed)
+
+
+def test_changed_page_parsed(tmpdir):
+    middleware = ContentFingerprintMiddleware(str(tmpdir), get_crawler().stats)
+    list(middleware.process_spider_output(test_response, spider.parse(test_response), spider))
+    changed = test_response.replace(body=test_response.body.replace(b"2020", b"2021"))
+    parsed = list(middleware.process_spider_output(changed, spider.parse(changed), spider))
+    assert parsed[0]["start"].year == 2021
+
+
+def test_items_not_cached_with_requests(tmpdir):
+    middleware = ContentFingerprintMiddleware(str(tmpdir), get_crawler().stats)
+    response = Response(URL, request=Request(URL))
+    output = [Meeting(title="Meeting", start=datetime(2019, 1, 1)), Request(URL + "?page=2")]
+    assert list(middleware.process_spider_output(response, output, spider)) == output
+    assert list(middleware.process_spider_output(response, output, spider)) == output
@@ -0,0 +1,59 @@
+from scrapy import Request
+from scrapy.http import Response
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.middlewares import ConditionalHttpCacheMiddleware, RevalidatePolicy
+from city_scrapers.spiders.pa_utility import PaUtilitySpider
+
+URL = "http://www.puc.pa.gov/about_puc/public_meeting_calendar/public_meeting_audio_summaries_.aspx"
+VALIDATORS = {"ETag": '"abc123"', "Last-Modified": "Tue, 04 Feb 2020 15:00:00 GMT"}
+
+spider = PaUtilitySpider()
+
+
+def make_settings(tmpdir):
+    return Settings({
+        "HTTPCACHE_ENABLED": True,
+        "HTTPCACHE_DIR": str(tmpdir),
+        "HTTPCACHE_POLICY": "city_scrapers.middlewares.RevalidatePolicy",
+        "HTTPCACHE_STORAGE": "scrapy.extensions.httpcache.FilesystemCacheStorage",
+    })
+
+
+def test_policy_revalidates_with_validators():
+    policy = RevalidatePolicy(Settings())
+    request = Request(URL)
+    cached = Response(URL, headers={**VALIDATORS, "Cache-Control": "max-age=86400"})
+    assert policy.is_cached_response_fresh(cached, request) is False
+    assert request.headers["If-None-Match"] == b'"abc123"'
+    assert request.headers["If-Modified-Since"] == b"Tue, 04 Feb 2020 15:00:00 GMT"
+
+
+def test_policy_cacheable():
+    policy = RevalidatePolicy(Settings())
+    assert policy.should_cache_request(Request(URL))
+    assert not policy.should_cache_request(Request(URL, method="POST"))
+    assert not policy.should_cache_request(Request(URL, headers={"Authorization": "Bearer x"}))
+    assert policy.should_cache_response(Response(URL, headers=VALIDATORS), Request(URL))
+    assert not policy.should_cache_response(Response(URL), Request(URL))
+
+
+def test_not_modified_stats(tmpdir):
+    stats = get_crawler().stats
+    middleware = ConditionalHttpCacheMiddleware(make_settings(tmpdir), stats)
+    middleware.spider_opened(spider)
+    body = b"<html>" + b"x" * 1000 + b"</html>"
+
+    first = Request(URL)
+    assert middleware.process_request(first, spider) is None
+    middleware.process_response(first, Response(URL, headers=VALIDATORS, body=body), spider)
+
+    second = Request(URL)
+    assert middleware.process_request(second, spider) is None
+    assert second.headers["If-None-Match"] == b'"abc123"'
+    result = middleware.process_response(second, Response(URL, status=304), spider)
+    assert result.body == body
+    assert "cached" in result.flags
+    assert stats.get_value("httpcache/downloads_saved", spider=spider) == 1
+    assert stats.get_value("httpcache/bytes_saved", spider=spider) == len(body)
@@ -0,0 +1,22 @@
+from benchmarks.import_time import check_imports, parse_importtime
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:        50 |         50 | json
+import-benchmark: start
+import time:       200 |        200 |     scrapy.http
+import time:       100 |        300 |   scrapy
+import time:        40 |        340 | city_scrapers.spiders.example
+import time:        10 |         10 | dateutil
+"""
+
+
+def test_parse_importtime():
+    total, packages = parse_importtime(IMPORTTIME_OUTPUT)
+    assert total == 350
+    assert packages == {"scrapy": 300, "city_scrapers": 40, "dateutil": 10}
+
+
+def test_spiders_import_without_io():
+    result = check_imports()
+    assert result["errors"] == {}
+    assert result["violations"] == []
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from city_scrapers_core.constants import BOARD, CITY_COUNCIL, COMMITTEE, FORUM
+from freezegun import freeze_time
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.connection_pool import SharedPoolDownloadHandler
+from city_scrapers.spiders import legistar_agencies
+from city_scrapers.spiders.legistar_agencies import (
+    LEGISTAR_AGENCIES, AlleCountySpider, PittCityCouncilSpider, legistar_agency_spider
+)
+
+EVENT = {
+    "Name": {
+        "label": "Board of Directors"
+    },
+    "Meeting Date": "3/4/2019",
+    "Meeting Time": "6:00 PM",
+    "Meeting Location": "Public Hearing, Room 200\n--em--Budget hearing--em--",
+}
+
+
+def test_agency_spiders():
+    assert [agency["name"] for agency in LEGISTAR_AGENCIES] == [
+        AlleCountySpider.name,
+        PittCityCouncilSpider.name,
+    ]
+    assert AlleCountySpider.__module__ == legistar_agencies.__name__
+    assert AlleCountySpider.start_urls == ["https://alleghenycounty.legistar.com"]
+    assert PittCityCouncilSpider.allowed_domains == ["pittsburgh.legistar.com"]
+    assert PittCityCouncilSpider.agency == "Pittsburgh City Council"
+
+
+@freeze_time("2019-02-25")
+def test_new_agency():
+    spider_cls = legistar_agency_spider({
+        "name": "alle_port",
+        "agency": "Port Authority of Allegheny County",
+        "legistar_client": "portauthority",
+        "timezone": "America/New_York",
+        "location_rules": [(
+            "Room 200", {
+                "address": "345 Sixth Avenue, Pittsburgh, PA 15222",
+                "name": "Heinz 57 Center",
+            }
+        )],
+        "classification_rules": [
+            ("location", "hearing", FORUM),
+            ("title", "board", BOARD),
+        ],
+    })
+    assert spider_cls.__name__ == "AllePortSpider"
+    item = next(spider_cls().parse_legistar([(EVENT, None)]))
+    assert item["title"] == "Board of Directors"
+    assert item["description"] == "Budget hearing"
+    assert item["classification"] == FORUM
+    assert item["start"] == datetime(2019, 3, 4, 18)
+    assert item["location"] == {
+        "address": "345 Sixth Avenue, Pittsburgh, PA 15222",
+        "name": "Heinz 57 Center",
+    }
+    assert item["source"] == "https://portauthority.legistar.com/Calendar.aspx"
+    assert item["id"] == "alle_port/201903041800/x/board_of_directors"
+
+
+def test_agency_rules():
+    event = dict(EVENT, **{"Meeting Location": "Committee Room"})
+    item = next(AlleCountySpider().parse_legistar([(event, None)]))
+    assert item["classification"] == COMMITTEE
+    assert item["location"]["address"] == "Committee Room, 436 Grant Street, Pittsburgh, PA 15219"
+    item = next(PittCityCouncilSpider().parse_legistar([(event, None)]))
+    assert item["classification"] == CITY_COUNCIL
+    assert item["location"]["address"] == ""
+
+
+def test_location_note():
+    # Allegheny County uses the whole location, note included, and has no description
+    item = next(AlleCountySpider().parse_legistar([(EVENT, None)]))
+    assert item["description"] == ""
+    assert item["classification"] == FORUM
+    assert item["location"]["address"] == (
+        "Public Hearing, Room 200\n--em--Budget hearing--em--, "
+        "436 Grant Street, Pittsburgh, PA 15219"
+    )
+    event = dict(EVENT, **{"Meeting Location": "Gold Room\n--em--Committee meeting--em--"})
+    assert next(AlleCountySpider().parse_legistar([(event, None)]))["classification"] == COMMITTEE
+    item = next(PittCityCouncilSpider().parse_legistar([(event, None)]))
+    assert item["description"] == "Committee meeting"
+    assert item["classification"] == CITY_COUNCIL
+
+
+def test_shared_pool():
+    settings = {"CITY_SCRAPERS_CONCURRENT_REQUESTS_PER_DOMAIN": 3}
+    first = SharedPoolDownloadHandler.from_crawler(get_crawler(settings_dict=settings))
+    second = SharedPoolDownloadHandler.from_crawler(get_crawler(settings_dict=settings))
+    pool = first._pool
+    assert second._pool is pool
+    assert pool.maxPersistentPerHost == 3
+
+    first.close()
+    assert SharedPoolDownloadHandler.shared_pool is pool
+    second.close()
+    assert SharedPoolDownloadHandler.shared_pool is None
+    assert SharedPoolDownloadHandler.users == 0
@@ -0,0 +1,149 @@
+import json
+from datetime import datetime
+from os.path import dirname, join
+from urllib.parse import parse_qs, urlparse
+
+from freezegun import freeze_time
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.spiders.legistar_agencies import AlleCountySpider, PittCityCouncilSpider
+
+with open(join(dirname(__file__), "files", "pitt_city_council_api.json"), "rb") as f:
+    api_body = f.read()
+
+
+def create_spider(spider_cls, tmpdir, **settings):
+    crawler = get_crawler(
+        spider_cls,
+        settings_dict={
+            "CITY_SCRAPERS_LEGISTAR_BACKEND": "api",
+            "CITY_SCRAPERS_DETAIL_STORE_DIR": str(tmpdir),
+            **settings
+        }
+    )
+    return spider_cls.from_crawler(crawler)
+
+
+def api_response(request, body):
+    return TextResponse(request.url, body=body, encoding="utf-8", request=request)
+
+
+@freeze_time("2019-02-25")
+def test_api_request(tmpdir):
+    request = next(create_spider(AlleCountySpider, tmpdir).start_requests())
+    url = urlparse(request.url)
+    assert url.netloc == "webapi.legistar.com"
+    assert url.path == "/v1/alleghenycounty/events"
+    assert parse_qs(url.query) == {
+        "$filter": ["EventDate ge datetime'2019-01-26'"],
+        "$orderby": ["EventDate,EventId"],
+        "$top": ["1000"],
+        "$skip": ["0"],
+    }
+
+    spider = create_spider(
+        PittCityCouncilSpider,
+        tmpdir,
+        CITY_SCRAPERS_LEGISTAR_API_URL="http://127.0.0.1:8765/",
+    )
+    assert next(spider.start_requests()
+                ).url.startswith("http://127.0.0.1:8765/v1/pittsburgh/events?")
+
+
+def test_html_backend(tmpdir):
+    spider = create_spider(AlleCountySpider, tmpdir, CITY_SCRAPERS_LEGISTAR_BACKEND="html")
+    assert [request.url for request in spider.start_requests()] == spider.start_urls
+
+
+@freeze_time("2019-02-25")
+def test_api_events(tmpdir):
+    spider = create_spider(PittCityCouncilSpider, tmpdir)
+    request = next(spider.start_requests())
+    items = list(request.callback(api_response(request, api_body), **request.cb_kwargs))
+    assert [item["title"] for item in items] == [
+        "Standing Committee",
+        "Committee on Land Use and Economic Development",
+        "City Council",
+    ]
+    assert items[0]["start"] == datetime(2019, 2, 27, 10)
+    assert items[0]["links"] == [{
+        "href":
+            "https://pittsburgh.legistar.com/View.ashx?M=A&ID=681042&GUID=631BD673-830F-4759-9DDE-EB16B3F1E681",  # noqa
+        "title": "Agenda",
+    }]
+    assert items[0][
+        "source"
+    ] == "https://pittsburgh.legistar.com/MeetingDetail.aspx?LEGID=4901&GID=40&G=3A1FB7D8-8A9D-4F8B-A4B2-D6F0C2B9E1A2"  # noqa
+    assert items[1]["description"] == "Post Agenda: Affordable housing"
+    assert items[1]["location"]["address"] == "414 Grant Street, Pittsburgh, PA 15219"
+    assert items[2]["links"] == [{
+        "href": "https://pittsburgh.granicus.com/MediaPlayer.php?view_id=2&clip_id=3109",
+        "title": "Video",
+    }]
+
+    # Events are saved to the history like the calendar scraper's
+    with open(spider._legistar_history_path()) as f:
+        history = json.load(f)
+    assert history[0]["Meeting Date"] == "2/27/2019"
+    assert history[0]["Minutes"] == "Not\u00a0available"
+
+
+@freeze_time("2019-02-25")
+def test_api_pages(tmpdir):
+    spider = create_spider(AlleCountySpider, tmpdir)
+    spider.legistar_api_page_size = 2
+    events = json.loads(api_body)
+    request = next(spider.start_requests())
+
+    output = list(
+        request.callback(
+            api_response(request,
+                         json.dumps(events[:2]).encode()), **request.cb_kwargs
+        )
+    )
+    assert len(output) == 1
+    next_request = output[0]
+    assert parse_qs(urlparse(next_request.url).query)["$skip"] == ["2"]
+
+    items = list(
+        next_request.callback(
+            api_response(next_request,
+                         json.dumps(events[2:]).encode()), **next_request.cb_kwargs
+        )
+    )
+    assert [item["title"] for item in items] == [
+        "Standing Committee",
+        "Committee on Land Use and Economic Development",
+        "City Council",
+    ]
+    assert items[0]["source"] == "https://alleghenycounty.legistar.com/DepartmentDetail.aspx?ID=2"
+
+
+@freeze_time("2019-02-25")
+def test_api_keeps_earlier_history(tmpdir):
+    spider = create_spider(PittCityCouncilSpider, tmpdir)
+    january_event = {
+        "Name": "Standing Committee",
+        "Meeting Date": "1/16/2019",
+        "Meeting Time": "10:00 AM",
+        "Meeting Location": "Council Chambers",
+        "Meeting Details": {
+            "url": "https://pittsburgh.legistar.com/MeetingDetail.aspx?ID=1"
+        },
+    }
+    removed_event = dict(january_event, **{"Meeting Date": "2/1/2019"})
+    removed_event["Meeting Details"] = {
+        "url": "https://pittsburgh.legistar.com/MeetingDetail.aspx?ID=2"
+    }
+    with open(spider._legistar_history_path(), "w") as f:
+        json.dump([january_event, removed_event], f)
+
+    request = next(spider.start_requests())
+    items = list(request.callback(api_response(request, api_body), **request.cb_kwargs))
+    # Events from before the API's window are kept even though they're in the same year
+    assert [item["start"] for item in items][:2] == [
+        datetime(2019, 1, 16, 10),
+        datetime(2019, 2, 27, 10),
+    ]
+    assert len(items) == 4
@@ -0,0 +1,105 @@
+import json
+from datetime import datetime
+from os.path import dirname, join
+
+from freezegun import freeze_time
+
+from city_scrapers.mixins import legistar
+from city_scrapers.spiders.legistar_agencies import PittCityCouncilSpider
+
+with open(join(dirname(__file__), "files", "pitt_city_council.json"), "r") as f:
+    test_events = json.load(f)
+
+OLD_EVENT = {
+    "Name": "Standing Committee",
+    "Meeting Date": "12/12/2018",
+    "Meeting Time": "10:00 AM",
+    "Meeting Location": "Council Chambers",
+    "Meeting Details": {
+        "url": "https://pittsburgh.legistar.com/MeetingDetail.aspx?ID=1"
+    },
+}
+REMOVED_EVENT = dict(OLD_EVENT, **{"Meeting Date": "1/30/2019"})
+REMOVED_EVENT["Meeting Details"] = {
+    "url": "https://pittsburgh.legistar.com/MeetingDetail.aspx?ID=2"
+}
+
+
+def unique_events(events):
+    unique = []
+    for event, _ in events:
+        if event not in unique:
+            unique.append(event)
+    return unique
+
+
+def make_spider(tmpdir):
+    spider = PittCityCouncilSpider()
+    path = str(tmpdir.join("pitt_city_council.history.json"))
+    spider._legistar_history_path = lambda: path
+    return spider, path
+
+
+@freeze_time("2019-02-25")
+def test_window_start():
+    spider = PittCityCouncilSpider()
+    assert spider._legistar_window_start() == datetime(2019, 1, 1)
+    with freeze_time("2019-01-10"):
+        assert spider._legistar_window_start() == datetime(2018, 1, 1)
+
+
+@freeze_time("2019-02-25 14:30")
+def test_earliest_change():
+    assert PittCityCouncilSpider()._legistar_earliest_change() == datetime(2019, 1, 26)
+
+
+def test_call_legistar(monkeypatch):
+    calls = []
+
+    class MockScraper:
+        def events(self, **kwargs):
+            calls.append(kwargs)
+            return iter(())
+
+    monkeypatch.setattr(legistar, "LegistarEventsScraper", MockScraper)
+    PittCityCouncilSpider()._call_legistar(since=2019)
+    assert calls == [{"follow_links": False, "since": 2019}]
+
+
+@freeze_time("2019-02-25")
+def test_history_merged(tmpdir):
+    spider, path = make_spider(tmpdir)
+    with open(path, "w") as f:
+        json.dump([OLD_EVENT, REMOVED_EVENT], f)
+
+    merged = spider._merge_legistar_history(test_events, datetime(2019, 1, 1))
+    # The fixture lists some events twice
+    assert len(merged) == len(unique_events(test_events)) + 1
+    assert merged[0] == (OLD_EVENT, None)
+    assert REMOVED_EVENT not in [event for event, _ in merged]
+
+    with open(path) as f:
+        assert json.load(f) == [event for event, _ in merged]
+    items = list(spider.parse_legistar(merged))
+    assert items[0]["start"] == datetime(2018, 12, 12, 10)
+
+
+def test_no_history_path():
+    spider = PittCityCouncilSpider()
+    merged = spider._merge_legistar_history(test_events, datetime(2019, 1, 1))
+    assert [event for event, _ in merged] == unique_events(test_events)
+
+
+def test_history_capped(tmpdir):
+    spider, path = make_spider(tmpdir)
+    expired_event = dict(OLD_EVENT, **{"Meeting Date": "12/12/2016"})
+    expired_event["Meeting Details"] = {
+        "url": "https://pittsburgh.legistar.com/MeetingDetail.aspx?ID=3"
+    }
+    with open(path, "w") as f:
+        json.dump([expired_event, OLD_EVENT], f)
+
+    merged = spider._merge_legistar_history([], datetime(2019, 1, 1))
+    assert merged == [(OLD_EVENT, None)]
+    with open(path) as f:
+        assert json.load(f) == [OLD_EVENT]
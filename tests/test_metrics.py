@@ -0,0 +1,117 @@
+import json
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse
+from scrapy.pipelines import ItemPipelineManager
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.extensions import CrawlMetricsExtension
+from city_scrapers.metrics import CrawlMetrics, Histogram
+from city_scrapers.middlewares import CallbackTimingMiddleware
+from city_scrapers.spiders.pitt_urbandev import PittUrbandevSpider
+
+URL = "https://www.ura.org/pages/board-meeting-notices-agendas-and-minutes"
+
+spider = PittUrbandevSpider()
+
+
+class KeepPipeline:
+    def process_item(self, item, spider):
+        return item
+
+
+class DropPipeline:
+    def process_item(self, item, spider):
+        if item.get("drop"):
+            raise DropItem("Dropped")
+        return item
+
+
+def create_crawler(tmpdir):
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_METRICS_DIR": str(tmpdir)})
+    crawler.spider = spider
+    return crawler
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1.0))
+    for value in [0.05, 0.1, 0.5, 3]:
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.to_dict() == {
+        "count": 4,
+        "sum": 3.65,
+        "buckets": {
+            "0.1": 2,
+            "1": 3,
+            "+Inf": 4
+        },
+    }
+
+
+def test_prometheus():
+    metrics = CrawlMetrics()
+    metrics.observe("callback_seconds", 0.2, buckets=(0.1, 1.0), spider="a", callback="parse")
+    metrics.inc("responses_total", spider="a", status=200)
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE city_scrapers_callback_seconds histogram",
+        'city_scrapers_callback_seconds_bucket{callback="parse",spider="a",le="0.1"} 0',
+        'city_scrapers_callback_seconds_bucket{callback="parse",spider="a",le="1"} 1',
+        'city_scrapers_callback_seconds_bucket{callback="parse",spider="a",le="+Inf"} 1',
+        'city_scrapers_callback_seconds_sum{callback="parse",spider="a"} 0.2',
+        'city_scrapers_callback_seconds_count{callback="parse",spider="a"} 1',
+        "# TYPE city_scrapers_responses_total counter",
+        'city_scrapers_responses_total{spider="a",status="200"} 1',
+    ]
+
+
+def test_callback_timing(tmpdir):
+    crawler = create_crawler(tmpdir)
+    middleware = CallbackTimingMiddleware.from_crawler(crawler)
+    request = Request(URL, callback=spider.parse)
+    response = HtmlResponse(URL, body=b"<html></html>", request=request)
+    result = [{"title": "Meeting"}, Request(URL + "?page=2"), {"title": "Meeting"}]
+    assert list(middleware.process_spider_output(response, iter(result), spider)) == result
+
+    metrics = CrawlMetrics.for_crawler(crawler)
+    labels = (("callback", "parse"), ("spider", "pitt_urbandev"))
+    assert metrics.histograms[("callback_seconds", labels)].count == 1
+    assert metrics.counters[("callback_items_total", labels)] == 2
+    assert metrics.counters[("callback_requests_total", labels)] == 1
+
+
+def test_metrics_extension(tmpdir):
+    crawler = create_crawler(tmpdir)
+    ext = CrawlMetricsExtension.from_crawler(crawler)
+    itemproc = ItemPipelineManager(KeepPipeline(), DropPipeline())
+    ext.wrap_pipelines(itemproc)
+    assert itemproc.process_item({"title": "Meeting"}, spider).result == {"title": "Meeting"}
+    with pytest.raises(DropItem):
+        itemproc.process_item({"drop": True}, spider).result.raiseException()
+
+    request = Request(URL, meta={"download_latency": 0.3})
+    ext.response_received(HtmlResponse(URL, body=b"a" * 2000), request, spider)
+    ext.response_received(HtmlResponse(URL, body=b"cached"), Request(URL), spider)
+    ext.spider_closed(spider, "finished")
+
+    stats = crawler.stats
+    assert stats.get_value("metrics/download_latency_seconds", spider=spider)["count"] == 1
+    assert stats.get_value("metrics/response_bytes", spider=spider)["buckets"]["1024"] == 1
+    assert stats.get_value("metrics/pipeline_seconds/KeepPipeline", spider=spider)["count"] == 2
+    assert stats.get_value("metrics/pipeline_seconds/DropPipeline", spider=spider)["count"] == 2
+
+    with open(str(tmpdir.join("pitt_urbandev.json"))) as f:
+        saved = json.load(f)
+    assert saved["reason"] == "finished"
+    assert {
+        "name": "pipeline_dropped_total",
+        "labels": {
+            "pipeline": "DropPipeline",
+            "spider": "pitt_urbandev"
+        },
+        "value": 1,
+    } in saved["counters"]
+    prom = tmpdir.join("pitt_urbandev.prom").read()
+    assert 'city_scrapers_responses_total{spider="pitt_urbandev",status="200"} 2' in prom
@@ -1,11 +1,16 @@
+import json
 from datetime import datetime
 from os.path import dirname, join
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.utils import file_response
 from freezegun import freeze_time
+from scrapy import Request
+from scrapy.http import TextResponse
 
+from city_scrapers.mixins import DetailStore
 from city_scrapers.spiders.pa_development import PaDevelopmentSpider
 
 test_response = file_response(
@@ -71,3 +76,52 @@ def test_classification():
 @pytest.mark.parametrize("item", parsed_items)
 def test_all_day(item):
     assert item["all_day"] is False
+
+
+def page_response(url, events, **fields):
+    body = json.dumps({"events": events, **fields}).encode()
+    return TextResponse(url, body=body, encoding="utf-8", request=Request(url))
+
+
+@freeze_time("2019-03-11 15:00:00")
+def test_events_requests():
+    page_spider = PaDevelopmentSpider()
+    request = next(page_spider.start_requests())
+    url = urlparse(request.url)
+    assert url.path == "/wp-json/tribe/events/v1/events"
+    assert parse_qs(url.query) == {
+        "page": ["1"],
+        "per_page": ["50"],
+        "start_date": ["2019-02-09 00:00:00"],
+        "end_date": ["2021-03-10 00:00:00"],
+    }
+
+    # Every other page is requested from the first one
+    outputs = list(page_spider.parse(page_response(request.url, [], total_pages=3)))
+    assert [parse_qs(urlparse(output.url).query)["page"] for output in outputs] == [["2"], ["3"]]
+    assert list(page_spider.parse(page_response(request.url, [], total_pages=3), page=2)) == []
+
+    # Pages are followed one at a time when the total isn't listed
+    next_url = "https://dced.pa.gov/wp-json/tribe/events/v1/events/?page=3"
+    outputs = list(page_spider.parse(page_response(request.url, [], next_rest_url=next_url), 2))
+    assert [(output.url, output.cb_kwargs) for output in outputs] == [(next_url, {"page": 3})]
+
+
+@freeze_time("2019-03-11")
+def test_unchanged_events_not_parsed(tmpdir):
+    events = json.loads(test_response.text)["events"][:2]
+    store_spider = PaDevelopmentSpider()
+    store_spider._detail_store = DetailStore(str(tmpdir.join("pa_development.json")))
+    first_items = list(store_spider.parse(page_response(test_response.url, events)))
+    store_spider.closed("finished")
+
+    next_spider = PaDevelopmentSpider()
+    next_spider._detail_store = DetailStore(str(tmpdir.join("pa_development.json")))
+    parsed = []
+    parse_fields = next_spider._parse_fields
+    next_spider._parse_fields = lambda item: parsed.append(item["id"]) or parse_fields(item)
+    changed = dict(events[1], modified="2019-03-10 12:00:00", title="PEDFA Board Meeting")
+    items = list(next_spider.parse(page_response(test_response.url, [events[0], changed])))
+    assert parsed == [changed["id"]]
+    assert items[0] == first_items[0]
+    assert items[1]["title"] == "PEDFA Board Meeting"
@@ -75,3 +75,9 @@ def test_all_day(item):
 # @pytest.mark.parametrize("item", parsed_items)
 # def test_all_day(item):
 #     assert item["all_day"] is False
+
+
+def test_start_other_layouts():
+    assert spider._parse_start("Thu, Jan 16, 2020 -") == datetime(2020, 1, 16, 10)
+    assert spider._parse_start("January 16, 2020 -") == datetime(2020, 1, 16, 10)
+    assert spider._parse_start("Public Meeting January 16th, 2020") == datetime(2020, 1, 16, 10)
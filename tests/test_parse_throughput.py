@@ -0,0 +1,59 @@
+import importlib
+import json
+import os
+
+from benchmarks.parse_throughput import (
+    SPIDERS, Fixture, compare, main, previous_results, run_callback
+)
+
+
+def test_fixtures_exist():
+    for _, _, file_name, _ in SPIDERS.values():
+        assert os.path.exists(os.path.join(os.path.dirname(__file__), "files", file_name))
+
+
+def test_spiders_exist():
+    for spider_path, callback, _, _ in SPIDERS.values():
+        module_name, class_name = spider_path.split(".")
+        module = importlib.import_module("city_scrapers.spiders." + module_name)
+        assert callable(getattr(getattr(module, class_name), callback))
+
+
+def test_detail_callback_measured():
+    # The list page only yields requests for each post, so its post pages are measured instead
+    assert run_callback(*Fixture("alle_asset_district").prepare()) == 1
+
+
+def test_history_saved(tmpdir):
+    history_path = str(tmpdir.join("history.json"))
+    assert main(["--repeat", "1", "--json", "--history", history_path, "pa_utility"]) == 0
+    assert main(["--repeat", "1", "--json", "--history", history_path, "pa_utility"]) == 0
+    with open(history_path) as f:
+        history = json.load(f)
+    assert len(history) == 2
+    result = history[0]["results"][0]
+    assert result["spider"] == "pa_utility"
+    assert result["items"] == 9
+    assert result["median_ms"] > 0
+
+
+def test_compare_previous_commit():
+    history = [
+        {
+            "commit": "a",
+            "results": [{
+                "spider": "pa_utility",
+                "median_ms": 2.0
+            }]
+        },
+        {
+            "commit": "b",
+            "results": [{
+                "spider": "pa_utility",
+                "median_ms": 1.0
+            }]
+        },
+    ]
+    previous = previous_results(history, "b")
+    results = compare([{"spider": "pa_utility", "median_ms": 3.0}], previous)
+    assert results[0]["change_pct"] == 50
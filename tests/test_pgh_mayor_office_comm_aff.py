@@ -1,6 +1,15 @@
+import asyncio
+import json
+
 from freezegun import freeze_time
+from scrapy import Request
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
 
-from city_scrapers.spiders.pgh_mayor_office_comm_aff import PghMayorOfficeCommAffSpider
+from city_scrapers.mixins import DetailStore
+from city_scrapers.spiders.pgh_mayor_office_comm_aff import (
+    NextdoorSession, PghMayorOfficeCommAffSpider, PostHighWaterMark
+)
 
 # test_response = file_response(
 #    join(dirname(__file__), "files", "pgh_mayor_office_comm_aff.html"),
@@ -67,3 +76,148 @@ Uncomment below
 # @pytest.mark.parametrize("item", parsed_items)
 # def test_all_day(item):
 #     assert item["all_day"] is False
+
+POSTS_URL = "https://nextdoor.com/api/profile/2376387/activity/posts/"
+
+
+def activity(post_id, text):
+    return {"post_id": post_id, "message_parts": [{"text": ""}, {"text": text}]}
+
+
+def posts_response(activities, next_page=None):
+    body = {"activities": activities, "show_more": next_page is not None, "next_page": next_page}
+    return TextResponse(
+        POSTS_URL, body=json.dumps(body).encode(), encoding="utf-8", request=Request(POSTS_URL)
+    )
+
+
+def fake_fetch(pages, fetched):
+    async def fetch(request):
+        fetched.append(request.url)
+        if "next_page=" in request.url:
+            return pages[request.url.split("next_page=")[1]]
+        post_id = int(request.url.rstrip("/").split("/")[-1])
+        body = {
+            "posts": [{
+                "subject": "Community meeting {}".format(post_id),
+                "body": "",
+                "creation_date": 1577000000 + post_id,
+            }]
+        }
+        return TextResponse(
+            request.url, body=json.dumps(body).encode(), encoding="utf-8", request=request
+        )
+
+    return fetch
+
+
+def create_spider(tmpdir):
+    state_spider = PghMayorOfficeCommAffSpider()
+    state_spider._session = NextdoorSession(str(tmpdir.join("session.json")))
+    state_spider._high_water_mark = PostHighWaterMark(str(tmpdir.join("mark.json")))
+    state_spider._detail_store = DetailStore(str(tmpdir.join("posts.json")))
+    return state_spider
+
+
+def collect(async_gen):
+    async def consume():
+        return [output async for output in async_gen]
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(consume())
+    finally:
+        loop.close()
+
+
+def test_session_cached(tmpdir):
+    with freeze_time("2020-01-01"):
+        first_spider = create_spider(tmpdir)
+        assert [request.url for request in first_spider.start_requests()] == spider.start_urls
+        token = {"access_token": "access", "id_token": "id", "expires_in": 3600}
+        first_spider._authenticated(
+            TextResponse("https://auth.nextdoor.com/v2/token", body=json.dumps(token).encode())
+        ).send(None)
+
+        assert tmpdir.join("session.json").stat().mode & 0o777 == 0o600
+
+        request = next(create_spider(tmpdir).start_requests())
+        assert request.url == POSTS_URL
+        assert request.cookies == {"ndbr_at": "access", "ndbr_idt": "id"}
+
+    with freeze_time("2020-01-01 00:55:00"):
+        assert next(create_spider(tmpdir).start_requests()).url == spider.start_urls[0]
+
+
+def test_posts_fetched_once(tmpdir):
+    pages = {"2": posts_response([activity(27, "Meeting tonight")])}
+    first_page = posts_response([
+        activity(30, "Public meeting"),
+        activity(29, "Road closure"),
+        activity(28, "Meeting Thursday"),
+    ],
+                                next_page="2")
+    first_spider = create_spider(tmpdir)
+    fetched = []
+    first_spider.fetch = fake_fetch(pages, fetched)
+    items = collect(first_spider._get_posts(first_page))
+    assert [item["title"] for item in items] == [
+        "Community meeting 30",
+        "Community meeting 28",
+        "Community meeting 27",
+    ]
+    assert len(fetched) == 4
+    first_spider.closed("finished")
+
+    # New posts are fetched and paging stops at the last run's newest post
+    next_page = posts_response([
+        activity(31, "Meeting moved"),
+        activity(30, "Public meeting"),
+        activity(29, "Road closure"),
+    ],
+                               next_page="2")
+    next_spider = create_spider(tmpdir)
+    fetched = []
+    next_spider.fetch = fake_fetch(pages, fetched)
+    items = collect(next_spider._get_posts(next_page))
+    assert fetched == ["https://nextdoor.com/web/feeds/post/31/"]
+    assert sorted(item["title"] for item in items) == [
+        "Community meeting 27",
+        "Community meeting 28",
+        "Community meeting 30",
+        "Community meeting 31",
+    ]
+    next_spider.closed("finished")
+    assert PostHighWaterMark(str(tmpdir.join("mark.json"))).value == "31"
+
+
+def test_failed_post_skipped(tmpdir):
+    failing_spider = create_spider(tmpdir)
+    failing_spider.crawler = get_crawler()
+    fetch = fake_fetch({}, [])
+
+    async def fail_post_29(request):
+        if request.url.endswith("/29/"):
+            raise ConnectionRefusedError(request.url)
+        return await fetch(request)
+
+    failing_spider.fetch = fail_post_29
+    items = collect(
+        failing_spider._get_posts(
+            posts_response([activity(30, "Public meeting"),
+                            activity(29, "Meeting Thursday")])
+        )
+    )
+    assert [item["title"] for item in items] == ["Community meeting 30"]
+    # The mark isn't moved past a post that couldn't be fetched
+    failing_spider.closed("finished")
+    assert PostHighWaterMark(str(tmpdir.join("mark.json"))).value is None
+
+
+def test_rejected_session_logs_in_again(tmpdir):
+    session_spider = create_spider(tmpdir)
+    response = TextResponse(POSTS_URL, status=401, request=Request(POSTS_URL))
+    assert [
+        request.url for request in collect(session_spider._get_posts(response))
+    ] == spider.start_urls
+    assert collect(session_spider._get_posts(response)) == []
@@ -1,14 +1,35 @@
+import asyncio
+import json
+from datetime import date, datetime
 from os.path import dirname, join
 
 from city_scrapers_core.utils import file_response
 from freezegun import freeze_time
+from scrapy import Request
+from scrapy.http import Response
 
-from city_scrapers.spiders.pgh_public_schools import PghPublicSchoolsSpider
+from city_scrapers.mixins import DetailStore
+from city_scrapers.spiders.pgh_public_schools import PghPublicSchoolsSpider, SchoolwiresToken
+
+API_URL = "https://awsapieast1-prod2.schoolwires.com/REST/api/v4/"
+DETAIL_URL = API_URL + "CalendarEvents/GetEventDate/1/{}"
 
 test_detail_response = file_response(
     join(dirname(__file__), "files", "pgh_public_schools", "detail.json"),
     url="https://awsapieast1-prod2.schoolwires.com/REST/api/v4/CalendarEvents/GetEventDate/1/17864",
 )
+test_calendar_response = file_response(
+    join(dirname(__file__), "files", "pgh_public_schools", "calendar.json"),
+    url=API_URL + "CalendarEvents/GetEvents/1",
+)
+test_calendar_response.request = Request(
+    test_calendar_response.url, headers={"Authorization": "Bearer token"}
+)
+test_token_response = file_response(
+    join(dirname(__file__), "files", "pgh_public_schools", "token.json"),
+    url="https://www.pghschools.org/Generator/TokenGenerator.ashx/ProcessRequest",
+)
+test_token_json = json.loads(test_token_response.text)
 spider = PghPublicSchoolsSpider()
 
 freezer = freeze_time("2019-02-26")
@@ -67,3 +88,122 @@ def test_title():
 # @pytest.mark.parametrize("item", parsed_items)
 # def test_all_day(item):
 #     assert item["all_day"] is False
+
+
+def test_date_window():
+    with freeze_time("2020-02-15"):
+        start, end = spider._date_window()
+    assert start.date() == date(2019, 11, 17)
+    assert end.date() == date(2021, 8, 16)
+
+
+def test_token_request():
+    with freeze_time("2020-02-15"):
+        request = next(spider.parse(test_token_response))
+    assert "StartDate=2019-11-17&EndDate=2021-08-16" in request.url
+    assert request.headers["Authorization"].startswith(b"Bearer eyJ")
+
+
+def collect(async_gen):
+    async def consume():
+        return [output async for output in async_gen]
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(consume())
+    finally:
+        loop.close()
+
+
+def fake_fetch(fetched, status=200):
+    async def fetch(request):
+        fetched.append(request)
+        return test_detail_response.replace(url=request.url, request=request, status=status)
+
+    return fetch
+
+
+def test_details_requested_once(tmpdir):
+    store_spider = PghPublicSchoolsSpider()
+    store_spider._detail_store = DetailStore(str(tmpdir.join("details.json")))
+    fetched = []
+    store_spider.fetch = fake_fetch(fetched)
+    first = collect(store_spider._parse_api(test_calendar_response))
+    assert [request.url
+            for request in fetched] == [DETAIL_URL.format(18726),
+                                        DETAIL_URL.format(18946)]
+    assert [item["source"] for item in first] == [request.url for request in fetched]
+    store_spider.closed("finished")
+
+    next_spider = PghPublicSchoolsSpider()
+    next_spider._detail_store = DetailStore(str(tmpdir.join("details.json")))
+    fetched = []
+    next_spider.fetch = fake_fetch(fetched)
+    second = collect(next_spider._parse_api(test_calendar_response))
+    assert second[0]["title"] == "2nd Report Card"
+    assert [item["source"]
+            for item in second] == [DETAIL_URL.format(18726),
+                                    DETAIL_URL.format(18946)]
+    assert fetched == []
+
+
+def test_unauthorized_details_retried():
+    retry_spider = PghPublicSchoolsSpider()
+    retry_spider._detail_store = DetailStore()
+    retry_spider.fetch = fake_fetch([], status=401)
+    with freeze_time("2019-12-24"):
+        output = collect(retry_spider._parse_api(test_calendar_response))
+    assert [request.url for request in output] == spider.start_urls
+    assert [request.url for request in retry_spider._awaiting_token
+            ] == [DETAIL_URL.format(18726), DETAIL_URL.format(18946)]
+
+
+def test_changed_event_requested():
+    store = DetailStore()
+    calendar = json.loads(test_calendar_response.text)
+    store.set(18726, store.marker(calendar[0]), {})
+    calendar[0]["Start"] = "2019-02-03T00:00:00"
+    assert store.get(18726, store.marker(calendar[0])) is None
+
+
+def test_token_cached(tmpdir):
+    path = str(tmpdir.join("token.json"))
+    with freeze_time("2019-12-24"):
+        token_spider = PghPublicSchoolsSpider()
+        token_spider._token = SchoolwiresToken(path)
+        assert [request.url for request in token_spider.start_requests()] == spider.start_urls
+        list(token_spider.parse(test_token_response))
+
+        next_spider = PghPublicSchoolsSpider()
+        next_spider._token = SchoolwiresToken(path)
+        request = next(next_spider.start_requests())
+        assert request.url.startswith(API_URL + "CalendarEvents/GetEvents/1")
+        assert request.headers["Authorization"] == next_spider.token.header.encode()
+
+    # Refreshed ahead of the expiration time
+    with freeze_time(datetime.utcfromtimestamp(1577186308 - 60)):
+        request = next(PghPublicSchoolsSpider().start_requests())
+        assert request.url == spider.start_urls[0]
+
+
+def test_unauthorized_retried_once():
+    retry_spider = PghPublicSchoolsSpider()
+    retry_spider.token.update({"Token": "expired", "ExpirationTime": 0})
+    first, second = [
+        retry_spider._api_request(DETAIL_URL.format(event_id), retry_spider._parse_detail_api)
+        for event_id in [18726, 18946]
+    ]
+    token_requests = list(
+        retry_spider._parse_detail_api(Response(first.url, status=401, request=first))
+    )
+    assert [request.url for request in token_requests] == spider.start_urls
+    assert list(retry_spider._parse_detail_api(Response(second.url, status=401,
+                                                        request=second))) == []
+
+    with freeze_time("2019-12-24"):
+        retried = list(token_requests[0].callback(test_token_response))
+    assert [request.url for request in retried] == [first.url, second.url]
+    assert retried[0].headers["Authorization"] == b"Bearer " + test_token_json["Token"].encode()
+    assert list(
+        retry_spider._parse_detail_api(Response(first.url, status=401, request=retried[0]))
+    ) == []
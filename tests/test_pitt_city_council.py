@@ -6,7 +6,7 @@ import pytest
 from city_scrapers_core.constants import COMMITTEE, TENTATIVE
 from freezegun import freeze_time
 
-from city_scrapers.spiders.pitt_city_council import PittCityCouncilSpider
+from city_scrapers.spiders.legistar_agencies import PittCityCouncilSpider
 
 freezer = freeze_time("2019-02-25")
 freezer.start()
@@ -11,16 +11,38 @@ test_response = file_response(
     join(dirname(__file__), "files", "pitt_housing_opp.html"),
     url="https://www.ura.org/events/housing-opportunity-fund-advisory-board-meeting",
 )
+test_events_response = file_response(
+    join(dirname(__file__), "files", "pitt_housing_opp.json"),
+    url="http://www.ura.org/events.json",
+)
 spider = PittHousingOppSpider()
 
 freezer = freeze_time("2019-03-13")
 freezer.start()
 
 parsed_items = [item for item in spider.parse(test_response)]
+event_requests = [request for request in spider._parse_events(test_events_response)]
 
 freezer.stop()
 
 
+def test_start_requests():
+    requests = [request for request in spider.start_requests()]
+    assert [request.url for request in requests] == ["http://www.ura.org/events.json"]
+
+
+def test_start_requests_local_file():
+    local_spider = PittHousingOppSpider(events_url="file:///tmp/events.json")
+    requests = [request for request in local_spider.start_requests()]
+    assert [request.url for request in requests] == ["file:///tmp/events.json"]
+
+
+def test_event_requests():
+    base = "https://www.ura.org/events/housing-opportunity-fund-advisory-board-meeting?day="
+    assert [request.url for request in event_requests] == [base + "4-4-2019", base + "5-2-2019"]
+    assert all(request.callback == spider.parse for request in event_requests)
+
+
 def test_title():
     assert parsed_items[0]["title"] == "Housing Opportunity Fund Advisory Board Meeting"
 
@@ -0,0 +1,104 @@
+from concurrent.futures import Future
+from os.path import dirname, join
+
+import pytest
+from city_scrapers_core.utils import file_response
+from scrapy import Request
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.metrics import CrawlMetrics
+from city_scrapers.middlewares.fingerprint import LOOKUP_META_KEY
+from city_scrapers.process_pool import ProcessPool, run_callback
+from city_scrapers.spiders.alle_health import AlleHealthSpider
+from city_scrapers.spiders.alle_improvements import AlleImprovementsSpider
+
+test_response = file_response(
+    join(dirname(__file__), "files", "alle_improvements.html"),
+    url=(
+        "https://www.county.allegheny.pa.us/economic-development/authorities/meetings-reports/"
+        "aim/meetings.aspx"
+    ),
+)
+
+
+def immediate_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def meeting_fields(items):
+    return [(item["id"], item["title"], item["start"], item["links"]) for item in items]
+
+
+@pytest.fixture
+def pool_spider(monkeypatch):
+    monkeypatch.setattr(ProcessPool, "shared", None)
+    crawler = get_crawler(AlleImprovementsSpider, {"CITY_SCRAPERS_PROCESS_POOL_SIZE": 1})
+    return AlleImprovementsSpider.from_crawler(crawler)
+
+
+def test_called_directly_outside_crawl():
+    spider = AlleImprovementsSpider()
+    assert ProcessPool.for_spider(spider) is None
+    assert len(list(spider.parse(test_response))) > 0
+
+
+def test_run_callback():
+    items, seconds = run_callback(
+        AlleImprovementsSpider,
+        "parse",
+        type(test_response),
+        {
+            "url": test_response.url,
+            "body": test_response.body
+        },
+        {},
+    )
+    assert meeting_fields(items) == meeting_fields(AlleImprovementsSpider().parse(test_response))
+    assert seconds > 0
+
+
+def test_pool_parses_in_worker(pool_spider):
+    pool = ProcessPool.for_spider(pool_spider)
+    try:
+        items, _ = pool.submit(pool_spider, "parse", test_response).result(timeout=60)
+    finally:
+        pool.shutdown()
+    assert meeting_fields(items) == meeting_fields(AlleImprovementsSpider().parse(test_response))
+
+
+def test_pool_callback_timed(tmpdir, monkeypatch):
+    from twisted.internet import reactor
+
+    monkeypatch.setattr(ProcessPool, "shared", None)
+    crawler = get_crawler(
+        AlleImprovementsSpider, {
+            "CITY_SCRAPERS_PROCESS_POOL_SIZE": 1,
+            "CITY_SCRAPERS_METRICS_DIR": str(tmpdir),
+        }
+    )
+    spider = AlleImprovementsSpider.from_crawler(crawler)
+    pool = ProcessPool.for_spider(spider)
+    monkeypatch.setattr(pool, "submit", lambda *args: immediate_future((["item"], 0.2)))
+    monkeypatch.setattr(reactor, "callFromThread", lambda f, *args: f(*args))
+    results = []
+    pool.run(spider, "parse", test_response).addCallback(results.append)
+    pool.shutdown()
+    assert results == [["item"]]
+    histogram = CrawlMetrics.for_crawler(crawler).histograms[
+        ("pool_callback_seconds", (("callback", "parse"), ("spider", spider.name)))]
+    assert (histogram.count, histogram.sum) == (1, 0.2)
+    assert crawler.stats.get_value("process_pool/items", spider=spider) == 1
+
+
+def test_parse_skipped(pool_spider):
+    response = test_response.replace(request=Request(test_response.url))
+    response.meta[LOOKUP_META_KEY] = ("path", "fingerprint", [{"title": "Stored"}])
+    assert pool_spider.parse(response) == []
+    ProcessPool.shared.shutdown()
+
+
+def test_pool_disabled():
+    spider = AlleHealthSpider.from_crawler(get_crawler(AlleHealthSpider))
+    assert ProcessPool.for_spider(spider) is None
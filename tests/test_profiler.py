@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.pipelines import ItemPipelineManager
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.extensions import SamplingProfilerExtension
+from city_scrapers.middlewares import SamplingProfilerMiddleware
+from city_scrapers.profiler import SamplingProfiler
+from city_scrapers.spiders.pitt_city_planning import PittCityPlanningSpider
+
+URL = "http://pittsburghpa.gov/dcp/notices"
+
+spider = PittCityPlanningSpider()
+
+pytestmark = pytest.mark.skipif(
+    not SamplingProfiler.available(), reason="SIGPROF isn't available on this platform"
+)
+
+
+def busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def busy_callback(response):
+    busy(0.05)
+    yield {"title": "Meeting"}
+
+
+class BusyPipeline:
+    def process_item(self, item, spider):
+        busy(0.05)
+        return item
+
+
+@pytest.fixture
+def crawler(tmpdir, monkeypatch):
+    monkeypatch.setattr(SamplingProfiler, "shared", None)
+    crawler = get_crawler(
+        settings_dict={
+            "CITY_SCRAPERS_PROFILE_DIR": str(tmpdir),
+            "CITY_SCRAPERS_PROFILE_INTERVAL": 0.001,
+        }
+    )
+    crawler.spider = spider
+    return crawler
+
+
+def test_disabled():
+    with pytest.raises(NotConfigured):
+        SamplingProfilerMiddleware.from_crawler(get_crawler())
+    with pytest.raises(NotConfigured):
+        SamplingProfilerExtension.from_crawler(get_crawler())
+
+
+def test_profiles_callbacks_and_pipelines(crawler, tmpdir):
+    ext = SamplingProfilerExtension.from_crawler(crawler)
+    middleware = SamplingProfilerMiddleware.from_crawler(crawler)
+    itemproc = ItemPipelineManager(BusyPipeline())
+    ext.wrap_pipelines(itemproc)
+    ext.profiler.start()
+    try:
+        response = HtmlResponse(URL, body=b"<html></html>")
+        for item in middleware.process_spider_output(response, busy_callback(response), spider):
+            itemproc.process_item(item, spider)
+        # Nothing is sampled outside of callbacks and pipelines
+        busy(0.05)
+    finally:
+        ext.spider_closed(spider, "finished")
+
+    assert not ext.profiler.users
+    stacks = [
+        line.rsplit(" ", 1)[0] for line in tmpdir.join("pitt_city_planning.collapsed").readlines()
+    ]
+    assert stacks
+    assert all(stack.startswith("pitt_city_planning;") for stack in stacks)
+    assert any("busy_callback (" in stack and "busy (" in stack for stack in stacks)
+    assert any("process_item (tests/test_profiler.py" in stack for stack in stacks)
+    assert not any("test_profiles_callbacks_and_pipelines" in stack for stack in stacks)
+    assert crawler.stats.get_value("profile/samples", spider=spider) > 0
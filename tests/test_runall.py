@@ -0,0 +1,119 @@
+import logging
+import socket
+from os.path import dirname, join
+from urllib.parse import urlparse
+
+from freezegun import freeze_time
+from scrapy import Request
+from scrapy.http import TextResponse
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+from city_scrapers.archive import ArchiveDownloadHandler, CrawlArchive
+from city_scrapers.commands.runall import Command, SpiderErrorCounter
+from city_scrapers.mixins import legistar
+from city_scrapers.spiders.legistar_agencies import AlleCountySpider, PittCityCouncilSpider
+
+with open(join(dirname(__file__), "files", "pitt_city_council_api.json"), "rb") as f:
+    api_body = f.read()
+
+
+def create_command(settings_dict):
+    command = Command()
+    command.settings = Settings(settings_dict)
+    return command
+
+
+def test_throttle_after_disabled_middleware():
+    command = create_command({
+        "DOWNLOADER_MIDDLEWARES": {
+            "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": None,
+            "city_scrapers.middlewares.ConditionalHttpCacheMiddleware": 900,
+        }
+    })
+    command._add_throttle_middleware()
+    middlewares = command.settings.getdict("DOWNLOADER_MIDDLEWARES")
+    assert middlewares["city_scrapers.middlewares.throttle.SharedThrottleMiddleware"] == 951
+    assert middlewares["scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware"] is None
+
+
+def test_errors_counted_by_spider():
+    counter = SpiderErrorCounter()
+    logging.getLogger().addHandler(counter)
+    try:
+        county_spider = AlleCountySpider()
+        county_spider.logger.error("Failed to parse")
+        county_spider.logger.error("Failed to parse")
+        county_spider.logger.warning("Slow response")
+        PittCityCouncilSpider().logger.error("Failed to parse")
+        logging.getLogger("test_runall").error("Failed to start")
+    finally:
+        logging.getLogger().removeHandler(counter)
+    assert counter.counts == {"alle_county": 2, "pitt_city_council": 1, None: 1}
+
+
+class NetworkEventsScraper:
+    """Stands in for the legistar package, which loads calendars with its own requests"""
+    def events(self, follow_links=True, since=None):
+        socket.create_connection((urlparse(self.BASE_URL).netloc, 443))
+        return iter(())
+
+
+def block_network(*args, **kwargs):
+    raise AssertionError("Network used outside of Scrapy's downloader")
+
+
+def crawl(spider, download):
+    """Run a spider's requests through download, returning the items"""
+    items = []
+    requests = list(spider.start_requests())
+    while requests:
+        request = requests.pop(0)
+        results = []
+        download(request).addBoth(results.append)
+        callback = request.callback or spider.parse
+        outputs = callback(results[0], **request.cb_kwargs)
+        # The "html" Legistar backend returns a Deferred from its thread
+        if isinstance(outputs, defer.Deferred):
+            outputs.addBoth(results.append)
+            if isinstance(results[-1], Failure):
+                results[-1].raiseException()
+            outputs = results[-1]
+        for output in outputs:
+            if isinstance(output, Request):
+                requests.append(output)
+            else:
+                items.append(output)
+    return items
+
+
+@freeze_time("2019-02-25")
+def test_replay_without_network(tmpdir, monkeypatch):
+    monkeypatch.setattr(socket, "create_connection", block_network)
+    monkeypatch.setattr(socket.socket, "connect", block_network)
+    monkeypatch.setattr(legistar, "LegistarEventsScraper", NetworkEventsScraper)
+    monkeypatch.setattr(legistar.threads, "deferToThread", defer.maybeDeferred)
+    archive_dir = str(tmpdir.join("archive"))
+
+    command = create_command({"CITY_SCRAPERS_LEGISTAR_BACKEND": "html"})
+    command._set_archive_mode()
+    settings = command.settings.copy_to_dict()
+    archive = CrawlArchive(archive_dir)
+
+    def record(request):
+        response = TextResponse(request.url, body=api_body, encoding="utf-8", request=request)
+        archive.record(request, response)
+        return defer.succeed(response)
+
+    recorded = crawl(AlleCountySpider.from_crawler(get_crawler(settings_dict=settings)), record)
+    archive.close()
+
+    command._set_replay_handlers(archive_dir)
+    crawler = get_crawler(settings_dict=command.settings.copy_to_dict())
+    handler = ArchiveDownloadHandler.from_crawler(crawler)
+    spider = AlleCountySpider.from_crawler(crawler)
+    replayed = crawl(spider, lambda request: handler.download_request(request, spider))
+    assert len(replayed) == len(recorded) > 0
+    assert crawler.stats.get_value("archive/missing", spider=spider) is None
@@ -0,0 +1,67 @@
+from scrapy import Request
+from scrapy.http import Response
+from twisted.internet.task import Clock
+
+from city_scrapers.middlewares import SharedThrottleMiddleware
+from city_scrapers.middlewares.throttle import SharedSlots
+
+
+def make_middleware(concurrency=2, domain_concurrency=1, domain_delay=0):
+    clock = Clock()
+    return SharedThrottleMiddleware(
+        SharedSlots(concurrency, domain_concurrency, domain_delay, clock=clock)
+    ), clock
+
+
+def fired(d):
+    results = []
+    d.addCallback(results.append)
+    return len(results) > 0
+
+
+def test_domain_concurrency_shared():
+    middleware, _ = make_middleware()
+    first = Request("https://pittsburghpa.gov/dcp/notices")
+    second = Request("https://pittsburghpa.gov/dcp/art-commission-schedule")
+    d1 = middleware.process_request(first, None)
+    d2 = middleware.process_request(second, None)
+    assert fired(d1)
+    assert not fired(d2)
+    middleware.process_response(first, Response(first.url), None)
+    assert fired(d2)
+
+
+def test_global_concurrency():
+    middleware, _ = make_middleware(concurrency=1, domain_concurrency=2)
+    first = Request("https://www.ura.org/events.json")
+    second = Request("https://dced.pa.gov/wp-json/tribe/events/v1/events")
+    d1 = middleware.process_request(first, None)
+    d2 = middleware.process_request(second, None)
+    assert fired(d1)
+    assert not fired(d2)
+    middleware.process_exception(first, Exception(), None)
+    assert fired(d2)
+
+
+def test_domain_delay():
+    middleware, clock = make_middleware(concurrency=3, domain_concurrency=2, domain_delay=1.5)
+    first = Request("https://www.ura.org/events.json")
+    second = Request("https://www.ura.org/pages/board-meeting-notices-agendas-and-minutes")
+    other = Request("https://dced.pa.gov/wp-json/tribe/events/v1/events")
+    d1 = middleware.process_request(first, None)
+    d2 = middleware.process_request(second, None)
+    d3 = middleware.process_request(other, None)
+    assert fired(d1)
+    assert fired(d3)
+    assert not fired(d2)
+    clock.advance(1.5)
+    assert fired(d2)
+
+
+def test_release_once():
+    middleware, _ = make_middleware(concurrency=1)
+    request = Request("https://www.ura.org/events.json")
+    middleware.process_request(request, None)
+    middleware.process_response(request, Response(request.url), None)
+    middleware.process_response(request, Response(request.url), None)
+    assert middleware.slots.total.tokens == 1
@@ -0,0 +1,145 @@
+import gzip
+import io
+import os
+
+import pytest
+from scrapy import signals
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from city_scrapers.extensions import (
+    GzipMultipartFeedStorage, ObjectStoreFeedStorage, ObjectStoreStatusExtension
+)
+from city_scrapers.extensions.feedexport import GzipPartWriter
+from city_scrapers.spiders.pitt_urbandev import PittUrbandevSpider
+from city_scrapers.storage import LocalObjectStore, get_object_store, iter_lines
+
+spider = PittUrbandevSpider()
+
+
+def create_store(tmpdir, stats=None):
+    settings = {"CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir)}
+    return get_object_store("local://bucket/2020/01/16/feed.json", settings, stats=stats)
+
+
+def test_local_store_keys(tmpdir):
+    store, key = create_store(tmpdir)
+    assert isinstance(store, LocalObjectStore)
+    assert key == "2020/01/16/feed.json"
+    store.put(key, b"first")
+    store.put(key, "second")
+    store.put("2020/01/17/feed.json", io.BytesIO(b"next day"))
+    store.put("2020/01/1.json", b"")
+    assert store.get(key) == b"second"
+    assert store.list("2020/01/1") == [
+        "2020/01/1.json", "2020/01/16/feed.json", "2020/01/17/feed.json"
+    ]
+    assert store.list("2020/01/16") == ["2020/01/16/feed.json"]
+    assert store.list("2019") == []
+    with pytest.raises(ValueError):
+        store.put("../outside.json", b"")
+
+
+def test_local_store_counters(tmpdir):
+    stats = get_crawler().stats
+    store, key = create_store(tmpdir, stats=stats)
+    store.put(key, b"line 1\nline 2")
+    with store.open(key) as f:
+        assert list(iter_lines(f, chunk_size=4)) == [b"line 1", b"line 2"]
+    assert store.counters["put"]["bytes"] == 13
+    assert store.counters["read"]["bytes"] == 13
+    assert stats.get_value("objectstore/put/count") == 1
+    assert stats.get_value("objectstore/open/count") == 1
+    assert stats.get_value("objectstore/read/bytes") == 13
+
+
+def test_feed_storage(tmpdir):
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir)})
+    spider.crawler = crawler
+    storage = ObjectStoreFeedStorage.from_crawler(crawler, "local://bucket/2020/pitt_urbandev.json")
+    feed = storage.open(spider)
+    feed.write(b'{"id": 1}\n')
+    storage._store_in_thread(feed)
+    assert tmpdir.join("bucket", "2020", "pitt_urbandev.json").read() == '{"id": 1}\n'
+    assert crawler.stats.get_value("objectstore/put/bytes", spider=spider) == 10
+
+
+def test_status_badge(tmpdir):
+    crawler = get_crawler(
+        settings_dict={
+            "CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir),
+            "CITY_SCRAPERS_STATUS_BUCKET": "status",
+            "FEED_URI": "local://bucket/%(name)s.json",
+        }
+    )
+    crawler.spider = spider
+    extension = ObjectStoreStatusExtension.from_crawler(crawler)
+    extension.spider_closed()
+    assert "running" in tmpdir.join("status", "pitt_urbandev.svg").read()
+
+
+class SyncGzipPartWriter(GzipPartWriter):
+    defer_upload = staticmethod(defer.maybeDeferred)
+
+
+def test_multipart_upload(tmpdir):
+    store, key = create_store(tmpdir)
+    store.put(key, b"old")
+    upload = store.multipart(key)
+    upload.upload_part(b"new ")
+    assert store.get(key) == b"old"
+    upload.upload_part(b"feed")
+    upload.complete()
+    assert store.get(key) == b"new feed"
+
+    upload = store.multipart(key)
+    upload.upload_part(b"aborted")
+    upload.abort()
+    assert store.get(key) == b"new feed"
+    assert os.listdir(str(tmpdir.join("bucket", "2020", "01", "16"))) == ["feed.json"]
+
+
+def test_gzip_feed_storage(tmpdir):
+    crawler = get_crawler(
+        settings_dict={
+            "CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir),
+            "CITY_SCRAPERS_FEED_PART_SIZE": 1024,
+        }
+    )
+    storage = GzipMultipartFeedStorage.from_crawler(crawler, "local://bucket/pitt_urbandev.json")
+    storage.writer_cls = SyncGzipPartWriter
+    feed = storage.open(spider)
+    lines = [os.urandom(512).hex().encode() + b"\n" for _ in range(200)]
+    for line in lines:
+        feed.write(line)
+    results = []
+    storage.store(feed).addBoth(results.append)
+    crawler.signals.send_catch_log(signal=signals.spider_closed, spider=spider, reason="finished")
+    assert results == [None]
+
+    store, _ = create_store(tmpdir)
+    with store.open("pitt_urbandev.json") as f:
+        assert list(iter_lines(f, chunk_size=100)) == [line.strip() for line in lines]
+    body = tmpdir.join("bucket", "pitt_urbandev.json").read_binary()
+    assert gzip.decompress(body) == b"".join(lines)
+    stats = crawler.stats
+    assert stats.get_value("feedexport/gzip/raw_bytes", spider=spider) == 200 * 1025
+    assert stats.get_value("feedexport/gzip/compressed_bytes", spider=spider) == len(body)
+    assert stats.get_value("objectstore/upload_part/count", spider=spider) > 1
+
+
+def test_gzip_feed_storage_aborted(tmpdir):
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_LOCAL_STORE_DIR": str(tmpdir)})
+    store, _ = create_store(tmpdir)
+    store.put("pitt_urbandev.json", b"last feed")
+    storage = GzipMultipartFeedStorage.from_crawler(crawler, "local://bucket/pitt_urbandev.json")
+    storage.writer_cls = SyncGzipPartWriter
+    feed = storage.open(spider)
+    feed.write(b'{"partial": true}\n')
+    results = []
+    storage.store(feed).addBoth(results.append)
+    assert results == []
+    crawler.signals.send_catch_log(signal=signals.spider_closed, spider=spider, reason="shutdown")
+    assert results == [None]
+    assert store.get("pitt_urbandev.json") == b"last feed"
+    assert os.listdir(str(tmpdir.join("bucket"))) == ["pitt_urbandev.json"]
@@ -0,0 +1,38 @@
+from scrapy.http import HtmlResponse
+
+from city_scrapers.utils import iter_elements
+
+BODY = (
+    b"<html><body><script>var big = 1;</script>"
+    b'<table id="skip"><tr><td>Skipped</td></tr></table>'
+    b'<table class="schedule"><tr><td>Time</td><td><a href="/agenda">Agenda</a></td></tr></table>'
+    b'<p>Last</p></body></html>'
+)
+
+
+def make_response(body=BODY):
+    return HtmlResponse("https://example.com", body=body, encoding="utf-8")
+
+
+def test_matched_elements_complete():
+    elements = []
+    for element in iter_elements(
+        make_response(), lambda el: el.get("class") == "schedule" or el.tag == "a", chunk_size=16
+    ):
+        elements.append((element.tag, element.xpath("string()")))
+    assert elements == [("a", "Agenda"), ("table", "TimeAgenda")]
+
+
+def test_earlier_elements_discarded():
+    for element in iter_elements(make_response(), lambda el: el.tag == "p", chunk_size=16):
+        earlier = [child for child in element.getparent() if child is not element]
+        # Cleared as soon as they're parsed, and removed once a later sibling is finished
+        assert [child.tag for child in earlier] == ["table"]
+        assert len(earlier[0]) == 0
+
+
+def test_stops_early():
+    elements = iter_elements(make_response(), lambda el: el.tag == "table", chunk_size=16)
+    first = next(elements)
+    assert first.get("id") == "skip"
+    elements.close()